@@ -4,6 +4,7 @@ AI客户端模块
 负责调用OpenRouter API进行图像识别
 """
 
+import io
 import json
 import base64
 import re
@@ -11,19 +12,25 @@ from typing import List, Dict, Tuple, Optional
 from openai import OpenAI
 from PIL import Image
 import config
+from translation_cache import get_shared_cache, is_cacheable
+from upload_optimizer import prepare_image_for_upload, scale_detections_to_original
 
 
 class AIClient:
     """AI客户端类，用于调用OpenRouter API识别图片中的英文对话区域"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, use_cache: bool = None):
         """
         初始化AI客户端
         
         Args:
             api_key: OpenRouter API密钥，如果不提供则使用config中的默认值
+            use_cache: 是否使用磁盘翻译缓存，不提供时按高级设置决定
         """
         self.api_key = api_key or config.OPENROUTER_API_KEY
+        if use_cache is None:
+            use_cache = config.config_manager.is_cache_enabled()
+        self.use_cache = use_cache
         self.client = OpenAI(
             base_url=config.OPENROUTER_BASE_URL,
             api_key=self.api_key,
@@ -66,6 +73,19 @@ class AIClient:
             格式化的提示词
         """
         width, height = self.get_image_size(image_path)
+        return self.create_prompt_for_size(width, height)
+
+    def create_prompt_for_size(self, width: int, height: int) -> str:
+        """
+        根据给定尺寸创建提示词（用于上传缩小后的图片）
+        
+        Args:
+            width: 上传图片宽度
+            height: 上传图片高度
+            
+        Returns:
+            格式化的提示词
+        """
         return config.PROMPT_TEMPLATE.format(width=width, height=height)
     
     def detect_text_regions(self, image_path: str) -> List[Dict]:
@@ -79,12 +99,38 @@ class AIClient:
             检测结果列表，每个元素包含box_2d和text_content
         """
         try:
-            # 编码图片
-            base64_image = self.encode_image_to_base64(image_path)
-            image_url = f"data:image/jpeg;base64,{base64_image}"
-            
-            # 创建提示词
-            prompt = self.create_prompt(image_path)
+            with open(image_path, "rb") as image_file:
+                image_bytes = image_file.read()
+            upload_settings = config.config_manager.get_upload_settings()
+
+            # 查询磁盘缓存（缓存的坐标已映射回原图）
+            cache = None
+            cache_key = None
+            if self.use_cache:
+                cache = get_shared_cache(config.config_manager.get_cache_max_bytes())
+                provider = config.config_manager.config.get("api_provider", "openrouter")
+                cache_key = cache.make_key(image_bytes, provider, config.OPENROUTER_BASE_URL, config.MODEL_NAME,
+                                           "", "", config.PROMPT_TEMPLATE, upload_settings["max_edge"],
+                                           upload_settings["format"], upload_settings["quality"])
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    print(f"命中检测缓存: {image_path}")
+                    return cached
+
+            # 缩小并重新编码图片
+            upload_bytes, mime_type, scale = prepare_image_for_upload(
+                image_bytes,
+                max_edge=upload_settings["max_edge"],
+                output_format=upload_settings["format"],
+                quality=upload_settings["quality"]
+            )
+            base64_image = base64.b64encode(upload_bytes).decode('utf-8')
+            image_url = f"data:{mime_type};base64,{base64_image}"
+
+            # 创建提示词（坐标基于上传图片的尺寸）
+            with Image.open(io.BytesIO(upload_bytes)) as upload_image:
+                upload_width, upload_height = upload_image.size
+            prompt = self.create_prompt_for_size(upload_width, upload_height)
             
             # 调用API
             completion = self.client.chat.completions.create(
@@ -115,7 +161,16 @@ class AIClient:
             
             # 解析响应
             response_content = completion.choices[0].message.content
-            return self.parse_response(response_content)
+            detections = self.parse_response(response_content)
+
+            # 把坐标映射回原图像素
+            detections = scale_detections_to_original(detections, scale)
+
+            # 写入磁盘缓存
+            if cache is not None and is_cacheable(detections):
+                cache.put(cache_key, detections)
+
+            return detections
             
         except Exception as e:
             print(f"AI检测过程中发生错误: {e}")
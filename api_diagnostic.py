@@ -9,6 +9,8 @@ import requests
 import base64
 import os
 from config import ConfigManager
+import http_transport
+import translation_engine
 
 def check_api_configuration():
     """检查API配置"""
@@ -56,25 +58,14 @@ def test_api_connection():
     provider = config_manager.config.get("api_provider", "openrouter")
     provider_config = config_manager.get_current_provider_config()
     
-    # 构建请求头
-    headers = {
-        'Authorization': f'Bearer {provider_config.get("api_key", "")}',
-        'Content-Type': 'application/json'
-    }
-    
-    # 根据不同服务商添加特定头信息
-    if provider == "openrouter":
-        headers['HTTP-Referer'] = provider_config.get("http_referer", "")
-        headers['X-Title'] = provider_config.get("x_title", "")
-    elif provider == "anthropic":
-        headers['anthropic-version'] = provider_config.get("version", "2023-06-01")
+    # 构建请求头（与翻译时发送的相同）
+    headers = translation_engine.build_headers(provider, provider_config)
     
     # 构建简单的文本测试请求
-    base_url = provider_config.get("base_url", "")
+    url = translation_engine.endpoint_url(provider, provider_config)
     model_name = provider_config.get("model_name", "")
     
     if provider == "anthropic":
-        url = f"{base_url}/messages"
         data = {
             'model': model_name,
             'max_tokens': 100,
@@ -86,7 +77,6 @@ def test_api_connection():
             ]
         }
     else:
-        url = f"{base_url}/chat/completions"
         data = {
             'model': model_name,
             'messages': [
@@ -100,7 +90,7 @@ def test_api_connection():
     
     try:
         print(f"📡 发送测试请求到: {url}")
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = http_transport.post(provider, url, headers=headers, json=data, timeout=30)
         
         print(f"📊 响应状态码: {response.status_code}")
         
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+压缩包读取模块
+图片列表中的条目可以指向CBZ/ZIP压缩包内的图片，格式为 "压缩包路径::成员路径"；
+解码和上传时按需读取成员的字节，不需要先解压到临时文件夹
+"""
+
+import io
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+import config
+
+# 压缩包路径和成员路径之间的分隔符
+MEMBER_SEPARATOR = "::"
+# 同时保持打开的压缩包数量
+MAX_OPEN_ARCHIVES = 8
+
+_open_archives = OrderedDict()  # {压缩包路径: (ZipFile, 锁)}，从旧到新
+_open_archives_lock = threading.Lock()
+
+
+def is_archive(path: str) -> bool:
+    """扩展名是否为支持的压缩包格式"""
+    return os.path.splitext(path)[1].lower() in config.ARCHIVE_FORMATS
+
+
+def member_path(archive_path: str, member: str) -> str:
+    """组合压缩包内图片的路径"""
+    return f"{archive_path}{MEMBER_SEPARATOR}{member}"
+
+
+def split_member_path(path: str) -> Optional[Tuple[str, str]]:
+    """
+    拆分压缩包内图片的路径
+
+    Returns:
+        (压缩包路径, 成员路径)，普通文件路径返回None
+    """
+    extensions = "|".join(re.escape(ext) for ext in config.ARCHIVE_FORMATS)
+    match = re.match(rf"^(.*?(?:{extensions})){re.escape(MEMBER_SEPARATOR)}(.+)$", path, re.IGNORECASE)
+    if match is None:
+        return None
+    return match.group(1), match.group(2)
+
+
+def list_members(archive_path) -> List[str]:
+    """
+    列出压缩包内的文件（跳过文件夹、隐藏文件和macOS生成的__MACOSX目录）
+
+    Returns:
+        成员路径列表（压缩包内的顺序）
+
+    Raises:
+        ValueError: 无法读取压缩包
+    """
+    return [info.filename for info in list_member_infos(archive_path)]
+
+
+def list_member_infos(archive_path) -> List[zipfile.ZipInfo]:
+    """
+    同 list_members，但返回 ZipInfo（可在解压前查看 file_size 等目录信息）
+
+    Raises:
+        ValueError: 无法读取压缩包
+    """
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            infos = [info for info in archive.infolist() if not info.is_dir()]
+    except (OSError, zipfile.BadZipFile) as e:
+        raise ValueError(f"无法读取压缩包: {e}") from e
+
+    return [info for info in infos
+            if not info.filename.startswith("__MACOSX/") and not os.path.basename(info.filename).startswith(".")]
+
+
+def read_bytes(path: str) -> bytes:
+    """读取图片文件或压缩包内图片的全部字节"""
+    parts = split_member_path(path)
+    if parts is None:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    archive_path, member = parts
+    archive, lock = _get_archive(archive_path)
+    try:
+        with lock:
+            return archive.read(member)
+    except KeyError as e:
+        raise FileNotFoundError(f"压缩包中没有该文件: {path}") from e
+
+
+def open_image_source(path: str) -> Union[str, BinaryIO]:
+    """供Image.open使用的来源：普通文件直接返回路径，压缩包内图片返回内存中的字节流"""
+    if split_member_path(path) is None:
+        return path
+    return io.BytesIO(read_bytes(path))
+
+
+def exists(path: str) -> bool:
+    """图片文件或压缩包内图片是否存在"""
+    parts = split_member_path(path)
+    if parts is None:
+        return os.path.exists(path)
+
+    archive_path, member = parts
+    if not os.path.exists(archive_path):
+        return False
+    try:
+        archive, lock = _get_archive(archive_path)
+        with lock:
+            archive.getinfo(member)
+        return True
+    except (KeyError, OSError, zipfile.BadZipFile):
+        return False
+
+
+def file_system_path(path: str) -> str:
+    """在文件管理器中对应的路径（压缩包内图片返回压缩包本身）"""
+    parts = split_member_path(path)
+    return path if parts is None else parts[0]
+
+
+def close_all():
+    """关闭所有保持打开的压缩包（确认没有线程正在读取时调用）"""
+    with _open_archives_lock:
+        for archive, _ in _open_archives.values():
+            archive.close()
+        _open_archives.clear()
+
+
+def close_archive(archive_path: str):
+    """关闭一个保持打开的压缩包（确认没有线程正在读取时调用，例如删除临时压缩包之前）"""
+    with _open_archives_lock:
+        entry = _open_archives.pop(archive_path, None)
+    if entry is not None:
+        entry[0].close()
+
+
+def _get_archive(archive_path: str):
+    """取得已打开的压缩包（最近使用的保持打开，超出数量时不再保持最久未用的）"""
+    with _open_archives_lock:
+        entry = _open_archives.get(archive_path)
+        if entry is not None:
+            _open_archives.move_to_end(archive_path)
+            return entry
+
+        entry = (zipfile.ZipFile(archive_path), threading.Lock())
+        _open_archives[archive_path] = entry
+        # 只移除引用，不主动关闭：其他线程可能仍在读取，最后一个引用释放时自动关闭
+        while len(_open_archives) > MAX_OPEN_ARCHIVES:
+            _open_archives.popitem(last=False)
+        return entry
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+批量执行模块
+以有界并发（同时保持K个请求在途）执行任务，并按输入顺序产出结果，
+便于调用方按页序汇报进度
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+# 已完成但尚未按序产出的结果最多缓存为并发数的倍数，避免慢页导致无限预取
+REORDER_WINDOW_FACTOR = 4
+
+
+def run_ordered(items: Iterable[Any], worker: Callable[[Any], Any],
+                concurrency: int) -> Iterator[Tuple[int, Any, Any, Optional[Exception]]]:
+    """
+    并发执行worker并按输入顺序产出结果
+
+    Args:
+        items: 待处理的任务列表
+        worker: 处理单个任务的函数，在工作线程中调用
+        concurrency: 最大并发数
+
+    Returns:
+        迭代器，依次产出 (序号, 任务, 结果, 异常)；任务失败时结果为None、异常为捕获到的异常
+    """
+    items = list(items)
+    total = len(items)
+    if total == 0:
+        return
+
+    concurrency = max(1, min(int(concurrency), total))
+    window = concurrency * REORDER_WINDOW_FACTOR
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch")
+    in_flight = {}      # {future: index}
+    finished = {}       # {index: future}
+    next_submit = 0
+    next_yield = 0
+
+    try:
+        while next_yield < total:
+            # 补充任务，保持并发数个请求在途
+            while (next_submit < total and len(in_flight) < concurrency
+                   and next_submit - next_yield < window):
+                future = executor.submit(worker, items[next_submit])
+                in_flight[future] = next_submit
+                next_submit += 1
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[in_flight.pop(future)] = future
+
+            # 按顺序产出已完成的连续前缀
+            while next_yield in finished:
+                future = finished.pop(next_yield)
+                error = future.exception()
+                result = None if error is not None else future.result()
+                yield next_yield, items[next_yield], result, error
+                next_yield += 1
+    finally:
+        # 调用方提前结束时取消尚未开始的任务
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False)
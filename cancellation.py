@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+取消令牌模块
+翻译流水线（编码、请求、解析）在各阶段之间检查令牌，取消后尽快停止；
+正在等待的HTTP请求通过令牌上注册的回调直接关闭连接，不必等到超时
+"""
+
+import threading
+from typing import Callable, List, Optional
+
+
+class CancelledError(Exception):
+    """
+    翻译被取消
+
+    Attributes:
+        partial_results: 取消前已经收到的文本块（流式响应时），没有时为None
+    """
+
+    def __init__(self, message: str = "翻译已取消", partial_results: Optional[List] = None):
+        super().__init__(message)
+        self.partial_results = partial_results
+
+
+class CancelToken:
+    """协作式取消令牌：一个任务一个，可在任意线程中取消"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """取消：之后的检查点抛出CancelledError，并立即调用已注册的回调（如关闭连接）"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ 取消回调出错: {e}")
+
+    def raise_if_cancelled(self):
+        """检查点：已取消时抛出CancelledError"""
+        if self._event.is_set():
+            raise CancelledError()
+
+    def wait(self, timeout: float) -> bool:
+        """可被取消打断的等待，返回是否已取消"""
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        注册取消时调用的回调（已取消时立即调用）
+
+        Returns:
+            注销该回调的函数
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback):
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+
+def check(token: Optional[CancelToken]):
+    """令牌可以为None（不可取消）的检查点"""
+    if token is not None:
+        token.raise_if_cancelled()
@@ -6,19 +6,28 @@
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import cv2
-from PIL import Image, ImageTk
+from PIL import ImageTk
 import json
 import os
-import requests
-import base64
 import threading
 import datetime
-import re
 
 # 导入配置
 import config
 from config import config_manager
+import translation_cache
+import rate_limiter
+import translation_journal
+import image_viewport
+import scaled_image_cache
+import page_loader
+import image_list_view
+import folder_scanner
+import archive_reader
+import translation_engine
+import job_scheduler
+import read_ahead
+import cancellation
 
 # 导入设置窗口
 class SettingsWindow:
@@ -34,7 +43,7 @@ class SettingsWindow:
         """创建设置窗口"""
         self.window = tk.Toplevel(self.parent)
         self.window.title("设置 - 漫画翻译器")
-        self.window.geometry("700x600")
+        self.window.geometry("700x720")
         self.window.resizable(True, True)
         
         # 设置窗口属性
@@ -78,6 +87,10 @@ class SettingsWindow:
             # 标签页3: 高级设置
             self.create_advanced_tab()
             print("✅ 高级设置标签页创建成功")
+
+            # 标签页4: 性能设置
+            self.create_performance_tab()
+            print("✅ 性能设置标签页创建成功")
             
         except Exception as e:
             print(f"❌ 创建标签页时出错: {e}")
@@ -174,7 +187,31 @@ class SettingsWindow:
                                   values=["自然", "直译", "意译", "口语化", "正式"],
                                   state="readonly", width=20)
         style_combo.grid(row=1, column=1, sticky=tk.W, pady=5, padx=(10, 0))
-        
+
+        # 批量并发数
+        ttk.Label(translate_frame, text="批量并发数:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.concurrency_var = tk.IntVar(value=config_manager.get_batch_concurrency())
+        concurrency_spin = ttk.Spinbox(translate_frame, from_=1, to=16, textvariable=self.concurrency_var,
+                                       width=18)
+        concurrency_spin.grid(row=2, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        # 流式响应
+        self.stream_var = tk.BooleanVar(value=config_manager.is_streaming_enabled())
+        ttk.Checkbutton(translate_frame, text="流式显示翻译结果（边接收边显示）",
+                        variable=self.stream_var).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=5)
+
+        # 限流重试与熔断
+        rate_limit_settings = config_manager.get_rate_limit_settings()
+        ttk.Label(translate_frame, text="失败重试次数:").grid(row=4, column=0, sticky=tk.W, pady=5)
+        self.max_retries_var = tk.IntVar(value=rate_limit_settings["max_retries"])
+        ttk.Spinbox(translate_frame, from_=0, to=20, textvariable=self.max_retries_var,
+                    width=18).grid(row=4, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        ttk.Label(translate_frame, text="熔断暂停(秒):").grid(row=5, column=0, sticky=tk.W, pady=5)
+        self.breaker_cooldown_var = tk.IntVar(value=int(rate_limit_settings["breaker_cooldown"]))
+        ttk.Spinbox(translate_frame, from_=0, to=600, increment=10, textvariable=self.breaker_cooldown_var,
+                    width=18).grid(row=5, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
         # 提示词设置
         prompt_frame = ttk.LabelFrame(frame, text="自定义提示词", padding=10)
         prompt_frame.pack(fill=tk.BOTH, expand=True)
@@ -186,6 +223,132 @@ class SettingsWindow:
         saved_prompt = config_manager.get_custom_prompt()
         self.prompt_text.insert(1.0, saved_prompt)
     
+    def create_performance_tab(self):
+        """创建性能设置标签页"""
+        frame = ttk.Frame(self.notebook)
+        self.notebook.add(frame, text="性能设置")
+
+        # 缓存设置
+        cache_frame = ttk.LabelFrame(frame, text="翻译缓存", padding=10)
+        cache_frame.pack(fill=tk.X, pady=(0, 10))
+
+        self.bypass_cache_var = tk.BooleanVar(value=not config_manager.is_cache_enabled())
+        ttk.Checkbutton(cache_frame, text="跳过缓存（总是重新调用API）",
+                        variable=self.bypass_cache_var).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=5)
+
+        ttk.Label(cache_frame, text="缓存上限(MB):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.cache_max_mb_var = tk.IntVar(value=config_manager.get_cache_max_bytes() // (1024 * 1024))
+        ttk.Spinbox(cache_frame, from_=10, to=10240, increment=10, textvariable=self.cache_max_mb_var,
+                    width=18).grid(row=1, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        ttk.Button(cache_frame, text="清空缓存", command=self.clear_translation_cache).grid(
+            row=1, column=2, sticky=tk.W, pady=5, padx=(10, 0))
+
+        # 上传优化设置
+        upload_settings = config_manager.get_upload_settings()
+        upload_frame = ttk.LabelFrame(frame, text="上传优化", padding=10)
+        upload_frame.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(upload_frame, text="最大长边(像素, 0=不缩小):").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.upload_max_edge_var = tk.IntVar(value=upload_settings["max_edge"])
+        ttk.Spinbox(upload_frame, from_=0, to=8192, increment=256, textvariable=self.upload_max_edge_var,
+                    width=18).grid(row=0, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        ttk.Label(upload_frame, text="上传格式:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.upload_format_var = tk.StringVar(value=upload_settings["format"])
+        ttk.Combobox(upload_frame, textvariable=self.upload_format_var, values=["JPEG", "WEBP", "PNG"],
+                     state="readonly", width=18).grid(row=1, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        ttk.Label(upload_frame, text="编码质量(1-100):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.upload_quality_var = tk.IntVar(value=upload_settings["quality"])
+        ttk.Spinbox(upload_frame, from_=1, to=100, textvariable=self.upload_quality_var,
+                    width=18).grid(row=2, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        # 长图切片设置
+        tile_settings = config_manager.get_tile_settings()
+        tile_frame = ttk.LabelFrame(frame, text="长条漫画切片", padding=10)
+        tile_frame.pack(fill=tk.X, pady=(0, 10))
+
+        self.tile_enabled_var = tk.BooleanVar(value=tile_settings["enabled"])
+        ttk.Checkbutton(tile_frame, text="自动切片翻译长条漫画（高宽比≥3）",
+                        variable=self.tile_enabled_var).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=5)
+
+        ttk.Label(tile_frame, text="切片高度(像素):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.tile_height_var = tk.IntVar(value=tile_settings["tile_height"])
+        ttk.Spinbox(tile_frame, from_=256, to=8192, increment=100, textvariable=self.tile_height_var,
+                    width=18).grid(row=1, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        ttk.Label(tile_frame, text="重叠高度(像素):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.tile_overlap_var = tk.IntVar(value=tile_settings["overlap"])
+        ttk.Spinbox(tile_frame, from_=0, to=2000, increment=50, textvariable=self.tile_overlap_var,
+                    width=18).grid(row=2, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        # 多页合并设置
+        packing_settings = config_manager.get_packing_settings()
+        packing_frame = ttk.LabelFrame(frame, text="多页合并", padding=10)
+        packing_frame.pack(fill=tk.X, pady=(0, 10))
+
+        self.pack_enabled_var = tk.BooleanVar(value=packing_settings["enabled"])
+        ttk.Checkbutton(packing_frame, text="批量翻译时把多张小图合并到一次请求（适合四格漫画）",
+                        variable=self.pack_enabled_var).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=5)
+
+        ttk.Label(packing_frame, text="每次请求最多页数:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.pack_max_pages_var = tk.IntVar(value=packing_settings["max_pages"])
+        ttk.Spinbox(packing_frame, from_=2, to=8, textvariable=self.pack_max_pages_var,
+                    width=18).grid(row=1, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        ttk.Label(packing_frame, text="小图像素上限(万像素):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.pack_max_pixels_var = tk.IntVar(value=packing_settings["max_pixels"] // 10000)
+        ttk.Spinbox(packing_frame, from_=10, to=1000, increment=10, textvariable=self.pack_max_pixels_var,
+                    width=18).grid(row=2, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        # 阅读时预翻译设置
+        read_ahead_settings = config_manager.get_read_ahead_settings()
+        read_ahead_frame = ttk.LabelFrame(frame, text="阅读时预翻译", padding=10)
+        read_ahead_frame.pack(fill=tk.X, pady=(0, 10))
+
+        self.read_ahead_enabled_var = tk.BooleanVar(value=read_ahead_settings["enabled"])
+        ttk.Checkbutton(read_ahead_frame, text="阅读时在后台翻译之后几张未翻译的图片（会产生API费用）",
+                        variable=self.read_ahead_enabled_var).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=5)
+
+        ttk.Label(read_ahead_frame, text="向后预翻译页数:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.read_ahead_pages_var = tk.IntVar(value=read_ahead_settings["pages"])
+        ttk.Spinbox(read_ahead_frame, from_=1, to=10, textvariable=self.read_ahead_pages_var,
+                    width=18).grid(row=1, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        ttk.Label(read_ahead_frame, text="同时预翻译请求数:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.read_ahead_concurrency_var = tk.IntVar(value=read_ahead_settings["max_concurrency"])
+        ttk.Spinbox(read_ahead_frame, from_=1, to=4, textvariable=self.read_ahead_concurrency_var,
+                    width=18).grid(row=2, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        ttk.Label(read_ahead_frame, text="每次启动最多预翻译页数:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        self.read_ahead_limit_var = tk.IntVar(value=read_ahead_settings["page_limit"])
+        ttk.Spinbox(read_ahead_frame, from_=1, to=10000, increment=10, textvariable=self.read_ahead_limit_var,
+                    width=18).grid(row=3, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        # 图片预览设置
+        viewer_frame = ttk.LabelFrame(frame, text="图片预览", padding=10)
+        viewer_frame.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Label(viewer_frame, text="预览缓存上限(MB):").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.viewer_cache_mb_var = tk.IntVar(value=config_manager.get_viewer_cache_bytes() // (1024 * 1024))
+        ttk.Spinbox(viewer_frame, from_=32, to=8192, increment=32, textvariable=self.viewer_cache_mb_var,
+                    width=18).grid(row=0, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+        ttk.Label(viewer_frame, text="预读前后页数(0=关闭):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.prefetch_pages_var = tk.IntVar(value=config_manager.get_prefetch_pages())
+        ttk.Spinbox(viewer_frame, from_=0, to=8, textvariable=self.prefetch_pages_var,
+                    width=18).grid(row=1, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+
+    def clear_translation_cache(self):
+        """清空磁盘翻译缓存"""
+        if messagebox.askyesno("确认清空", "确定要清空所有已缓存的翻译结果吗？", parent=self.window):
+            try:
+                translation_cache.get_shared_cache().clear()
+                messagebox.showinfo("完成", "翻译缓存已清空", parent=self.window)
+            except Exception as e:
+                messagebox.showerror("错误", f"清空缓存失败: {e}", parent=self.window)
+
     def create_config_inputs(self):
         """创建配置输入框"""
         # 清空现有控件
@@ -224,6 +387,12 @@ class SettingsWindow:
                 ("自定义头信息", "headers", False)
             ]
         
+        # 所有服务商共用的限流设置
+        fields += [
+            ("每分钟请求数(0=不限)", "requests_per_minute", False),
+            ("每分钟token数(0=不限)", "tokens_per_minute", False)
+        ]
+
         for i, (label, key, required) in enumerate(fields):
             ttk.Label(self.config_frame, text=f"{label}{'*' if required else ''}:").grid(
                 row=i, column=0, sticky=tk.W, pady=5)
@@ -355,6 +524,12 @@ class SettingsWindow:
                             return
                     else:
                         provider_updates[key] = value
+                elif key in ("requests_per_minute", "tokens_per_minute"):
+                    try:
+                        provider_updates[key] = max(0, int(var.get().strip() or 0))
+                    except ValueError:
+                        messagebox.showerror("错误", "每分钟请求数和token数必须是整数")
+                        return
                 else:
                     provider_updates[key] = var.get()
 
@@ -382,6 +557,103 @@ class SettingsWindow:
                 advanced_settings["translation_style"] = self.style_var.get()
                 print(f"💾 保存翻译风格: {self.style_var.get()}")
 
+            # 保存批量并发数
+            if hasattr(self, 'concurrency_var'):
+                try:
+                    advanced_settings["batch_concurrency"] = max(1, min(int(self.concurrency_var.get()), 16))
+                except (tk.TclError, ValueError):
+                    messagebox.showerror("错误", "批量并发数必须是1-16之间的整数")
+                    return
+                print(f"💾 保存批量并发数: {advanced_settings['batch_concurrency']}")
+
+            # 保存流式响应设置
+            if hasattr(self, 'stream_var'):
+                advanced_settings["stream_responses"] = bool(self.stream_var.get())
+                print(f"💾 保存流式响应: {advanced_settings['stream_responses']}")
+
+            # 保存重试与熔断设置
+            if hasattr(self, 'max_retries_var'):
+                try:
+                    advanced_settings["max_retries"] = max(0, min(int(self.max_retries_var.get()), 20))
+                    advanced_settings["breaker_cooldown"] = max(0, int(self.breaker_cooldown_var.get()))
+                except (tk.TclError, ValueError):
+                    messagebox.showerror("错误", "重试次数和熔断暂停时间必须是整数")
+                    return
+                print(f"💾 保存重试设置: 重试={advanced_settings['max_retries']}次, "
+                      f"熔断暂停={advanced_settings['breaker_cooldown']}秒")
+
+            # 保存缓存设置
+            if hasattr(self, 'bypass_cache_var'):
+                advanced_settings["bypass_cache"] = bool(self.bypass_cache_var.get())
+                try:
+                    advanced_settings["cache_max_mb"] = max(1, int(self.cache_max_mb_var.get()))
+                except (tk.TclError, ValueError):
+                    messagebox.showerror("错误", "缓存上限必须是正整数")
+                    return
+                print(f"💾 保存缓存设置: 跳过缓存={advanced_settings['bypass_cache']}, "
+                      f"上限={advanced_settings['cache_max_mb']}MB")
+
+            # 保存上传优化设置
+            if hasattr(self, 'upload_max_edge_var'):
+                try:
+                    advanced_settings["upload_max_edge"] = max(0, int(self.upload_max_edge_var.get()))
+                    advanced_settings["upload_quality"] = max(1, min(int(self.upload_quality_var.get()), 100))
+                except (tk.TclError, ValueError):
+                    messagebox.showerror("错误", "最大长边和编码质量必须是整数")
+                    return
+                advanced_settings["upload_format"] = self.upload_format_var.get()
+                print(f"💾 保存上传优化设置: 长边={advanced_settings['upload_max_edge']}, "
+                      f"格式={advanced_settings['upload_format']}, 质量={advanced_settings['upload_quality']}")
+
+            # 保存长图切片设置
+            if hasattr(self, 'tile_enabled_var'):
+                try:
+                    advanced_settings["tile_height"] = max(256, int(self.tile_height_var.get()))
+                    advanced_settings["tile_overlap"] = max(0, int(self.tile_overlap_var.get()))
+                except (tk.TclError, ValueError):
+                    messagebox.showerror("错误", "切片高度和重叠高度必须是整数")
+                    return
+                advanced_settings["tile_tall_images"] = bool(self.tile_enabled_var.get())
+                print(f"💾 保存长图切片设置: 启用={advanced_settings['tile_tall_images']}, "
+                      f"高度={advanced_settings['tile_height']}, 重叠={advanced_settings['tile_overlap']}")
+
+            # 保存多页合并设置
+            if hasattr(self, 'pack_enabled_var'):
+                try:
+                    advanced_settings["pack_max_pages"] = max(2, min(int(self.pack_max_pages_var.get()), 8))
+                    advanced_settings["pack_page_max_pixels"] = max(0, int(self.pack_max_pixels_var.get())) * 10000
+                except (tk.TclError, ValueError):
+                    messagebox.showerror("错误", "最多页数和像素上限必须是整数")
+                    return
+                advanced_settings["pack_small_pages"] = bool(self.pack_enabled_var.get())
+                print(f"💾 保存多页合并设置: 启用={advanced_settings['pack_small_pages']}, "
+                      f"页数={advanced_settings['pack_max_pages']}, 像素上限={advanced_settings['pack_page_max_pixels']}")
+
+            # 保存阅读时预翻译设置
+            if hasattr(self, 'read_ahead_enabled_var'):
+                try:
+                    advanced_settings["read_ahead_pages"] = max(1, min(int(self.read_ahead_pages_var.get()), 10))
+                    advanced_settings["read_ahead_concurrency"] = max(1, min(int(self.read_ahead_concurrency_var.get()), 4))
+                    advanced_settings["read_ahead_page_limit"] = max(1, int(self.read_ahead_limit_var.get()))
+                except (tk.TclError, ValueError):
+                    messagebox.showerror("错误", "预翻译页数、请求数和页数上限必须是整数")
+                    return
+                advanced_settings["read_ahead_enabled"] = bool(self.read_ahead_enabled_var.get())
+                print(f"💾 保存预翻译设置: 启用={advanced_settings['read_ahead_enabled']}, "
+                      f"页数={advanced_settings['read_ahead_pages']}, 并发={advanced_settings['read_ahead_concurrency']}, "
+                      f"上限={advanced_settings['read_ahead_page_limit']}页")
+
+            # 保存图片预览设置
+            if hasattr(self, 'viewer_cache_mb_var'):
+                try:
+                    advanced_settings["viewer_cache_mb"] = max(32, int(self.viewer_cache_mb_var.get()))
+                    advanced_settings["prefetch_pages"] = max(0, min(int(self.prefetch_pages_var.get()), 8))
+                except (tk.TclError, ValueError):
+                    messagebox.showerror("错误", "预览缓存上限和预读页数必须是整数")
+                    return
+                print(f"💾 保存图片预览设置: 缓存上限={advanced_settings['viewer_cache_mb']}MB, "
+                      f"预读={advanced_settings['prefetch_pages']}页")
+
             # 保存自定义提示词
             if hasattr(self, 'prompt_text'):
                 custom_prompt = self.prompt_text.get(1.0, tk.END).strip()
@@ -421,24 +693,43 @@ class ComicFullTranslatorApp:
         self.root.geometry("1600x1000")
 
         # 应用状态
-        self.image_list = []  # 存储所有图片路径
+        self.image_list = image_list_view.ImageListModel()  # 所有图片路径（有序、不重复）
         self.current_image_index = 0  # 当前显示的图片索引
-        self.current_image = None
+        self.current_page = None  # 当前显示的已解码页面
         self.all_translation_results = {}  # 存储所有图片的翻译结果 {image_path: results}
-        self.is_translating = False
-        self.is_batch_translating = False
+        self.scheduler = job_scheduler.PriorityScheduler(
+            config_manager.get_batch_concurrency())  # 翻译任务调度（当前页优先于批量翻译）
+        self.read_ahead = read_ahead.ReadAhead(
+            self.scheduler, self._make_read_ahead_work,
+            on_done=lambda job: self.root.after(0, self._read_ahead_complete, job))  # 阅读时预翻译后面几页
+        self.read_ahead.configure(config_manager.get_read_ahead_settings())
+        self.batch_state = None  # 进行中的批量翻译进度，没有时为None
+        self.progress_running = False  # 进度条动画是否在运行
+        self.results_lock = threading.Lock()  # 保护all_translation_results的并发写入
+        self.streaming_path = None  # 正在流式显示结果的图片
+        self.streaming_block_count = 0  # 流式翻译已显示的文本块数
+        self.journal = translation_journal.TranslationJournal()  # 崩溃恢复用的翻译日志
+        self.engine = translation_engine.TranslationEngine(config_manager)  # 全图翻译引擎（与命令行共用）
+        self.import_generation = 0  # 清空列表时递增，丢弃之前仍在扫描的文件夹导入结果
 
         # 图片显示相关状态
-        self.photo = None  # 当前显示的图片对象
         self.image_scale = 1.0  # 图片缩放比例
         self.image_offset_x = 0  # 图片X偏移
         self.image_offset_y = 0  # 图片Y偏移
         self.drag_start_x = 0  # 拖拽起始X坐标
         self.drag_start_y = 0  # 拖拽起始Y坐标
-        self.original_pil_image = None  # 原始PIL图片对象
 
         # 性能优化相关
-        self.image_cache = {}  # 图片缓存 {scale: PIL_Image}
+        self.image_cache = scaled_image_cache.ScaledImageCache(
+            config_manager.get_viewer_cache_bytes())  # 图块缓存 {(scale, col, row, 质量): PIL_Image}
+        self.tile_items = {}  # 画布上的图块 {(col, row): (item_id, PhotoImage, 是否为草图)}
+        self.spare_tile_items = []  # 隐藏待复用的图块 [(item_id, PhotoImage), ...]
+        self.rendered_scale = None  # 画布上图块对应的缩放比例
+        self.viewport_render_timer = None  # 视口补块定时器
+        self.hq_render_timer = None  # 缩放停止后的高质量渲染定时器
+        self.hq_render_delay_ms = 150  # 缩放输入停止多久后进行高质量渲染
+        self.prefetcher = page_loader.PagePrefetcher(
+            2 * config_manager.get_prefetch_pages() + 1)  # 相邻页预读
         self.last_canvas_size = (0, 0)  # 上次画布大小
         self.auto_fit_enabled = True  # 是否启用自适应缩放
         self.is_dragging = False  # 是否正在拖拽
@@ -459,7 +750,44 @@ class ComicFullTranslatorApp:
 
         # 显示当前配置
         self.update_status_with_config()
+
+        # 从翻译日志恢复上次的图片列表和翻译结果
+        self.restore_from_journal()
     
+    def restore_from_journal(self):
+        """重放翻译日志，恢复上次会话（包括崩溃前）的图片列表和已完成的翻译结果"""
+        try:
+            image_list, results = self.journal.load()
+        except Exception as e:
+            print(f"⚠️ 读取翻译日志失败: {e}")
+            return
+
+        # 跳过已经不存在的文件
+        image_list = [path for path in image_list if archive_reader.exists(path)]
+        if not image_list:
+            return
+
+        self.image_list = image_list_view.ImageListModel(image_list)
+        self.all_translation_results = {path: results[path] for path in image_list if path in results}
+        self.journal.compact(self.image_list, self.all_translation_results)
+
+        self.current_image_index = 0
+        self.update_image_list_display()
+        self.load_current_image()
+
+        restored = len(self.all_translation_results)
+        print(f"📒 从翻译日志恢复: {len(self.image_list)} 张图片，{restored} 个翻译结果")
+        self.status_var.set(f"已恢复上次会话: {len(self.image_list)} 张图片，{restored} 张已翻译，"
+                            f"{len(self.image_list) - restored} 张待翻译")
+
+    def _store_translation_result(self, image_path, results):
+        """保存一页翻译结果并立即写入翻译日志（可在工作线程中调用）；图片已从列表移除时丢弃"""
+        with self.results_lock:
+            if image_path not in self.image_list:
+                return  # 翻译期间图片被移除或列表被清空，不再写回结果
+            self.all_translation_results[image_path] = results
+            self.journal.record_result(image_path, results)
+
     def create_ui(self):
         """创建用户界面 - 阅读器风格"""
 
@@ -509,11 +837,12 @@ class ComicFullTranslatorApp:
         file_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
 
         # 添加拖拽提示
-        drag_tip = ttk.Label(file_frame, text="💡 可拖拽图片到窗口", foreground="blue", font=("Arial", 8))
+        drag_tip = ttk.Label(file_frame, text="💡 可拖拽图片或文件夹到窗口", foreground="blue", font=("Arial", 8))
         drag_tip.pack(side=tk.LEFT, padx=(0, 10))
 
         ttk.Button(file_frame, text="选择多张图片", command=self.select_multiple_images, width=12).pack(side=tk.LEFT, padx=2)
         ttk.Button(file_frame, text="添加图片", command=self.add_images, width=10).pack(side=tk.LEFT, padx=2)
+        ttk.Button(file_frame, text="添加文件夹", command=self.add_folder, width=10).pack(side=tk.LEFT, padx=2)
         ttk.Button(file_frame, text="清空列表", command=self.clear_image_list, width=10).pack(side=tk.LEFT, padx=2)
         ttk.Button(file_frame, text="设置", command=self.open_settings, width=8).pack(side=tk.LEFT, padx=2)
 
@@ -548,6 +877,9 @@ class ComicFullTranslatorApp:
         self.batch_translate_btn = ttk.Button(ai_frame, text="批量翻译", command=self.start_batch_translation, width=10)
         self.batch_translate_btn.pack(side=tk.LEFT, padx=2)
 
+        self.cancel_translate_btn = ttk.Button(ai_frame, text="取消翻译", command=self.cancel_translation, width=10)
+        self.cancel_translate_btn.pack(side=tk.LEFT, padx=2)
+
         self.progress = ttk.Progressbar(ai_frame, mode='indeterminate', length=150)
         self.progress.pack(side=tk.LEFT, padx=2)
 
@@ -585,16 +917,9 @@ class ComicFullTranslatorApp:
         list_frame = ttk.Frame(parent)
         list_frame.pack(fill=tk.BOTH, expand=True)
 
-        # 创建列表框和滚动条
-        self.image_listbox = tk.Listbox(list_frame, selectmode=tk.SINGLE)
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.image_listbox.yview)
-        self.image_listbox.configure(yscrollcommand=scrollbar.set)
-
-        self.image_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        # 绑定选择事件
-        self.image_listbox.bind("<<ListboxSelect>>", self.on_image_select)
+        # 创建虚拟列表框（只渲染可见的行）和滚动条，并绑定选择事件
+        self.image_listbox = image_list_view.VirtualImageListbox(
+            list_frame, lambda: len(self.image_list), self.format_image_list_row, self.on_image_select)
 
         # 右键菜单
         self.create_context_menu()
@@ -630,7 +955,16 @@ class ComicFullTranslatorApp:
         h_scrollbar = ttk.Scrollbar(self.image_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
         v_scrollbar = ttk.Scrollbar(self.image_frame, orient=tk.VERTICAL, command=self.canvas.yview)
 
-        self.canvas.configure(xscrollcommand=h_scrollbar.set, yscrollcommand=v_scrollbar.set)
+        # 视口滚动时同步滚动条，并补齐滚入视口的图块
+        def on_xscroll(first, last):
+            h_scrollbar.set(first, last)
+            self.schedule_viewport_render()
+
+        def on_yscroll(first, last):
+            v_scrollbar.set(first, last)
+            self.schedule_viewport_render()
+
+        self.canvas.configure(xscrollcommand=on_xscroll, yscrollcommand=on_yscroll)
 
         # 布局
         self.canvas.grid(row=0, column=0, sticky="nsew")
@@ -667,7 +1001,7 @@ class ComicFullTranslatorApp:
 
     def on_mouse_wheel(self, event):
         """鼠标滚轮缩放（节流优化版）"""
-        if self.current_image is None:
+        if self.current_page is None:
             return
 
         # 禁用自适应缩放
@@ -744,175 +1078,164 @@ class ComicFullTranslatorApp:
         self.zoom_accumulator = 0
         self.zoom_timer = None
 
-        # 更新图片显示
-        self.update_image_display_smooth()
+        # 放大到超过已解码的分辨率时，趁滚轮仍在滚动在后台读取原图
+        if self.current_page is not None and self.current_page.needs_full_resolution(self.image_scale):
+            self.current_page.load_full_resolution_in_background()
 
-    def update_image_display_smooth(self):
-        """平滑更新图片显示"""
-        if self.original_pil_image is None:
-            return
+        # 滚轮仍在滚动时先用快速重采样出图，停止约150ms后再用高质量重采样替换
+        if self.hq_render_timer:
+            self.root.after_cancel(self.hq_render_timer)
+        self.hq_render_timer = self.root.after(self.hq_render_delay_ms, self.render_high_quality)
 
-        # 获取画布尺寸
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-
-        if canvas_width <= 1 or canvas_height <= 1:
+        # 更新图片显示
+        self.render_viewport(rebuild=True)
+
+    def render_high_quality(self):
+        """缩放输入停止后，用高质量重采样替换快速渲染的图块"""
+        self.hq_render_timer = None
+        self.render_viewport()
+
+    def schedule_viewport_render(self):
+        """视口移动（拖拽、滚动条、画布变大）后，合并到下一帧补齐新露出的图块"""
+        if self.viewport_render_timer is None:
+            self.viewport_render_timer = self.root.after(16, self.render_viewport)
+
+    def render_viewport(self, rebuild=False):
+        """
+        分块渲染可见区域：只重采样与视口（含边距）相交的图块
+
+        Args:
+            rebuild: 缩放比例或图片位置整体变化时为True，画布上已有的图块全部回收重绘
+        """
+        self.viewport_render_timer = None
+        if self.current_page is None:
             return
 
-        # 使用智能缓存获取图片
-        display_image = self.get_cached_image_smart(self.image_scale)
-
-        # 转换为Tkinter可显示的格式
-        self.photo = ImageTk.PhotoImage(display_image)
-
-        # 清空画布并显示图片
-        self.canvas.delete("all")
-
-        # 创建图片对象
-        self.canvas.create_image(self.image_offset_x, self.image_offset_y,
-                                anchor=tk.NW, image=self.photo, tags="image")
-
-        # 更新滚动区域
-        self.update_scroll_region_smooth()
-
-    def get_cached_image_smart(self, scale):
-        """智能缓存图片获取"""
-        # 使用适中的缓存精度
-        cache_key = round(scale, 2)
-
-        if cache_key in self.image_cache:
-            return self.image_cache[cache_key]
-
-        # 创建新的缩放图片
-        img_width, img_height = self.original_pil_image.size
-        scaled_width = int(img_width * scale)
-        scaled_height = int(img_height * scale)
-
-        if scale != 1.0:
-            # 根据缩放比例选择重采样方法
-            if scale > 1.5:  # 大幅放大时使用快速算法
-                resample = Image.Resampling.BILINEAR
-            elif scale < 0.5:  # 大幅缩小时使用快速算法
-                resample = Image.Resampling.BILINEAR
-            else:  # 中等缩放时使用高质量算法
-                resample = Image.Resampling.LANCZOS
-
-            scaled_image = self.original_pil_image.resize(
-                (scaled_width, scaled_height), resample
-            )
-        else:
-            scaled_image = self.original_pil_image
-
-        # 智能缓存管理
-        if len(self.image_cache) > 8:
-            # 移除最远离当前缩放比例的缓存
-            keys_to_remove = sorted(self.image_cache.keys(),
-                                  key=lambda x: abs(x - scale), reverse=True)[:3]
-            for key in keys_to_remove:
-                del self.image_cache[key]
-
-        self.image_cache[cache_key] = scaled_image
-        return scaled_image
-
-    def update_scroll_region_smooth(self):
-        """平滑更新滚动区域"""
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-
-        img_width, img_height = self.original_pil_image.size
-        scaled_width = int(img_width * self.image_scale)
-        scaled_height = int(img_height * self.image_scale)
-
-        x, y = self.image_offset_x, self.image_offset_y
-        left = min(0, x)
-        top = min(0, y)
-        right = max(canvas_width, x + scaled_width)
-        bottom = max(canvas_height, y + scaled_height)
-
-        self.canvas.configure(scrollregion=(left, top, right, bottom))
+        # 高质量渲染定时器未触发，说明滚轮缩放仍在进行，只做快速渲染
+        fast = self.hq_render_timer is not None
 
-    def update_image_display_fast(self):
-        """快速更新图片显示（专为缩放优化）"""
-        if self.original_pil_image is None:
-            return
-
-        # 获取画布尺寸
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
-
         if canvas_width <= 1 or canvas_height <= 1:
             return
 
-        # 使用优化的缓存获取
-        display_image = self.get_cached_image_fast(self.image_scale)
-
-        # 转换为Tkinter可显示的格式
-        self.photo = ImageTk.PhotoImage(display_image)
-
-        # 清空画布并显示图片
-        self.canvas.delete("all")
-
-        # 创建图片对象
-        self.canvas.create_image(self.image_offset_x, self.image_offset_y,
-                                anchor=tk.NW, image=self.photo, tags="image")
+        scale = self.image_scale
+        scaled_width, scaled_height = image_viewport.scaled_size(self.current_page.size, scale)
+
+        # 放大到超过已解码的分辨率：快速渲染先用已有的图片放大，高质量渲染前读取原图
+        if not fast and self.current_page.needs_full_resolution(scale):
+            self.current_page.load_full_resolution()
+
+        # 画布图块和PhotoImage都回收复用，不逐帧删除重建
+        if rebuild or scale != self.rendered_scale:
+            for key in list(self.tile_items):
+                self.release_tile_item(key)
+            self.rendered_scale = scale
+
+        # 视口在缩放后图片坐标系中的范围
+        view_x0 = self.canvas.canvasx(0) - self.image_offset_x
+        view_y0 = self.canvas.canvasy(0) - self.image_offset_y
+        needed = image_viewport.visible_tiles(scaled_width, scaled_height,
+                                              (view_x0, view_y0, view_x0 + canvas_width,
+                                               view_y0 + canvas_height))
+
+        # 回收已经离开视口的图块
+        needed_set = set(needed)
+        for key in [key for key in self.tile_items if key not in needed_set]:
+            self.release_tile_item(key)
+
+        # 补齐新进入视口的图块，并把快速渲染的图块升级为高质量
+        for col, row in needed:
+            existing = self.tile_items.get((col, row))
+            if existing is not None and (fast or not existing[2]):
+                continue
+            box = image_viewport.tile_box(col, row, scaled_width, scaled_height)
+            tile, is_draft = self.get_cached_tile(scale, col, row, box, fast)
+            if existing is not None:
+                item_id, photo = existing[0], self.update_tile_photo(existing[0], existing[1], tile)
+            else:
+                item_id, photo = self.acquire_tile_item(tile, self.image_offset_x + box[0],
+                                                        self.image_offset_y + box[1])
+            self.tile_items[(col, row)] = (item_id, photo, is_draft)
 
-        # 快速更新滚动区域
-        self.update_scroll_region_fast()
+        # 本帧没有用上的回收图块保持隐藏，数量超出画布上的图块数时才删除
+        while len(self.spare_tile_items) > max(16, len(self.tile_items)):
+            item_id, _ = self.spare_tile_items.pop()
+            self.canvas.delete(item_id)
 
-        # 更新状态栏
-        self.update_zoom_status_fast()
+        self.update_scroll_region()
 
-    def get_cached_image_fast(self, scale):
-        """快速获取缓存图片（专为缩放优化）"""
-        # 使用更粗粒度的缓存键以提高命中率
-        cache_key = round(scale, 1)
-
-        if cache_key in self.image_cache:
-            return self.image_cache[cache_key]
-
-        # 如果缓存未命中，创建新图片
-        img_width, img_height = self.original_pil_image.size
-        scaled_width = int(img_width * scale)
-        scaled_height = int(img_height * scale)
-
-        if scale != 1.0:
-            # 对于缩放操作，优先使用速度而不是质量
-            if abs(scale - 1.0) < 0.3:  # 接近原始大小时使用高质量
-                resample = Image.Resampling.LANCZOS
-            else:  # 大幅缩放时使用快速算法
-                resample = Image.Resampling.BILINEAR
-
-            scaled_image = self.original_pil_image.resize(
-                (scaled_width, scaled_height), resample
-            )
+    def acquire_tile_item(self, tile, x, y):
+        """
+        取一个画布图块显示tile：优先复用隐藏的图块（尺寸相同的优先，可直接paste到原PhotoImage）
+
+        Returns:
+            (item_id, PhotoImage)
+        """
+        if not self.spare_tile_items:
+            photo = ImageTk.PhotoImage(tile)
+            item_id = self.canvas.create_image(x, y, anchor=tk.NW, image=photo, tags="image")
+            return item_id, photo
+
+        index = next((i for i, (_, photo) in enumerate(self.spare_tile_items)
+                      if (photo.width(), photo.height()) == tile.size), -1)
+        item_id, photo = self.spare_tile_items.pop(index)
+        photo = self.update_tile_photo(item_id, photo, tile)
+        self.canvas.coords(item_id, x, y)
+        self.canvas.itemconfigure(item_id, state="normal")
+        return item_id, photo
+
+    def release_tile_item(self, key):
+        """把画布图块隐藏并放回复用列表"""
+        item_id, photo, _ = self.tile_items.pop(key)
+        self.canvas.itemconfigure(item_id, state="hidden")
+        self.spare_tile_items.append((item_id, photo))
+
+    def update_tile_photo(self, item_id, photo, tile):
+        """尺寸相同时把tile直接paste到已有的PhotoImage，否则新建PhotoImage并换到画布图块上"""
+        if (photo.width(), photo.height()) == tile.size:
+            photo.paste(tile)
+            return photo
+        photo = ImageTk.PhotoImage(tile)
+        self.canvas.itemconfigure(item_id, image=photo)
+        return photo
+
+    def get_cached_tile(self, scale, col, row, box, fast=False):
+        """
+        获取缓存的图块，未命中时只重采样该图块对应的原图区域
+
+        Args:
+            scale: 缩放比例
+            col: 图块列号
+            row: 图块行号
+            box: 图块在缩放后图片中的范围
+            fast: 是否允许快速渲染（已有高质量图块时仍优先使用）
+
+        Returns:
+            (图块图片, 是否为快速渲染的草图)
+        """
+        tile = self.image_cache.get((scale, col, row, "hq"))
+        if tile is not None:
+            return tile, False
+        if fast:
+            tile = self.image_cache.get((scale, col, row, "fast"))
+            if tile is not None:
+                return tile, True
+
+        # 从最接近的较大一级缩略图重采样，缩小时不必读取整张原图
+        source, level_scale = self.current_page.pyramid.source_for_scale(scale)
+        effective_scale = scale / level_scale
+
+        if fast:
+            tile = image_viewport.render_tile(source, effective_scale, box,
+                                              image_viewport.fast_resample(effective_scale))
+            key = (scale, col, row, "fast")
         else:
-            scaled_image = self.original_pil_image
-
-        # 限制缓存大小
-        if len(self.image_cache) > 6:
-            # 移除最旧的缓存项
-            oldest_key = next(iter(self.image_cache))
-            del self.image_cache[oldest_key]
-
-        self.image_cache[cache_key] = scaled_image
-        return scaled_image
-
-    def update_scroll_region_fast(self):
-        """快速更新滚动区域"""
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-
-        img_width, img_height = self.original_pil_image.size
-        scaled_width = int(img_width * self.image_scale)
-        scaled_height = int(img_height * self.image_scale)
-
-        x, y = self.image_offset_x, self.image_offset_y
-        left = min(0, x)
-        top = min(0, y)
-        right = max(canvas_width, x + scaled_width)
-        bottom = max(canvas_height, y + scaled_height)
-
-        self.canvas.configure(scrollregion=(left, top, right, bottom))
+            tile = image_viewport.render_tile(source, effective_scale, box)
+            key = (scale, col, row, "hq")
+        # 超出内存预算时淘汰最久未使用的图块（适应窗口比例的图块除外）
+        self.image_cache.put(key, tile)
+        return tile, fast
 
     def update_zoom_status_fast(self):
         """快速更新缩放状态"""
@@ -936,7 +1259,7 @@ class ComicFullTranslatorApp:
 
     def on_canvas_drag(self, event):
         """画布拖拽事件（优化版）"""
-        if self.current_image is None or not self.is_dragging:
+        if self.current_page is None or not self.is_dragging:
             return
 
         # 计算拖拽距离
@@ -954,8 +1277,9 @@ class ComicFullTranslatorApp:
         # 使用更高效的移动方式
         self.canvas.move("image", dx, dy)
 
-        # 更新滚动区域（不重新绘制图片）
+        # 更新滚动区域，并补齐拖入视口的邻近图块
         self.update_scroll_region()
+        self.schedule_viewport_render()
 
     def on_canvas_release(self, event):
         """画布释放事件"""
@@ -964,14 +1288,14 @@ class ComicFullTranslatorApp:
 
     def update_scroll_region(self):
         """更新滚动区域（不重新绘制图片）"""
-        if self.original_pil_image is None:
+        if self.current_page is None:
             return
 
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
 
         # 计算缩放后的图片尺寸
-        img_width, img_height = self.original_pil_image.size
+        img_width, img_height = self.current_page.size
         scaled_width = int(img_width * self.image_scale)
         scaled_height = int(img_height * self.image_scale)
 
@@ -987,7 +1311,7 @@ class ComicFullTranslatorApp:
 
     def reset_image_view(self, event=None):
         """重置图片视图（双击或快捷键）"""
-        if self.current_image is None:
+        if self.current_page is None:
             return
 
         # 取消任何待处理的缩放
@@ -1001,8 +1325,7 @@ class ComicFullTranslatorApp:
         self.target_offset_x = 0
         self.target_offset_y = 0
 
-        # 清空缓存并重新启用自适应缩放
-        self.image_cache.clear()
+        # 重新启用自适应缩放（适应窗口比例的图块固定在缓存中，可直接复用）
         self.auto_fit_enabled = True
         self.image_scale = 1.0
         self.image_offset_x = 0
@@ -1011,17 +1334,16 @@ class ComicFullTranslatorApp:
 
     def fit_to_window(self):
         """适应窗口大小"""
-        if self.current_image is None:
+        if self.current_page is None:
             return
 
-        # 清空缓存并重新启用自适应缩放
-        self.image_cache.clear()
+        # 重新启用自适应缩放（适应窗口比例的图块固定在缓存中，可直接复用）
         self.auto_fit_enabled = True
         self.update_image_display()
 
     def actual_size(self):
         """显示原始大小"""
-        if self.current_image is None:
+        if self.current_page is None:
             return
 
         # 禁用自适应缩放，设置为原始大小
@@ -1031,7 +1353,7 @@ class ComicFullTranslatorApp:
         # 居中显示
         canvas_width = self.canvas.winfo_width()
         canvas_height = self.canvas.winfo_height()
-        img_width, img_height = self.original_pil_image.size
+        img_width, img_height = self.current_page.size
 
         self.image_offset_x = max(0, (canvas_width - img_width) // 2)
         self.image_offset_y = max(0, (canvas_height - img_height) // 2)
@@ -1045,7 +1367,7 @@ class ComicFullTranslatorApp:
             return
 
         # 如果没有图片，直接返回
-        if self.original_pil_image is None:
+        if self.current_page is None:
             return
 
         # 获取新的画布大小
@@ -1060,14 +1382,15 @@ class ComicFullTranslatorApp:
             # 延迟执行，避免频繁触发
             self.root.after(100, self._delayed_canvas_resize)
         else:
-            # 只更新滚动区域
+            # 更新滚动区域，画布变大时补齐新露出的图块
             self.update_scroll_region()
+            self.schedule_viewport_render()
 
         self.last_canvas_size = new_canvas_size
 
     def _delayed_canvas_resize(self):
         """延迟处理画布大小变化"""
-        if self.original_pil_image is None:
+        if self.current_page is None:
             return
 
         # 重新计算适应大小
@@ -1080,7 +1403,7 @@ class ComicFullTranslatorApp:
             # 重新居中
             canvas_width = self.canvas.winfo_width()
             canvas_height = self.canvas.winfo_height()
-            img_width, img_height = self.original_pil_image.size
+            img_width, img_height = self.current_page.size
             scaled_width = int(img_width * self.image_scale)
             scaled_height = int(img_height * self.image_scale)
 
@@ -1146,12 +1469,13 @@ class ComicFullTranslatorApp:
             title="选择多张图片文件",
             filetypes=[
                 ("图片文件", "*.jpg *.jpeg *.png *.bmp *.tiff"),
+                ("漫画压缩包", "*.cbz *.zip"),
                 ("所有文件", "*.*")
             ]
         )
 
         if file_paths:
-            self.add_images_to_list(file_paths)
+            self.add_paths(file_paths)
 
     def add_images(self):
         """添加更多图片"""
@@ -1159,22 +1483,75 @@ class ComicFullTranslatorApp:
             title="添加图片文件",
             filetypes=[
                 ("图片文件", "*.jpg *.jpeg *.png *.bmp *.tiff"),
+                ("漫画压缩包", "*.cbz *.zip"),
                 ("所有文件", "*.*")
             ]
         )
 
         if file_paths:
-            self.add_images_to_list(file_paths)
+            self.add_paths(file_paths)
+
+    def add_paths(self, paths):
+        """添加选择或拖入的路径：只有图片文件时直接加入，包含文件夹或压缩包时在后台扫描"""
+        if any(os.path.isdir(path) or archive_reader.is_archive(path) for path in paths):
+            self.import_paths_async(paths)
+            return
+
+        image_files = [path for path in paths if folder_scanner.is_supported_image(path)]
+        if image_files:
+            self.add_images_to_list(image_files)
+        else:
+            messagebox.showwarning("警告", "没有找到支持的图片文件")
+
+    def add_folder(self):
+        """添加文件夹（包括子文件夹）中的所有图片"""
+        folder = filedialog.askdirectory(title="选择图片文件夹")
+        if folder:
+            self.import_paths_async([folder])
+
+    def import_paths_async(self, paths):
+        """
+        在后台线程中扫描文件、文件夹和压缩包，按块送入图片列表（第一块到达后即可开始浏览）
+
+        Args:
+            paths: 图片文件、文件夹或压缩包路径
+        """
+        generation = self.import_generation
+        self.status_var.set("正在扫描文件夹...")
+
+        def scan_worker():
+            total = 0
+            try:
+                for chunk in folder_scanner.scan_paths(paths):
+                    total += len(chunk)
+                    self.root.after(0, self._add_scanned_images, generation, chunk)
+            except Exception as e:
+                print(f"⚠️ 扫描文件夹失败: {e}")
+            self.root.after(0, self._folder_import_complete, generation, total)
+
+        threading.Thread(target=scan_worker, daemon=True).start()
+
+    def _add_scanned_images(self, generation, chunk):
+        """把扫描到的一块图片加入列表（界面线程）"""
+        if generation == self.import_generation:
+            self.add_images_to_list(chunk)
+
+    def _folder_import_complete(self, generation, total):
+        """文件夹扫描完成"""
+        if generation != self.import_generation:
+            return
+        if total == 0:
+            messagebox.showwarning("警告", "没有找到支持的图片文件")
+        else:
+            print(f"📁 文件夹扫描完成，共找到 {total} 张图片")
 
     def add_images_to_list(self, file_paths):
         """添加图片到列表"""
-        added_count = 0
-        for file_path in file_paths:
-            if file_path not in self.image_list:
-                self.image_list.append(file_path)
-                added_count += 1
+        added_paths = self.image_list.extend(file_paths)
+        added_count = len(added_paths)
 
         if added_count > 0:
+            self.journal.record_images_added(added_paths)
             self.update_image_list_display()
             if len(self.image_list) == added_count:  # 第一次添加图片
                 self.current_image_index = 0
@@ -1188,42 +1565,52 @@ class ComicFullTranslatorApp:
         if self.image_list:
             result = messagebox.askyesno("确认清空", "确定要清空所有图片吗？")
             if result:
-                self.image_list = []
+                with self.results_lock:
+                    self.image_list.clear()
+                    self.all_translation_results = {}
+                    self.journal.record_cleared()
+                self.import_generation += 1
                 self.current_image_index = 0
-                self.current_image = None
-                self.all_translation_results = {}
+                self.current_page = None
+                # 取消排队中的翻译任务并中断在途请求
+                self.read_ahead.cancel_all()
+                self.scheduler.cancel(lambda job: True)
+                if self.batch_state is not None:
+                    self.batch_state = None
+                    self.batch_translate_btn.configure(state='normal', text="批量翻译")
+                self._update_progress_indicator()
+                self.prefetcher.clear()
                 self.update_image_list_display()
                 self.display_image()
                 self.display_translation_results()
                 self.status_var.set("图片列表已清空")
 
-    def update_image_list_display(self):
-        """更新图片列表显示"""
-        self.image_listbox.delete(0, tk.END)
-
-        for i, image_path in enumerate(self.image_list):
-            filename = os.path.basename(image_path)
-            # 显示翻译状态
-            status = ""
-            if image_path in self.all_translation_results:
-                result_count = len(self.all_translation_results[image_path])
-                status = f" ✓({result_count})"
+    def format_image_list_row(self, index):
+        """图片列表中一行的显示文本"""
+        image_path = self.image_list[index]
+        filename = os.path.basename(image_path)
+        # 显示翻译状态
+        status = ""
+        if image_path in self.all_translation_results:
+            result_count = len(self.all_translation_results[image_path])
+            status = f" ✓({result_count})"
+        elif self.scheduler.find(image_path) is not None:
+            status = " ⏳"
 
-            display_text = f"{i+1:2d}. {filename}{status}"
-            self.image_listbox.insert(tk.END, display_text)
+        return f"{index+1:2d}. {filename}{status}"
 
+    def update_image_list_display(self):
+        """更新图片列表显示（只重新填充可见的行）"""
         # 更新计数
         self.image_count_var.set(f"({len(self.image_list)} 张)")
 
-        # 更新导航信息
+        # 更新导航信息并选中当前图片
         if self.image_list:
             self.image_info_var.set(f"{self.current_image_index + 1} / {len(self.image_list)}")
-            # 选中当前图片
-            self.image_listbox.selection_clear(0, tk.END)
-            self.image_listbox.selection_set(self.current_image_index)
-            self.image_listbox.see(self.current_image_index)
+            self.image_listbox.select(self.current_image_index)
         else:
             self.image_info_var.set("0 / 0")
+            self.image_listbox.select(None)
 
         # 更新按钮状态
         self.update_navigation_buttons()
@@ -1237,15 +1624,12 @@ class ComicFullTranslatorApp:
             self.prev_btn.configure(state='normal' if self.current_image_index > 0 else 'disabled')
             self.next_btn.configure(state='normal' if self.current_image_index < len(self.image_list) - 1 else 'disabled')
 
-    def on_image_select(self, event):
+    def on_image_select(self, index):
         """图片列表选择事件"""
-        selection = self.image_listbox.curselection()
-        if selection:
-            index = selection[0]
-            if index != self.current_image_index:
-                self.current_image_index = index
-                self.load_current_image()
-                self.update_image_list_display()
+        if index != self.current_image_index:
+            self.current_image_index = index
+            self.load_current_image()
+            self.update_image_list_display()
 
     def prev_image(self):
         """上一张图片"""
@@ -1300,38 +1684,42 @@ class ComicFullTranslatorApp:
             print("💡 替代方案：使用 '选择多张图片' 按钮批量添加图片")
 
     def on_drop(self, event):
-        """拖拽文件处理"""
-        files = event.data.split()
-        image_files = []
-
-        for file_path in files:
-            # 移除可能的大括号
-            file_path = file_path.strip('{}')
-
-            # 检查是否为图片文件
-            if file_path.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif')):
-                image_files.append(file_path)
-
-        if image_files:
-            self.add_images_to_list(image_files)
-        else:
-            messagebox.showwarning("警告", "没有找到支持的图片文件")
+        """拖拽文件处理（文件夹和压缩包在后台扫描）"""
+        # splitlist能正确拆分带空格、用大括号包裹的路径
+        self.add_paths(self.root.tk.splitlist(event.data))
 
     def load_image(self, image_path):
         """加载图片"""
         try:
-            self.current_image = cv2.imread(image_path)
-
-            if self.current_image is None:
-                messagebox.showerror("错误", "无法读取图片文件")
-                return
-
-            # 转换为RGB格式并保存为PIL图片
-            image_rgb = cv2.cvtColor(self.current_image, cv2.COLOR_BGR2RGB)
-            self.original_pil_image = Image.fromarray(image_rgb)
+            # 优先使用后台预读好的页面，未预读时在当前线程解码
+            # （JPEG只解码到适应窗口所需的大小，放大时再读取原图）
+            canvas_size = (self.canvas.winfo_width(), self.canvas.winfo_height())
+            page = self.prefetcher.get(image_path)
+            if page is None:
+                try:
+                    page = page_loader.decode_page(image_path, canvas_size)
+                except ValueError:
+                    messagebox.showerror("错误", "无法读取图片文件")
+                    return
+                self.prefetcher.put(page)
+
+            # 后台生成多级缩略图，缩放时从最接近的一级重采样（预读的页面已经生成好）
+            if self.current_page is not None and self.current_page is not page:
+                self.current_page.pyramid.cancel()
+            self.current_page = page
+            if not page.pyramid.complete:
+                threading.Thread(target=page.pyramid.build, daemon=True).start()
 
             # 清空图片缓存
+            if len(self.image_cache):
+                print(f"🗂️ 预览缓存统计: {self.image_cache.stats()}")
             self.image_cache.clear()
+            self.image_cache.pin_scale(None)
+
+            # 预读时已按当前画布渲染好适应窗口的预览，直接切成图块放入缓存
+            if page.fit_image is not None and page.fit_scale == image_viewport.fit_scale(page.size, canvas_size):
+                for (col, row), tile in image_viewport.split_into_tiles(page.fit_image):
+                    self.image_cache.put((page.fit_scale, col, row, "hq"), tile)
 
             # 重置视图参数并启用自适应缩放
             self.auto_fit_enabled = True
@@ -1348,9 +1736,28 @@ class ComicFullTranslatorApp:
             filename = os.path.basename(image_path)
             self.status_var.set(f"已加载: {filename}")
 
+            # 后台预读相邻页面，预翻译之后几页
+            self.prefetch_neighbour_pages()
+            self.update_read_ahead()
+
         except Exception as e:
             messagebox.showerror("错误", f"加载图片失败: {e}")
 
+    def prefetch_neighbour_pages(self):
+        """按距离当前页由近到远（同距离时下一页优先）预读前后各K页"""
+        count = config_manager.get_prefetch_pages()
+        if count <= 0 or not self.image_list:
+            return
+
+        paths = []
+        for distance in range(1, count + 1):
+            for index in (self.current_image_index + distance, self.current_image_index - distance):
+                if 0 <= index < len(self.image_list):
+                    paths.append(self.image_list[index])
+
+        self.prefetcher.set_capacity(2 * count + 1)
+        self.prefetcher.request(paths, (self.canvas.winfo_width(), self.canvas.winfo_height()))
+
     def get_current_image_path(self):
         """获取当前图片路径"""
         if self.image_list and 0 <= self.current_image_index < len(self.image_list):
@@ -1372,7 +1779,7 @@ class ComicFullTranslatorApp:
 
     def calculate_fit_scale(self):
         """计算适应画布的缩放比例"""
-        if self.original_pil_image is None:
+        if self.current_page is None:
             return 1.0
 
         canvas_width = self.canvas.winfo_width()
@@ -1381,65 +1788,16 @@ class ComicFullTranslatorApp:
         if canvas_width <= 1 or canvas_height <= 1:
             return 1.0
 
-        img_width, img_height = self.original_pil_image.size
-
-        # 计算适应宽度和高度的缩放比例
-        scale_x = (canvas_width - 20) / img_width  # 留20像素边距
-        scale_y = (canvas_height - 20) / img_height
-
-        # 选择较小的缩放比例以确保图片完全显示
-        fit_scale = min(scale_x, scale_y, 1.0)  # 不超过原始大小
-
-        return max(fit_scale, 0.1)  # 最小缩放比例为0.1
-
-    def get_cached_image(self, scale):
-        """获取缓存的图片或创建新的缩放图片（高性能版）"""
-        # 使用更粗粒度的缓存键，减少缓存数量
-        cache_key = round(scale, 1)  # 精度降低到0.1
-
-        if cache_key in self.image_cache:
-            return self.image_cache[cache_key]
-
-        # 智能缓存管理：保留常用的缩放比例
-        if len(self.image_cache) > 8:  # 增加缓存数量
-            # 保留1.0（原始大小）和当前最接近的几个
-            keys_to_keep = sorted(self.image_cache.keys(), key=lambda x: abs(x - scale))[:6]
-            if 1.0 not in keys_to_keep and 1.0 in self.image_cache:
-                keys_to_keep.append(1.0)  # 总是保留原始大小
-
-            # 清理其他缓存
-            keys_to_remove = [k for k in self.image_cache.keys() if k not in keys_to_keep]
-            for k in keys_to_remove:
-                del self.image_cache[k]
-
-        # 创建新的缩放图片
-        img_width, img_height = self.original_pil_image.size
-        scaled_width = int(img_width * scale)
-        scaled_height = int(img_height * scale)
-
-        # 优化重采样策略
-        if scale != 1.0:
-            # 根据缩放比例和图片大小选择重采样方法
-            if scale > 2.0 or (scaled_width * scaled_height) > 4000000:  # 大图或大幅放大
-                # 使用更快的重采样方法
-                resample = Image.Resampling.BILINEAR
-            else:
-                # 使用高质量重采样
-                resample = Image.Resampling.LANCZOS
-
-            scaled_image = self.original_pil_image.resize(
-                (scaled_width, scaled_height), resample
-            )
-        else:
-            scaled_image = self.original_pil_image
-
-        # 缓存图片
-        self.image_cache[cache_key] = scaled_image
-        return scaled_image
+        # 留20像素边距，不超过原始大小，最小缩放比例为0.1
+        return image_viewport.fit_scale(self.current_page.size, (canvas_width, canvas_height))
 
     def update_image_display(self):
         """更新图片显示（支持缩放和拖拽）"""
-        if self.original_pil_image is None:
+        if self.current_page is None:
+            # 图片列表已清空，移除画布上残留的图块
+            self.canvas.delete("image")
+            self.tile_items.clear()
+            self.spare_tile_items.clear()
             return
 
         # 获取画布尺寸
@@ -1457,9 +1815,10 @@ class ComicFullTranslatorApp:
             # 计算适应画布的缩放比例
             fit_scale = self.calculate_fit_scale()
             self.image_scale = fit_scale
+            self.image_cache.pin_scale(fit_scale)
 
             # 居中显示图片
-            img_width, img_height = self.original_pil_image.size
+            img_width, img_height = self.current_page.size
             scaled_width = int(img_width * self.image_scale)
             scaled_height = int(img_height * self.image_scale)
 
@@ -1472,57 +1831,72 @@ class ComicFullTranslatorApp:
         # 记录当前画布大小
         self.last_canvas_size = current_canvas_size
 
-        # 获取缓存的图片或创建新的
-        display_image = self.get_cached_image(self.image_scale)
-
-        # 转换为Tkinter可显示的格式
-        self.photo = ImageTk.PhotoImage(display_image)
-
-        # 清空画布并显示图片
-        self.canvas.delete("all")
-
-        # 计算图片在画布上的位置
-        x = self.image_offset_x
-        y = self.image_offset_y
-
-        # 创建图片对象
-        self.canvas.create_image(x, y, anchor=tk.NW, image=self.photo, tags="image")
-
-        # 计算缩放后的图片尺寸
-        img_width, img_height = self.original_pil_image.size
-        scaled_width = int(img_width * self.image_scale)
-        scaled_height = int(img_height * self.image_scale)
-
-        # 设置滚动区域
-        left = min(0, x)
-        top = min(0, y)
-        right = max(canvas_width, x + scaled_width)
-        bottom = max(canvas_height, y + scaled_height)
-
-        self.canvas.configure(scrollregion=(left, top, right, bottom))
+        # 分块渲染可见区域
+        self.render_viewport(rebuild=True)
 
         # 更新状态栏显示缩放信息
         self.update_zoom_status_fast()
 
     def start_full_translation(self):
-        """开始当前图片的全图翻译"""
+        """翻译当前图片（插到排队中的批量任务之前；已在队列中时提前原任务）"""
         current_path = self.get_current_image_path()
         if not current_path:
             messagebox.showwarning("警告", "请先选择图片文件")
             return
 
-        if self.is_translating:
-            messagebox.showinfo("提示", "翻译正在进行中，请稍候...")
-            return
+        # 流式收到的文本块转交主线程逐个显示
+        def on_block(block):
+            self.root.after(0, self._on_stream_block, current_path, block)
 
-        # 在新线程中执行翻译
-        self.translate_btn.configure(state='disabled', text="翻译中...")
-        self.progress.start()
-        self.is_translating = True
+        token = cancellation.CancelToken()
+        job, attached = self.scheduler.request(
+            current_path, lambda: self._translate_and_store(current_path, on_block, token),
+            job_scheduler.PRIORITY_INTERACTIVE,
+            on_done=lambda job: self.root.after(0, self._translation_complete, current_path, job),
+            cancel_token=token)
 
-        thread = threading.Thread(target=self._full_translation_thread, args=(current_path,))
-        thread.daemon = True
-        thread.start()
+        filename = os.path.basename(current_path)
+        if attached:
+            self.status_var.set(f"{filename} 已在翻译队列中，已优先处理")
+        else:
+            self.streaming_path = current_path
+            self.streaming_block_count = 0
+            self.status_var.set(f"正在翻译 {filename}...")
+        self.update_image_list_rows([current_path])
+        self._update_progress_indicator()
+
+    def _translate_and_store(self, image_path, on_block=None, cancel=None):
+        """翻译一张图片并保存结果（在工作线程中执行），返回 {图片路径: 翻译结果}"""
+        results = self.engine.translate(image_path, on_block=on_block, cancel=cancel)
+        if results:
+            self._store_translation_result(image_path, results)
+        return {image_path: results}
+
+    def _make_read_ahead_work(self, image_path, cancel_token):
+        """预翻译任务：不流式显示，完成后结果直接进入all_translation_results"""
+        return lambda: self._translate_and_store(image_path, cancel=cancel_token)
+
+    def update_read_ahead(self):
+        """当前页变化时重新安排预翻译（跳到别处时取消新范围外尚未开始的预翻译）"""
+        self.read_ahead.update_position(self.image_list, self.current_image_index,
+                                        lambda path: path in self.all_translation_results)
+        self.image_listbox.refresh()
+
+    def _read_ahead_complete(self, job):
+        """预翻译的一页完成（主线程）：翻到这一页时直接显示结果"""
+        image_path = job.keys[0]
+        if image_path not in self.image_list:
+            return  # 预翻译期间已从列表移除
+        self.update_image_list_rows([image_path])
+        if isinstance(job.error, cancellation.CancelledError):
+            return
+        if job.error is not None:
+            print(f"⚠️ 预翻译失败 {os.path.basename(image_path)}: {job.error}")
+            return
+
+        results = job.result.get(image_path)
+        if results and image_path == self.get_current_image_path():
+            self.display_translation_results(results)
 
     def start_batch_translation(self):
         """开始批量翻译"""
@@ -1530,92 +1904,163 @@ class ComicFullTranslatorApp:
             messagebox.showwarning("警告", "请先添加图片文件")
             return
 
-        if self.is_translating or self.is_batch_translating:
-            messagebox.showinfo("提示", "翻译正在进行中，请稍候...")
+        if self.batch_state is not None:
+            messagebox.showinfo("提示", "批量翻译正在进行中，请稍候...")
             return
 
-        # 确认批量翻译
-        untranslated_count = sum(1 for path in self.image_list if path not in self.all_translation_results)
-        if untranslated_count == 0:
+        # 确认批量翻译（已在翻译队列中的图片不再重复提交）
+        pending_paths = [path for path in self.image_list
+                         if path not in self.all_translation_results and self.scheduler.find(path) is None]
+        if not pending_paths:
             messagebox.showinfo("提示", "所有图片都已翻译完成")
             return
 
+        translated_count = len(self.image_list) - len(pending_paths)
+        resume_note = f"已有 {translated_count} 张翻译完成，将从剩余图片继续。\n" if translated_count else ""
         result = messagebox.askyesno("确认批量翻译",
-                                   f"将翻译 {untranslated_count} 张未翻译的图片，这可能需要较长时间。\n\n是否继续？")
+                                   f"{resume_note}将翻译 {len(pending_paths)} 张未翻译的图片，这可能需要较长时间。\n\n是否继续？")
         if not result:
             return
 
         # 开始批量翻译
         self.batch_translate_btn.configure(state='disabled', text="批量翻译中...")
-        self.translate_btn.configure(state='disabled')
-        self.progress.start()
-        self.is_batch_translating = True
-
-        thread = threading.Thread(target=self._batch_translation_thread)
+        self.batch_state = {"total": len(pending_paths), "done": 0, "translated": 0, "failed": 0,
+                            "outstanding": 0, "error": None, "cancelled": False}
+        self.scheduler.set_concurrency(config_manager.get_batch_concurrency())
+        self.read_ahead.configure(config_manager.get_read_ahead_settings())
+        self.update_read_ahead()
+        self._update_progress_indicator()
+
+        # 读取图片尺寸分组可能较慢，放到后台线程
+        batch_state = self.batch_state
+        thread = threading.Thread(target=self._plan_batch_thread, args=(batch_state, pending_paths))
         thread.daemon = True
         thread.start()
 
-    def _full_translation_thread(self, image_path):
-        """全图翻译线程"""
-        try:
-            # 调用AI进行全图翻译
-            results = self.call_full_image_translation(image_path)
-
-            # 在主线程中更新UI
-            self.root.after(0, self._translation_complete, image_path, results)
-
-        except Exception as e:
-            self.root.after(0, self._translation_error, str(e))
-
-    def _batch_translation_thread(self):
-        """批量翻译线程"""
+    def _plan_batch_thread(self, batch_state, pending_paths):
+        """批量翻译分组线程（开启多页合并时相邻的小图合并到同一个请求）"""
         try:
-            total_images = len(self.image_list)
-            translated_count = 0
-
-            for i, image_path in enumerate(self.image_list):
-                # 跳过已翻译的图片
-                if image_path in self.all_translation_results:
-                    continue
-
-                # 更新状态
-                self.root.after(0, self._update_batch_status, i + 1, total_images, os.path.basename(image_path))
-
-                # 翻译图片
-                results = self.call_full_image_translation(image_path)
-
-                # 保存结果
-                if results:
-                    self.all_translation_results[image_path] = results
-                    translated_count += 1
-
-                # 更新UI
-                self.root.after(0, self._update_image_list_after_translation)
-
-            # 批量翻译完成
-            self.root.after(0, self._batch_translation_complete, translated_count)
-
+            page_groups = self.engine.plan_page_groups(pending_paths)
         except Exception as e:
-            self.root.after(0, self._batch_translation_error, str(e))
+            print(f"⚠️ 多页合并分组失败，改为逐页翻译: {e}")
+            page_groups = [[path] for path in pending_paths]
+        self.root.after(0, self._submit_batch_groups, batch_state, page_groups)
+
+    def _submit_batch_groups(self, batch_state, page_groups):
+        """把批量翻译的各组提交到调度器（主线程）"""
+        if batch_state is not self.batch_state:
+            return  # 列表已清空或已取消
+
+        print(f"🚀 批量翻译开始: {batch_state['total']} 张图片，{len(page_groups)} 个请求，"
+              f"并发数 {config_manager.get_batch_concurrency()}")
+
+        for group in page_groups:
+            # 分组期间用户单独翻译的页已在队列中，不再重复提交
+            remaining = [path for path in group if self.scheduler.find(path) is None]
+            batch_state["total"] -= len(group) - len(remaining)
+            group = remaining
+            if not group:
+                continue
+
+            token = cancellation.CancelToken()
+
+            def work(group=group, token=token):
+                results_by_path = self.engine.translate_page_group(group, cancel=token)
+                for image_path, results in results_by_path.items():
+                    if results:
+                        self._store_translation_result(image_path, results)
+                return results_by_path
+
+            self.scheduler.submit(group, work, job_scheduler.PRIORITY_BATCH, tag=batch_state,
+                                  on_done=lambda job: self.root.after(0, self._batch_group_complete, job),
+                                  cancel_token=token)
+            batch_state["outstanding"] += 1
+
+        self.image_listbox.refresh()
+        self._finish_batch_if_done(batch_state)
+
+    def _batch_group_complete(self, job):
+        """批量翻译的一组完成（主线程），按完成顺序汇报进度"""
+        batch_state = job.tag
+        error = job.error
+        for image_path in job.keys:
+            batch_state["done"] += 1
+            results = job.result.get(image_path) if error is None else None
+            if results and image_path in self.image_list:  # 翻译期间移除的图片结果已丢弃
+                batch_state["translated"] += 1
+            elif error is not None and not isinstance(error, cancellation.CancelledError):
+                batch_state["failed"] += 1
+
+        if isinstance(error, rate_limiter.RetryableError):
+            # 限流或服务端错误重试用尽时跳过这些图片继续翻译，之后可以重新批量翻译补齐
+            print(f"⚠️ 跳过 {len(job.keys)} 张图片: {error}")
+        elif (error is not None and not isinstance(error, cancellation.CancelledError)
+              and batch_state["error"] is None):
+            # 其他错误停止批量翻译：取消还在排队的组（当前页提前的组继续翻译）
+            batch_state["error"] = str(error)
+            self.scheduler.cancel_queued(lambda queued: queued.tag is batch_state
+                                         and queued.priority == job_scheduler.PRIORITY_BATCH)
+
+        if batch_state is self.batch_state:
+            self._update_batch_status(batch_state["done"], batch_state["total"],
+                                      os.path.basename(job.keys[-1]))
+            self.update_image_list_rows(job.keys)
+            if self.get_current_image_path() in job.keys:
+                self.display_current_translation_results()
+
+        batch_state["outstanding"] -= 1
+        self._finish_batch_if_done(batch_state)
+        self._update_progress_indicator()
+
+    def _finish_batch_if_done(self, batch_state):
+        """所有组都已完成或取消时结束批量翻译"""
+        if batch_state["outstanding"] > 0 or batch_state is not self.batch_state:
+            return
 
-    def _translation_complete(self, image_path, results):
-        """翻译完成"""
-        self.progress.stop()
-        self.translate_btn.configure(state='normal', text="翻译当前图片")
-        self.is_translating = False
+        self.batch_state = None
+        if batch_state["error"] is not None:
+            self._batch_translation_error(batch_state["error"])
+        elif batch_state["cancelled"]:
+            self._batch_translation_cancelled(batch_state["translated"])
+        else:
+            self._batch_translation_complete(batch_state["translated"], batch_state["failed"])
+
+    def _update_progress_indicator(self):
+        """有排队中或翻译中的任务时显示进度条动画（后台预翻译不显示）"""
+        busy = (self.scheduler.active_count(lambda job: job.priority < read_ahead.PRIORITY_READ_AHEAD) > 0
+                or self.batch_state is not None)
+        if busy and not self.progress_running:
+            self.progress.start()
+        elif not busy and self.progress_running:
+            self.progress.stop()
+        self.progress_running = busy
+
+    def _translation_complete(self, image_path, job):
+        """当前图片翻译完成（主线程）；挂到批量任务上时结果来自该组"""
+        self._update_progress_indicator()
+        if image_path not in self.image_list:
+            return  # 翻译期间已从列表移除
+        self.update_image_list_rows([image_path])
+        if job.error is not None:
+            if isinstance(job.error, cancellation.CancelledError):
+                # 流式显示中已收到的文本块留在结果面板上，但不作为完整结果保存
+                partial_results = job.error.partial_results
+                if partial_results and image_path == self.streaming_path:
+                    self.status_var.set(f"{os.path.basename(image_path)} 的翻译已取消，"
+                                        f"保留已收到的 {len(partial_results)} 个文本块")
+                else:
+                    self.status_var.set(f"{os.path.basename(image_path)} 的翻译已取消")
+            else:
+                self._translation_error(str(job.error))
+            return
 
+        results = job.result.get(image_path)
         if results:
-            # 保存翻译结果
-            self.all_translation_results[image_path] = results
-
             # 如果是当前图片，显示结果
             current_path = self.get_current_image_path()
             if current_path == image_path:
                 self.display_translation_results(results)
 
-            # 更新图片列表显示
-            self.update_image_list_display()
-
             filename = os.path.basename(image_path)
             self.status_var.set(f"{filename} 翻译完成，共识别 {len(results)} 个文本块")
         else:
@@ -1626,43 +2071,68 @@ class ComicFullTranslatorApp:
         """更新批量翻译状态"""
         self.status_var.set(f"批量翻译中 ({current}/{total}): {filename}")
 
-    def _update_image_list_after_translation(self):
-        """翻译后更新图片列表"""
-        self.update_image_list_display()
+    def update_image_list_rows(self, image_paths):
+        """只刷新这些图片在列表中的行（翻译状态变化时）"""
+        for image_path in image_paths:
+            index = self.image_list.index(image_path)
+            if index is not None:
+                self.image_listbox.refresh_row(index)
 
-    def _batch_translation_complete(self, translated_count):
+    def _batch_translation_complete(self, translated_count, failed_count=0):
         """批量翻译完成"""
-        self.progress.stop()
         self.batch_translate_btn.configure(state='normal', text="批量翻译")
-        self.translate_btn.configure(state='normal')
-        self.is_batch_translating = False
+        self._update_progress_indicator()
 
         # 更新当前图片的翻译结果显示
         self.display_current_translation_results()
 
-        messagebox.showinfo("批量翻译完成", f"成功翻译了 {translated_count} 张图片")
-        self.status_var.set(f"批量翻译完成，共翻译 {translated_count} 张图片")
+        if failed_count:
+            messagebox.showwarning("批量翻译完成",
+                                   f"成功翻译了 {translated_count} 张图片，{failed_count} 张因限流或服务错误跳过。\n\n"
+                                   f"可以稍后再次点击批量翻译补齐。")
+            self.status_var.set(f"批量翻译完成，共翻译 {translated_count} 张图片，跳过 {failed_count} 张")
+        else:
+            messagebox.showinfo("批量翻译完成", f"成功翻译了 {translated_count} 张图片")
+            self.status_var.set(f"批量翻译完成，共翻译 {translated_count} 张图片")
+
+    def _batch_translation_cancelled(self, translated_count):
+        """批量翻译已取消"""
+        self.batch_translate_btn.configure(state='normal', text="批量翻译")
+        self._update_progress_indicator()
+        self.status_var.set(f"批量翻译已取消，已完成的 {translated_count} 张图片结果已保留")
+
+    def cancel_translation(self):
+        """取消所有翻译：排队中的任务不再执行，在途请求直接断开连接，已完成的页面结果保留"""
+        if self.scheduler.active_count() == 0 and self.batch_state is None:
+            self.status_var.set("没有正在进行的翻译")
+            return
+
+        # 先清空预翻译范围，避免取消的预翻译完成后又补上新的
+        self.read_ahead.cancel_all()
+        if self.batch_state is not None:
+            self.batch_state["cancelled"] = True
+        cancelled = self.scheduler.cancel(lambda job: True)
+        print(f"⏹️ 取消翻译: {len(cancelled)} 个任务")
+        self.status_var.set("正在取消翻译...")
+        if self.batch_state is not None:
+            self._finish_batch_if_done(self.batch_state)  # 还在分组时直接结束
 
     def _batch_translation_error(self, error_msg):
         """批量翻译错误"""
-        self.progress.stop()
         self.batch_translate_btn.configure(state='normal', text="批量翻译")
-        self.translate_btn.configure(state='normal')
-        self.is_batch_translating = False
+        self._update_progress_indicator()
         messagebox.showerror("错误", f"批量翻译失败: {error_msg}")
         self.status_var.set("批量翻译失败")
 
     def _translation_error(self, error_msg):
         """翻译错误"""
-        self.progress.stop()
-        self.translate_btn.configure(state='normal', text="开始全图翻译")
-        self.is_translating = False
         messagebox.showerror("错误", f"翻译失败: {error_msg}")
         self.status_var.set("翻译失败")
 
     def display_translation_results(self, results=None):
         """显示翻译结果"""
         self.translation_text.delete(1.0, tk.END)
+        self.streaming_block_count = 0
 
         if results is None:
             results = []
@@ -1675,27 +2145,45 @@ class ComicFullTranslatorApp:
         self.result_count_var.set(f"({len(results)} 个文本块)")
 
         for i, result in enumerate(results, 1):
-            # 文本块标题
-            header = f"【文本块 {i}】"
-            if result.get('type'):
-                header += f" - {result['type']}"
-            header += "\n"
-
-            self.translation_text.insert(tk.END, header, "header")
-
-            # 原文
-            if result.get('original_text'):
-                self.translation_text.insert(tk.END, "原文: ", "header")
-                self.translation_text.insert(tk.END, f"{result['original_text']}\n", "original")
+            self._insert_translation_block(i, result)
+
+    def _insert_translation_block(self, index, result):
+        """在结果面板末尾插入一个文本块"""
+        # 分隔线
+        if index > 1:
+            self.translation_text.insert(tk.END, "─" * 50 + "\n\n", "separator")
+
+        # 文本块标题
+        header = f"【文本块 {index}】"
+        if result.get('type'):
+            header += f" - {result['type']}"
+        header += "\n"
+
+        self.translation_text.insert(tk.END, header, "header")
+
+        # 原文
+        if result.get('original_text'):
+            self.translation_text.insert(tk.END, "原文: ", "header")
+            self.translation_text.insert(tk.END, f"{result['original_text']}\n", "original")
+
+        # 翻译
+        if result.get('translation'):
+            self.translation_text.insert(tk.END, "译文: ", "header")
+            self.translation_text.insert(tk.END, f"{result['translation']}\n", "translation")
+
+    def _on_stream_block(self, image_path, block):
+        """流式翻译收到一个完整文本块（主线程），实时追加到结果面板"""
+        if image_path != self.streaming_path or image_path != self.get_current_image_path():
+            return
 
-            # 翻译
-            if result.get('translation'):
-                self.translation_text.insert(tk.END, "译文: ", "header")
-                self.translation_text.insert(tk.END, f"{result['translation']}\n", "translation")
+        # 第一个文本块到达时清掉"暂无翻译结果"等旧内容
+        if self.streaming_block_count == 0:
+            self.translation_text.delete(1.0, tk.END)
 
-            # 分隔线
-            if i < len(results):
-                self.translation_text.insert(tk.END, "─" * 50 + "\n\n", "separator")
+        self.streaming_block_count += 1
+        self._insert_translation_block(self.streaming_block_count, block)
+        self.translation_text.see(tk.END)
+        self.result_count_var.set(f"({self.streaming_block_count} 个文本块)")
 
     def clear_results(self):
         """清空当前图片的翻译结果"""
@@ -1703,9 +2191,13 @@ class ComicFullTranslatorApp:
         if current_path and current_path in self.all_translation_results:
             result = messagebox.askyesno("确认清空", "确定要清空当前图片的翻译结果吗？")
             if result:
-                del self.all_translation_results[current_path]
+                # 确认期间工作线程可能写入或移除结果，在锁内重新检查后再删除
+                with self.results_lock:
+                    if current_path in self.all_translation_results:
+                        del self.all_translation_results[current_path]
+                        self.journal.record_result_cleared(current_path)
                 self.display_translation_results([])
-                self.update_image_list_display()
+                self.update_image_list_rows([current_path])
                 self.status_var.set("已清空当前图片的翻译结果")
         else:
             self.display_translation_results([])
@@ -1794,8 +2286,7 @@ class ComicFullTranslatorApp:
 
     def show_context_menu(self, event):
         """显示右键菜单"""
-        selection = self.image_listbox.curselection()
-        if selection:
+        if self.image_listbox.selected_index() is not None:
             try:
                 self.context_menu.tk_popup(event.x_root, event.y_root)
             finally:
@@ -1803,9 +2294,8 @@ class ComicFullTranslatorApp:
 
     def translate_selected_image(self):
         """翻译选中的图片"""
-        selection = self.image_listbox.curselection()
-        if selection:
-            index = selection[0]
+        index = self.image_listbox.selected_index()
+        if index is not None:
             if index != self.current_image_index:
                 self.current_image_index = index
                 self.load_current_image()
@@ -1814,18 +2304,23 @@ class ComicFullTranslatorApp:
 
     def remove_selected_image(self):
         """从列表移除选中的图片"""
-        selection = self.image_listbox.curselection()
-        if selection:
-            index = selection[0]
+        index = self.image_listbox.selected_index()
+        if index is not None:
             image_path = self.image_list[index]
             filename = os.path.basename(image_path)
 
             result = messagebox.askyesno("确认移除", f"确定要从列表中移除 {filename} 吗？")
             if result:
                 # 移除图片和翻译结果
-                self.image_list.pop(index)
-                if image_path in self.all_translation_results:
-                    del self.all_translation_results[image_path]
+                with self.results_lock:
+                    self.image_list.pop(index)
+                    self.all_translation_results.pop(image_path, None)
+                    self.journal.record_image_removed(image_path)
+
+                # 取消只包含已移除图片的翻译任务（多页合并的组里还有其他图片时继续，移除的页结果会被丢弃）
+                self.scheduler.cancel(lambda job: image_path in job.keys
+                                      and all(key not in self.image_list for key in job.keys))
+                self._update_progress_indicator()
 
                 # 调整当前索引
                 if index <= self.current_image_index:
@@ -1836,16 +2331,16 @@ class ComicFullTranslatorApp:
                 if self.image_list:
                     self.load_current_image()
                 else:
-                    self.current_image = None
+                    self.current_page = None
                     self.display_image()
                     self.display_translation_results([])
 
     def show_in_explorer(self):
         """在文件管理器中显示"""
-        selection = self.image_listbox.curselection()
-        if selection:
-            index = selection[0]
-            image_path = self.image_list[index]
+        index = self.image_listbox.selected_index()
+        if index is not None:
+            # 压缩包内的图片定位到压缩包本身
+            image_path = archive_reader.file_system_path(self.image_list[index])
             try:
                 import subprocess
                 subprocess.run(['explorer', '/select,', image_path.replace('/', '\\')], check=True)
@@ -1868,496 +2363,19 @@ class ComicFullTranslatorApp:
 
         # 重新加载配置
         config_manager = config.ConfigManager()
+        self.engine.config_manager = config_manager
+        self.scheduler.set_concurrency(config_manager.get_batch_concurrency())
 
-        # 更新状态栏显示当前配置
-        self.update_status_with_config()
-
-    def call_full_image_translation(self, image_path):
-        """调用AI进行全图翻译"""
-        try:
-            # 读取图片并编码为base64
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
-
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
-
-            # 获取当前配置
-            provider = config_manager.config.get("api_provider", "openrouter")
-            provider_config = config_manager.get_current_provider_config()
-
-            # 构建请求头
-            headers = {
-                'Authorization': f'Bearer {provider_config.get("api_key", "")}',
-                'Content-Type': 'application/json'
-            }
-
-            # 根据不同服务商添加特定头信息
-            if provider == "openrouter":
-                headers['HTTP-Referer'] = provider_config.get("http_referer", "")
-                headers['X-Title'] = provider_config.get("x_title", "")
-            elif provider == "anthropic":
-                headers['anthropic-version'] = provider_config.get("version", "2023-06-01")
-            elif provider == "custom":
-                custom_headers = provider_config.get("headers", {})
-                headers.update(custom_headers)
-
-            # 获取高级设置
-            target_language = config_manager.get_target_language()
-            translation_style = config_manager.get_translation_style()
-            custom_prompt = config_manager.get_custom_prompt()
-
-            # 构建全图翻译提示词
-            # 如果用户自定义了提示词，使用自定义的；否则使用动态生成的
-            if custom_prompt and custom_prompt.strip():
-                # 替换提示词中的占位符
-                prompt = custom_prompt.replace("{target_language}", target_language)
-                prompt = prompt.replace("{translation_style}", translation_style)
-            else:
-                # 使用默认提示词模板，但根据设置动态调整
-                prompt = f"""请分析这张图片中的所有文本内容，包括对话气泡、标题、旁白、音效文字等。
-
-要求：
-1. 识别图片中的每一个文本块
-2. 对每个文本块进行分类（如：对话、旁白、标题、音效等）
-3. 将所有文本翻译成{target_language}
-4. 翻译风格：{translation_style}
-5. 保持原文的语气和风格
-
-重要：请严格按照以下JSON格式返回结果，不要添加任何其他文字或说明：
-
-```json
-[
-  {{
-    "type": "对话气泡",
-    "original_text": "原文内容",
-    "translation": "{target_language}翻译"
-  }},
-  {{
-    "type": "旁白",
-    "original_text": "原文内容",
-    "translation": "{target_language}翻译"
-  }}
-]
-```
-
-格式要求：
-- 必须返回有效的JSON数组格式
-- 每个文本块包含type、original_text、translation三个字段
-- 不要在JSON前后添加任何解释文字
-- 确保JSON语法正确，注意逗号和引号
-- 即使只有一个文本块也要用数组格式 [...]"""
-
-            print(f"🎯 使用翻译设置 - 目标语言: {target_language}, 风格: {translation_style}")
-            print(f"📝 提示词长度: {len(prompt)} 字符")
-
-            # 构建请求数据
-            if provider == "anthropic":
-                # Anthropic API格式
-                data = {
-                    'model': provider_config.get("model_name", ""),
-                    'max_tokens': 4000,
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': [
-                                {
-                                    'type': 'text',
-                                    'text': prompt
-                                },
-                                {
-                                    'type': 'image',
-                                    'source': {
-                                        'type': 'base64',
-                                        'media_type': 'image/jpeg',
-                                        'data': image_base64
-                                    }
-                                }
-                            ]
-                        }
-                    ]
-                }
-            else:
-                # OpenAI兼容格式（OpenRouter, OpenAI, 自定义）
-                data = {
-                    'model': provider_config.get("model_name", ""),
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': [
-                                {
-                                    'type': 'text',
-                                    'text': prompt
-                                },
-                                {
-                                    'type': 'image_url',
-                                    'image_url': {
-                                        'url': f'data:image/jpeg;base64,{image_base64}'
-                                    }
-                                }
-                            ]
-                        }
-                    ]
-                }
-
-            # 发送请求
-            base_url = provider_config.get("base_url", "")
-            if provider == "anthropic":
-                url = f"{base_url}/messages"
-            else:
-                url = f"{base_url}/chat/completions"
-
-            print(f"🔗 发送请求到: {url}")
-            print(f"📝 使用模型: {provider_config.get('model_name', 'Unknown')}")
-
-            response = requests.post(url, headers=headers, json=data, timeout=60)
-
-            print(f"📊 响应状态码: {response.status_code}")
-
-            # 检查HTTP状态
-            if response.status_code != 200:
-                print(f"❌ HTTP错误: {response.status_code}")
-                print(f"📄 响应内容: {response.text}")
-                raise Exception(f"API调用失败，状态码: {response.status_code}, 响应: {response.text}")
-
-            result = response.json()
-            print(f"📋 API响应结构: {list(result.keys())}")
-
-            # 调试：打印完整响应（仅在开发时）
-            if 'error' in result:
-                print(f"❌ API返回错误: {result['error']}")
-                raise Exception(f"API错误: {result['error']}")
-
-            # 解析响应
-            content = None
-            if provider == "anthropic":
-                if 'content' in result and len(result['content']) > 0:
-                    content = result['content'][0]['text']
-                else:
-                    print(f"❌ Anthropic响应格式错误: {result}")
-                    raise Exception("Anthropic API响应中缺少content字段")
-            else:
-                if 'choices' in result and len(result['choices']) > 0:
-                    content = result['choices'][0]['message']['content']
-                else:
-                    print(f"❌ OpenAI兼容API响应格式错误: {result}")
-                    # 检查是否有错误信息
-                    if 'error' in result:
-                        raise Exception(f"API错误: {result['error']}")
-                    else:
-                        raise Exception(f"API响应中缺少choices字段。响应结构: {list(result.keys())}")
-
-            if not content:
-                raise Exception("API返回的内容为空")
-
-            print(f"✅ 成功获取AI响应，内容长度: {len(content)}")
-            print(f"📄 AI响应内容预览: {content[:300]}...")
-            print(f"📄 完整AI响应内容:")
-            print("-" * 60)
-            print(content)
-            print("-" * 60)
-
-            # 解析JSON结果
-            return self.parse_translation_response(content)
-
-        except requests.exceptions.RequestException as e:
-            print(f"🌐 网络请求失败: {e}")
-            raise Exception(f"网络请求失败: {e}")
-        except json.JSONDecodeError as e:
-            print(f"📄 JSON解析失败: {e}")
-            print(f"📄 原始响应: {response.text if 'response' in locals() else 'No response'}")
-            raise Exception(f"API响应不是有效的JSON格式: {e}")
-        except KeyError as e:
-            print(f"🔑 响应字段缺失: {e}")
-            print(f"📋 可用字段: {list(result.keys()) if 'result' in locals() else 'No result'}")
-            raise Exception(f"API响应中缺少必要字段: {e}")
-        except Exception as e:
-            print(f"❌ 全图翻译调用失败: {e}")
-            raise e
-
-    def fix_json_errors(self, json_str):
-        """修复常见的JSON语法错误"""
-        try:
-            print("🔧 尝试修复JSON错误...")
-
-            # 1. 移除或转义控制字符
-            # 移除无效的控制字符，但保留必要的换行和制表符
-            json_str = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', json_str)
-
-            # 2. 修复字符串中的换行符
-            # 将字符串值中的实际换行符转换为 \n
-            json_str = re.sub(r'("translation":\s*"[^"]*)\n([^"]*")', r'\1\\n\2', json_str)
-            json_str = re.sub(r'("original_text":\s*"[^"]*)\n([^"]*")', r'\1\\n\2', json_str)
-
-            # 3. 修复不完整的JSON对象
-            # 查找没有正确闭合的字符串
-            lines = json_str.split('\n')
-            fixed_lines = []
-
-            for i, line in enumerate(lines):
-                line = line.strip()
-                if not line:
-                    continue
-
-                # 检查是否是不完整的字符串
-                if line.count('"') % 2 != 0 and not line.endswith(',') and not line.endswith('}'):
-                    # 如果字符串没有正确闭合，尝试修复
-                    if '"translation":' in line and not line.endswith('"'):
-                        line = line + '"'
-                    elif '"original_text":' in line and not line.endswith('"'):
-                        line = line + '"'
-
-                fixed_lines.append(line)
-
-            json_str = '\n'.join(fixed_lines)
-
-            # 4. 修复多余的逗号
-            json_str = re.sub(r',\s*}', '}', json_str)  # 对象末尾多余逗号
-            json_str = re.sub(r',\s*]', ']', json_str)  # 数组末尾多余逗号
-
-            # 5. 修复缺少逗号的情况
-            json_str = re.sub(r'"\s*\n\s*"', '",\n    "', json_str)  # 字符串之间缺少逗号
-            json_str = re.sub(r'}\s*\n\s*{', '},\n  {', json_str)    # 对象之间缺少逗号
-
-            # 6. 修复引号问题
-            json_str = re.sub(r'([{,]\s*)(\w+)(\s*:)', r'\1"\2"\3', json_str)  # 键缺少引号
-
-            # 7. 修复字符串中的特殊字符
-            # 转义字符串中的反斜杠和引号
-            json_str = re.sub(r'("(?:original_text|translation)":\s*"[^"]*?)\\(?![nrt"\\])([^"]*?")', r'\1\\\\\2', json_str)
-
-            # 8. 确保正确的数组格式
-            json_str = json_str.strip()
-            if not json_str.startswith('['):
-                json_str = '[' + json_str
-            if not json_str.endswith(']'):
-                json_str = json_str + ']'
-
-            # 9. 最后清理：移除多余的空白字符
-            lines = json_str.split('\n')
-            cleaned_lines = []
-            for line in lines:
-                line = line.strip()
-                if line:
-                    cleaned_lines.append(line)
-            json_str = '\n'.join(cleaned_lines)
-
-            print("✅ JSON修复完成")
-            print(f"🔍 修复后的JSON预览: {json_str[:200]}...")
-            return json_str
-
-        except Exception as e:
-            print(f"⚠️ JSON修复失败: {e}")
-            return json_str
-
-    def parse_translation_response(self, content):
-        """解析翻译响应"""
-        try:
-            print(f"🔍 开始解析响应，内容长度: {len(content)}")
-
-            # 尝试多种方式提取JSON部分
-            json_str = None
-
-            # 方法1: 查找JSON代码块
-            json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-                print("✅ 找到JSON代码块")
-            else:
-                # 方法2: 查找数组格式 [...]
-                array_match = re.search(r'\[\s*\{.*?\}\s*\]', content, re.DOTALL)
-                if array_match:
-                    json_str = array_match.group(0)
-                    print("✅ 找到JSON数组")
-                else:
-                    # 方法3: 尝试直接解析整个内容
-                    json_str = content.strip()
-                    print("⚠️ 尝试直接解析内容")
-
-            if not json_str:
-                print("❌ 无法找到JSON内容")
-                return self.parse_text_response(content)
-
-            # 清理JSON字符串
-            json_str = json_str.strip()
-
-            # 尝试修复常见的JSON错误
-            json_str = self.fix_json_errors(json_str)
-
-            # 解析JSON
-            results = json.loads(json_str)
-            print(f"✅ JSON解析成功，找到 {len(results) if isinstance(results, list) else 1} 个项目")
-
-            # 验证结果格式
-            if isinstance(results, list):
-                validated_results = []
-                for item in results:
-                    if isinstance(item, dict) and 'original_text' in item and 'translation' in item:
-                        validated_results.append({
-                            'type': item.get('type', '未分类'),
-                            'original_text': item.get('original_text', ''),
-                            'translation': item.get('translation', '')
-                        })
-                print(f"✅ 验证完成，有效项目: {len(validated_results)}")
-                return validated_results
-            else:
-                # 如果不是列表格式，尝试转换
-                if isinstance(results, dict):
-                    return [results]
-
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON解析失败: {e}")
-            print(f"📄 尝试解析的内容: {json_str[:200]}...")
-
-            # 尝试手动重构JSON
-            print("🔧 尝试手动重构JSON...")
-            reconstructed_json = self.reconstruct_json_from_text(content)
-            if reconstructed_json:
-                return reconstructed_json
-
-            # 如果JSON解析失败，尝试简单的文本解析
-            return self.parse_text_response(content)
-
-    def reconstruct_json_from_text(self, content):
-        """从混乱的文本中重构JSON数据"""
-        try:
-            print("🔧 开始手动重构JSON...")
-
-            # 提取所有可能的翻译对
-            results = []
-
-            # 使用正则表达式提取 "original_text" 和 "translation" 对
-            pattern = r'"original_text":\s*"([^"]*(?:\\.[^"]*)*)"[^}]*?"translation":\s*"([^"]*(?:\\.[^"]*)*)"'
-            matches = re.findall(pattern, content, re.DOTALL)
-
-            for i, (original, translation) in enumerate(matches):
-                # 清理文本
-                original = original.replace('\\n', ' ').replace('\n', ' ').strip()
-                translation = translation.replace('\\n', ' ').replace('\n', ' ').strip()
-
-                if original and translation:
-                    results.append({
-                        'type': '对话气泡',
-                        'original_text': original,
-                        'translation': translation
-                    })
-
-            # 如果没有找到匹配，尝试其他模式
-            if not results:
-                # 尝试查找类似 "text": "content" 的模式
-                text_pattern = r'"([^"]*)":\s*"([^"]*)"'
-                text_matches = re.findall(text_pattern, content)
-
-                current_item = {}
-                for key, value in text_matches:
-                    if 'original' in key.lower() or 'text' in key.lower():
-                        current_item['original_text'] = value.strip()
-                    elif 'translation' in key.lower() or 'trans' in key.lower():
-                        current_item['translation'] = value.strip()
-                        if 'original_text' in current_item:
-                            current_item['type'] = '对话气泡'
-                            results.append(current_item.copy())
-                            current_item = {}
-
-            if results:
-                print(f"✅ 成功重构JSON，找到 {len(results)} 个项目")
-                return results
-            else:
-                print("❌ 无法重构JSON")
-                return None
-
-        except Exception as e:
-            print(f"❌ JSON重构失败: {e}")
-            return None
-
-        except Exception as e:
-            print(f"❌ 解析响应时出错: {e}")
-            return []
-
-    def parse_text_response(self, content):
-        """解析纯文本响应"""
-        try:
-            print("🔍 尝试文本解析...")
-
-            # 检查是否包含JSON内容（避免重复包装）
-            if '```json' in content or (content.strip().startswith('[') and content.strip().endswith(']')):
-                print("⚠️ 内容似乎包含JSON，尝试重新解析")
-                # 尝试再次提取JSON
-                if '```json' in content:
-                    json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-                    if json_match:
-                        try:
-                            results = json.loads(json_match.group(1))
-                            if isinstance(results, list):
-                                return results
-                        except:
-                            pass
-
-                # 如果是数组格式，直接尝试解析
-                content_clean = content.strip()
-                if content_clean.startswith('[') and content_clean.endswith(']'):
-                    try:
-                        results = json.loads(content_clean)
-                        if isinstance(results, list):
-                            return results
-                    except:
-                        pass
-
-            # 简单的文本解析
-            lines = content.strip().split('\n')
-            results = []
+        # 应用新的预翻译设置（开启或修改上限后立即生效）
+        self.read_ahead.configure(config_manager.get_read_ahead_settings())
+        self.update_read_ahead()
 
-            current_item = {}
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                if line.startswith('原文:') or line.startswith('Original:'):
-                    current_item['original_text'] = line.split(':', 1)[1].strip()
-                elif line.startswith('译文:') or line.startswith('Translation:'):
-                    current_item['translation'] = line.split(':', 1)[1].strip()
-                    if 'original_text' in current_item:
-                        current_item['type'] = '文本'
-                        results.append(current_item.copy())
-                        current_item = {}
-                elif '→' in line or '->' in line:
-                    # 处理 "原文 → 译文" 格式
-                    parts = line.split('→' if '→' in line else '->')
-                    if len(parts) == 2:
-                        results.append({
-                            'type': '文本',
-                            'original_text': parts[0].strip(),
-                            'translation': parts[1].strip()
-                        })
-
-            # 如果没有解析到任何结果，但内容很长，可能是格式问题
-            if not results:
-                # 检查内容长度，如果太长可能是JSON格式错误
-                if len(content) > 100 and ('{' in content or '[' in content):
-                    print("⚠️ 内容较长且包含JSON字符，可能是格式问题")
-                    return [{
-                        'type': '解析错误',
-                        'original_text': '响应格式错误',
-                        'translation': 'AI返回的内容格式不正确，请检查提示词设置或重试'
-                    }]
-                else:
-                    # 短内容作为简单翻译结果
-                    results.append({
-                        'type': '翻译结果',
-                        'original_text': '图片内容',
-                        'translation': content.strip()
-                    })
+        # 应用新的预览缓存上限
+        self.image_cache.set_max_bytes(config_manager.get_viewer_cache_bytes())
 
-            print(f"✅ 文本解析完成，找到 {len(results)} 个项目")
-            return results
+        # 更新状态栏显示当前配置
+        self.update_status_with_config()
 
-        except Exception as e:
-            print(f"❌ 文本解析失败: {e}")
-            return [{
-                'type': '错误',
-                'original_text': '解析失败',
-                'translation': content[:500] + '...' if len(content) > 500 else content
-            }]
 
 
 def main():
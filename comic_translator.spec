@@ -10,6 +10,25 @@ a = Analysis(
         ('config.py', '.'),
         ('ai_client.py', '.'),
         ('image_processor.py', '.'),
+        ('http_transport.py', '.'),
+        ('batch_engine.py', '.'),
+        ('translation_cache.py', '.'),
+        ('upload_optimizer.py', '.'),
+        ('stream_parser.py', '.'),
+        ('image_tiling.py', '.'),
+        ('page_packing.py', '.'),
+        ('rate_limiter.py', '.'),
+        ('translation_journal.py', '.'),
+        ('image_viewport.py', '.'),
+        ('scaled_image_cache.py', '.'),
+        ('page_loader.py', '.'),
+        ('image_list_view.py', '.'),
+        ('folder_scanner.py', '.'),
+        ('archive_reader.py', '.'),
+        ('translation_engine.py', '.'),
+        ('job_scheduler.py', '.'),
+        ('read_ahead.py', '.'),
+        ('cancellation.py', '.'),
     ],
     hiddenimports=[
         'tkinter',
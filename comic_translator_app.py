@@ -11,8 +11,6 @@ import numpy as np
 from PIL import Image, ImageTk, ImageDraw, ImageFont
 import json
 import os
-import requests
-import base64
 from typing import List, Dict, Tuple
 import threading
 import datetime
@@ -20,6 +18,8 @@ import datetime
 # 导入配置
 import config
 from config import config_manager
+import http_transport
+import translation_engine
 
 class SettingsWindow:
     """设置窗口"""
@@ -471,6 +471,7 @@ class ComicTranslatorApp:
         self.current_image = None
         self.translation_results = []  # 存储翻译结果
         self.is_translating = False
+        self.engine = translation_engine.TranslationEngine(config_manager)  # 全图翻译引擎（与主程序共用）
 
         # 创建UI
         self.create_ui()
@@ -630,7 +631,7 @@ class ComicTranslatorApp:
         """全图翻译线程"""
         try:
             # 调用AI进行全图翻译
-            results = self.call_full_image_translation(self.current_image_path)
+            results = self.engine.translate(self.current_image_path)
 
             # 在主线程中更新UI
             self.root.after(0, self._translation_complete, results)
@@ -660,237 +661,6 @@ class ComicTranslatorApp:
         messagebox.showerror("错误", f"翻译失败: {error_msg}")
         self.status_var.set("翻译失败")
 
-    def call_full_image_translation(self, image_path):
-        """调用AI进行全图翻译"""
-        try:
-            # 读取图片并编码为base64
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
-
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
-
-            # 获取图片尺寸
-            img = cv2.imread(image_path)
-            height, width = img.shape[:2]
-
-            # 获取当前配置
-            provider = config_manager.config.get("api_provider", "openrouter")
-            provider_config = config_manager.get_current_provider_config()
-
-            # 构建请求头
-            headers = {
-                'Authorization': f'Bearer {provider_config.get("api_key", "")}',
-                'Content-Type': 'application/json'
-            }
-
-            # 根据不同服务商添加特定头信息
-            if provider == "openrouter":
-                headers['HTTP-Referer'] = provider_config.get("http_referer", "")
-                headers['X-Title'] = provider_config.get("x_title", "")
-            elif provider == "anthropic":
-                headers['anthropic-version'] = provider_config.get("version", "2023-06-01")
-            elif provider == "custom":
-                custom_headers = provider_config.get("headers", {})
-                headers.update(custom_headers)
-
-            # 构建全图翻译提示词
-            prompt = """请分析这张图片中的所有文本内容，包括对话气泡、标题、旁白、音效文字等。
-
-要求：
-1. 识别图片中的每一个文本块
-2. 对每个文本块进行分类（如：对话、旁白、标题、音效等）
-3. 将所有文本翻译成中文
-4. 保持原文的语气和风格
-
-请按以下JSON格式返回结果：
-```json
-[
-  {
-    "type": "对话气泡",
-    "original_text": "原文内容",
-    "translation": "中文翻译"
-  },
-  {
-    "type": "旁白",
-    "original_text": "原文内容",
-    "translation": "中文翻译"
-  }
-]
-```
-
-注意：
-- 每个独立的文本区域都要单独列出
-- 即使是很短的文字也要包含
-- 翻译要准确且符合中文表达习惯
-- 保持原文的情感色彩"""
-
-            # 构建请求数据
-            if provider == "anthropic":
-                # Anthropic API格式
-                data = {
-                    'model': provider_config.get("model_name", ""),
-                    'max_tokens': 4000,
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': [
-                                {
-                                    'type': 'text',
-                                    'text': prompt
-                                },
-                                {
-                                    'type': 'image',
-                                    'source': {
-                                        'type': 'base64',
-                                        'media_type': 'image/jpeg',
-                                        'data': image_base64
-                                    }
-                                }
-                            ]
-                        }
-                    ]
-                }
-            else:
-                # OpenAI兼容格式（OpenRouter, OpenAI, 自定义）
-                data = {
-                    'model': provider_config.get("model_name", ""),
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': [
-                                {
-                                    'type': 'text',
-                                    'text': prompt
-                                },
-                                {
-                                    'type': 'image_url',
-                                    'image_url': {
-                                        'url': f'data:image/jpeg;base64,{image_base64}'
-                                    }
-                                }
-                            ]
-                        }
-                    ]
-                }
-
-            # 发送请求
-            base_url = provider_config.get("base_url", "")
-            if provider == "anthropic":
-                url = f"{base_url}/messages"
-            else:
-                url = f"{base_url}/chat/completions"
-
-            response = requests.post(url, headers=headers, json=data, timeout=60)
-            response.raise_for_status()
-
-            result = response.json()
-
-            # 解析响应
-            if provider == "anthropic":
-                content = result['content'][0]['text']
-            else:
-                content = result['choices'][0]['message']['content']
-
-            # 解析JSON结果
-            return self.parse_translation_response(content)
-
-        except Exception as e:
-            print(f"全图翻译调用失败: {e}")
-            raise e
-
-    def parse_translation_response(self, content):
-        """解析翻译响应"""
-        try:
-            # 尝试提取JSON部分
-            import re
-
-            # 查找JSON代码块
-            json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # 如果没有代码块，尝试直接解析
-                json_str = content.strip()
-
-            # 解析JSON
-            results = json.loads(json_str)
-
-            # 验证结果格式
-            if isinstance(results, list):
-                validated_results = []
-                for item in results:
-                    if isinstance(item, dict) and 'original_text' in item and 'translation' in item:
-                        validated_results.append({
-                            'type': item.get('type', '未分类'),
-                            'original_text': item.get('original_text', ''),
-                            'translation': item.get('translation', '')
-                        })
-                return validated_results
-            else:
-                # 如果不是列表格式，尝试转换
-                if isinstance(results, dict):
-                    return [results]
-
-        except json.JSONDecodeError as e:
-            print(f"JSON解析失败: {e}")
-            print(f"原始内容: {content}")
-
-            # 如果JSON解析失败，尝试简单的文本解析
-            return self.parse_text_response(content)
-
-        except Exception as e:
-            print(f"解析响应时出错: {e}")
-            return []
-
-    def parse_text_response(self, content):
-        """解析纯文本响应"""
-        try:
-            # 简单的文本解析，将整个响应作为一个翻译结果
-            lines = content.strip().split('\n')
-            results = []
-
-            current_item = {}
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                if line.startswith('原文:') or line.startswith('Original:'):
-                    current_item['original_text'] = line.split(':', 1)[1].strip()
-                elif line.startswith('译文:') or line.startswith('Translation:'):
-                    current_item['translation'] = line.split(':', 1)[1].strip()
-                    if 'original_text' in current_item:
-                        current_item['type'] = '文本'
-                        results.append(current_item.copy())
-                        current_item = {}
-                elif '→' in line or '->' in line:
-                    # 处理 "原文 → 译文" 格式
-                    parts = line.split('→' if '→' in line else '->')
-                    if len(parts) == 2:
-                        results.append({
-                            'type': '文本',
-                            'original_text': parts[0].strip(),
-                            'translation': parts[1].strip()
-                        })
-
-            # 如果没有解析到任何结果，将整个内容作为翻译
-            if not results:
-                results.append({
-                    'type': '翻译结果',
-                    'original_text': '图片内容',
-                    'translation': content.strip()
-                })
-
-            return results
-
-        except Exception as e:
-            print(f"文本解析失败: {e}")
-            return [{
-                'type': '错误',
-                'original_text': '解析失败',
-                'translation': content[:500] + '...' if len(content) > 500 else content
-            }]
-    
     def display_translation_results(self):
         """显示翻译结果"""
         self.translation_text.delete(1.0, tk.END)
@@ -991,6 +761,7 @@ class ComicTranslatorApp:
 
         # 重新加载配置
         config_manager = config.ConfigManager()
+        self.engine.config_manager = config_manager
 
         # 更新状态栏显示当前配置
         self.update_status_with_config()
@@ -1071,12 +842,10 @@ class ComicTranslatorApp:
     def call_ai_detection(self, image_path):
         """调用AI进行文本检测"""
         try:
-            # 读取图片并编码为base64
+            # 读取图片
             with open(image_path, 'rb') as f:
                 image_data = f.read()
 
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
-
             # 获取图片尺寸
             img = cv2.imread(image_path)
             height, width = img.shape[:2]
@@ -1086,92 +855,28 @@ class ComicTranslatorApp:
             provider_config = config_manager.get_current_provider_config()
 
             # 构建请求头
-            headers = {
-                'Authorization': f'Bearer {provider_config.get("api_key", "")}',
-                'Content-Type': 'application/json'
-            }
-
-            # 根据不同服务商添加特定头信息
-            if provider == "openrouter":
-                headers['HTTP-Referer'] = provider_config.get("http_referer", "")
-                headers['X-Title'] = provider_config.get("x_title", "")
-            elif provider == "anthropic":
-                headers['anthropic-version'] = provider_config.get("version", "2023-06-01")
-            elif provider == "custom":
-                custom_headers = provider_config.get("headers", {})
-                headers.update(custom_headers)
+            headers = translation_engine.build_headers(provider, provider_config)
 
             # 构建提示词
             prompt = config.PROMPT_TEMPLATE.format(width=width, height=height)
 
             # 构建请求数据
-            if provider == "anthropic":
-                # Anthropic API格式
-                data = {
-                    'model': provider_config.get("model_name", ""),
-                    'max_tokens': 4000,
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': [
-                                {
-                                    'type': 'text',
-                                    'text': prompt
-                                },
-                                {
-                                    'type': 'image',
-                                    'source': {
-                                        'type': 'base64',
-                                        'media_type': 'image/jpeg',
-                                        'data': image_base64
-                                    }
-                                }
-                            ]
-                        }
-                    ]
-                }
-            else:
-                # OpenAI兼容格式（OpenRouter, OpenAI, 自定义）
-                data = {
-                    'model': provider_config.get("model_name", ""),
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': [
-                                {
-                                    'type': 'text',
-                                    'text': prompt
-                                },
-                                {
-                                    'type': 'image_url',
-                                    'image_url': {
-                                        'url': f'data:image/jpeg;base64,{image_base64}'
-                                    }
-                                }
-                            ]
-                        }
-                    ]
-                }
+            data = translation_engine.build_request_data(provider, provider_config, [
+                {
+                    'type': 'text',
+                    'text': prompt
+                },
+                translation_engine.image_content_part(provider, image_data, 'image/jpeg')
+            ])
 
             # 发送请求
-            base_url = provider_config.get("base_url", "")
-            if provider == "anthropic":
-                url = f"{base_url}/messages"
-            else:
-                url = f"{base_url}/chat/completions"
-
-            response = requests.post(url, headers=headers, json=data, timeout=60)
+            url = translation_engine.endpoint_url(provider, provider_config)
+            response = http_transport.post(provider, url, headers=headers, json=data, timeout=60)
 
             if response.status_code != 200:
                 raise Exception(f"API请求失败: {response.status_code} - {response.text}")
 
-            result = response.json()
-
-            # 根据不同API提取内容
-            if provider == "anthropic":
-                content = result['content'][0]['text']
-            else:
-                content = result['choices'][0]['message']['content']
+            content = translation_engine.extract_response_text(provider, response.json())
 
             # 解析JSON结果
             try:
@@ -1377,20 +1082,7 @@ class ComicTranslatorApp:
             provider_config = config_manager.get_current_provider_config()
 
             # 构建请求头
-            headers = {
-                'Authorization': f'Bearer {provider_config.get("api_key", "")}',
-                'Content-Type': 'application/json'
-            }
-
-            # 根据不同服务商添加特定头信息
-            if provider == "openrouter":
-                headers['HTTP-Referer'] = provider_config.get("http_referer", "")
-                headers['X-Title'] = provider_config.get("x_title", "")
-            elif provider == "anthropic":
-                headers['anthropic-version'] = provider_config.get("version", "2023-06-01")
-            elif provider == "custom":
-                custom_headers = provider_config.get("headers", {})
-                headers.update(custom_headers)
+            headers = translation_engine.build_headers(provider, provider_config)
 
             # 获取翻译设置（如果有的话）
             target_lang = getattr(self, 'target_lang_var', None)
@@ -1410,49 +1102,16 @@ class ComicTranslatorApp:
 英文原文：{text}"""
 
             # 构建请求数据
-            if provider == "anthropic":
-                # Anthropic API格式
-                data = {
-                    'model': provider_config.get("model_name", ""),
-                    'max_tokens': 1000,
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': prompt
-                        }
-                    ]
-                }
-            else:
-                # OpenAI兼容格式
-                data = {
-                    'model': provider_config.get("model_name", ""),
-                    'messages': [
-                        {
-                            'role': 'user',
-                            'content': prompt
-                        }
-                    ]
-                }
+            data = translation_engine.build_request_data(provider, provider_config, prompt, max_tokens=1000)
 
             # 发送请求
-            base_url = provider_config.get("base_url", "")
-            if provider == "anthropic":
-                url = f"{base_url}/messages"
-            else:
-                url = f"{base_url}/chat/completions"
-
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            url = translation_engine.endpoint_url(provider, provider_config)
+            response = http_transport.post(provider, url, headers=headers, json=data, timeout=30)
 
             if response.status_code != 200:
                 raise Exception(f"API请求失败: {response.status_code} - {response.text}")
 
-            result = response.json()
-
-            # 根据不同API提取内容
-            if provider == "anthropic":
-                content = result['content'][0]['text']
-            else:
-                content = result['choices'][0]['message']['content']
+            content = translation_engine.extract_response_text(provider, response.json())
 
             return content.strip()
 
@@ -84,6 +84,13 @@ DEFAULT_CONFIG = {
 # 配置文件路径
 CONFIG_FILE = "user_config.json"
 
+# 翻译缓存配置
+CACHE_FILE = "translation_cache.db"              # 缓存数据库路径
+DEFAULT_CACHE_MAX_BYTES = 200 * 1024 * 1024      # 默认缓存上限 200MB
+
+# 翻译日志（崩溃后恢复图片列表和已完成的翻译结果）
+JOURNAL_FILE = "translation_journal.jsonl"
+
 class ConfigManager:
     """配置管理器"""
 
@@ -175,6 +182,141 @@ class ConfigManager:
         """获取翻译风格"""
         return self.get_advanced_settings().get("translation_style", "自然")
 
+    def get_batch_concurrency(self) -> int:
+        """获取批量翻译并发数（1-16）"""
+        try:
+            concurrency = int(self.get_advanced_settings().get("batch_concurrency", 3))
+        except (TypeError, ValueError):
+            concurrency = 3
+        return max(1, min(concurrency, 16))
+
+    def is_streaming_enabled(self) -> bool:
+        """是否使用流式响应逐块显示翻译结果"""
+        return bool(self.get_advanced_settings().get("stream_responses", True))
+
+    def is_cache_enabled(self) -> bool:
+        """是否使用翻译缓存（高级设置中的"跳过缓存"为真时返回False）"""
+        return not self.get_advanced_settings().get("bypass_cache", False)
+
+    def get_cache_max_bytes(self) -> int:
+        """获取翻译缓存容量上限（字节）"""
+        try:
+            max_mb = int(self.get_advanced_settings().get("cache_max_mb", DEFAULT_CACHE_MAX_BYTES // (1024 * 1024)))
+        except (TypeError, ValueError):
+            return DEFAULT_CACHE_MAX_BYTES
+        return max(1, max_mb) * 1024 * 1024
+
+    def get_upload_settings(self) -> Dict[str, Any]:
+        """获取上传优化设置（最大长边、输出格式、编码质量）"""
+        settings = self.get_advanced_settings()
+        try:
+            max_edge = max(0, int(settings.get("upload_max_edge", 2048)))
+        except (TypeError, ValueError):
+            max_edge = 2048
+        try:
+            quality = max(1, min(int(settings.get("upload_quality", 85)), 100))
+        except (TypeError, ValueError):
+            quality = 85
+        upload_format = str(settings.get("upload_format", "JPEG")).upper()
+        if upload_format not in ("JPEG", "WEBP", "PNG"):
+            upload_format = "JPEG"
+        return {"max_edge": max_edge, "format": upload_format, "quality": quality}
+
+    def get_tile_settings(self) -> Dict[str, Any]:
+        """获取长图切片设置（是否启用、切片高度、重叠高度）"""
+        settings = self.get_advanced_settings()
+        try:
+            tile_height = max(256, int(settings.get("tile_height", 1600)))
+        except (TypeError, ValueError):
+            tile_height = 1600
+        try:
+            overlap = max(0, min(int(settings.get("tile_overlap", 200)), tile_height // 2))
+        except (TypeError, ValueError):
+            overlap = 200
+        return {
+            "enabled": bool(settings.get("tile_tall_images", True)),
+            "tile_height": tile_height,
+            "overlap": overlap
+        }
+
+    def get_packing_settings(self) -> Dict[str, Any]:
+        """获取多页合并设置（是否启用、每次请求最多页数、小图像素上限）"""
+        settings = self.get_advanced_settings()
+        try:
+            max_pages = max(2, min(int(settings.get("pack_max_pages", 4)), 8))
+        except (TypeError, ValueError):
+            max_pages = 4
+        try:
+            max_pixels = max(0, int(settings.get("pack_page_max_pixels", 2000000)))
+        except (TypeError, ValueError):
+            max_pixels = 2000000
+        return {
+            "enabled": bool(settings.get("pack_small_pages", False)),
+            "max_pages": max_pages,
+            "max_pixels": max_pixels
+        }
+
+    def get_read_ahead_settings(self) -> Dict[str, Any]:
+        """获取阅读时预翻译设置（是否启用、向后页数、同时在途上限、每次启动最多预翻译页数）"""
+        settings = self.get_advanced_settings()
+        try:
+            pages = max(1, min(int(settings.get("read_ahead_pages", 3)), 10))
+        except (TypeError, ValueError):
+            pages = 3
+        try:
+            max_concurrency = max(1, min(int(settings.get("read_ahead_concurrency", 1)), 4))
+        except (TypeError, ValueError):
+            max_concurrency = 1
+        try:
+            page_limit = max(1, int(settings.get("read_ahead_page_limit", 50)))
+        except (TypeError, ValueError):
+            page_limit = 50
+        return {
+            "enabled": bool(settings.get("read_ahead_enabled", False)),
+            "pages": pages,
+            "max_concurrency": max_concurrency,
+            "page_limit": page_limit
+        }
+
+    def get_rate_limit_settings(self, provider: str = None) -> Dict[str, Any]:
+        """获取服务商的限流设置（每分钟请求数/token数来自服务商配置，重试和熔断来自高级设置）"""
+        provider = provider or self.config.get("api_provider", "openrouter")
+        provider_config = self.config.get(provider, {})
+        settings = self.get_advanced_settings()
+
+        def read_number(source, key, default, minimum=0):
+            try:
+                return max(minimum, float(source.get(key, default) or 0))
+            except (TypeError, ValueError):
+                return default
+
+        return {
+            "requests_per_minute": read_number(provider_config, "requests_per_minute", 0),
+            "tokens_per_minute": read_number(provider_config, "tokens_per_minute", 0),
+            "max_retries": int(read_number(settings, "max_retries", 5)),
+            "backoff_base": read_number(settings, "backoff_base", 1.0, 0.1),
+            "backoff_max": read_number(settings, "backoff_max", 60.0, 1.0),
+            "breaker_threshold": int(read_number(settings, "breaker_threshold", 5, 1)),
+            "breaker_cooldown": read_number(settings, "breaker_cooldown", 30.0)
+        }
+
+    def get_viewer_cache_bytes(self) -> int:
+        """获取图片预览缓存的内存预算（字节）"""
+        settings = self.get_advanced_settings()
+        try:
+            max_mb = max(32, int(settings.get("viewer_cache_mb", 256)))
+        except (TypeError, ValueError):
+            max_mb = 256
+        return max_mb * 1024 * 1024
+
+    def get_prefetch_pages(self) -> int:
+        """获取翻页预读的前后页数（0表示关闭）"""
+        settings = self.get_advanced_settings()
+        try:
+            return max(0, min(int(settings.get("prefetch_pages", 2)), 8))
+        except (TypeError, ValueError):
+            return 2
+
     def get_custom_prompt(self) -> str:
         """获取自定义提示词"""
         default_prompt = """请分析这张图片中的所有文本内容，包括对话气泡、标题、旁白、音效文字等。
@@ -244,3 +386,4 @@ TEXT_COLOR = (0, 255, 0) # 绿色文字 (BGR格式)
 # 输出文件配置
 OUTPUT_SUFFIX = "_detected"  # 输出文件后缀
 SUPPORTED_FORMATS = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']  # 支持的图片格式
+ARCHIVE_FORMATS = ['.cbz', '.zip']  # 不解压直接读取的漫画压缩包格式
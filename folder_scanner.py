@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+文件夹导入模块
+用os.scandir递归遍历文件夹，按章节/页码的自然顺序（第2话在第10话之前）排列图片，
+每扫描完一个文件夹就分块产出结果，导入整部漫画时前几页可以立即显示；
+CBZ/ZIP压缩包展开为包内图片的路径，不解压
+"""
+
+import os
+import re
+from typing import Iterable, Iterator, List
+
+import config
+import archive_reader
+
+# 每次送入图片列表的最大数量
+DEFAULT_CHUNK_SIZE = 200
+
+_NUMBER_PATTERN = re.compile(r"(\d+)")
+
+
+def natural_sort_key(path: str):
+    """
+    自然排序的键：数字按数值比较，其余部分不区分大小写
+
+    例如 "Ch 2/10.jpg" 排在 "Ch 10/1.jpg" 之前，"page9" 排在 "page10" 之前
+    """
+    key = []
+    for part in re.split(r"[\\/]", path):
+        key.append(tuple((0, int(chunk), chunk) if chunk.isdigit() else (1, 0, chunk.casefold())
+                         for chunk in _NUMBER_PATTERN.split(part) if chunk))
+    return key
+
+
+def is_supported_image(path: str) -> bool:
+    """扩展名是否在支持的图片格式中"""
+    return os.path.splitext(path)[1].lower() in config.SUPPORTED_FORMATS
+
+
+def scan_archive(archive_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[str]]:
+    """
+    列出压缩包内的图片（按自然顺序），无法读取的压缩包打印警告后跳过
+
+    Yields:
+        压缩包内图片路径块
+    """
+    try:
+        members = archive_reader.list_members(archive_path)
+    except ValueError as e:
+        print(f"⚠️ {archive_path}: {e}")
+        return
+
+    members = sorted((member for member in members if is_supported_image(member)), key=natural_sort_key)
+    paths = [archive_reader.member_path(archive_path, member) for member in members]
+    for start in range(0, len(paths), chunk_size):
+        yield paths[start:start + chunk_size]
+
+
+def scan_folder(folder: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[str]]:
+    """
+    递归扫描文件夹中的图片
+
+    每个文件夹先产出自身的图片，再按自然顺序依次展开压缩包、进入子文件夹；
+    隐藏文件和文件夹被跳过，无法读取的文件夹打印警告后跳过
+
+    Args:
+        folder: 文件夹路径
+        chunk_size: 每块最多包含的图片数
+
+    Yields:
+        按自然顺序排列的图片路径块
+    """
+    visited = set()
+    pending = [folder]
+    while pending:
+        current = pending.pop()
+        real_path = os.path.realpath(current)
+        if real_path in visited:  # 符号链接造成的循环
+            continue
+        visited.add(real_path)
+
+        images, archives, subfolders = [], [], []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir():
+                            subfolders.append(entry.path)
+                        elif entry.is_file() and is_supported_image(entry.name):
+                            images.append(entry.path)
+                        elif entry.is_file() and archive_reader.is_archive(entry.name):
+                            archives.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"⚠️ 无法读取文件夹 {current}: {e}")
+            continue
+
+        images.sort(key=natural_sort_key)
+        for start in range(0, len(images), chunk_size):
+            yield images[start:start + chunk_size]
+
+        for archive_path in sorted(archives, key=natural_sort_key):
+            yield from scan_archive(archive_path, chunk_size)
+
+        # 倒序入栈，出栈时按自然顺序处理
+        subfolders.sort(key=natural_sort_key, reverse=True)
+        pending.extend(subfolders)
+
+
+def scan_paths(paths: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[str]]:
+    """
+    扫描拖入或选择的路径：图片文件保持原顺序，文件夹递归展开，压缩包展开为包内图片
+
+    Yields:
+        图片路径块
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path) or archive_reader.is_archive(path):
+            if files:
+                yield files
+                files = []
+            if os.path.isdir(path):
+                yield from scan_folder(path, chunk_size)
+            else:
+                yield from scan_archive(path, chunk_size)
+        elif is_supported_image(path):
+            files.append(path)
+            if len(files) >= chunk_size:
+                yield files
+                files = []
+    if files:
+        yield files
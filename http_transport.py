@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP传输模块
+为每个API服务商维护一个可复用的requests.Session（连接池 + keep-alive），
+避免每次请求都重新进行DNS解析、TCP连接和TLS握手；
+在cancellable范围内发出的请求取消时直接关闭其连接，阻塞中的请求立即返回
+"""
+
+import contextlib
+import socket
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import cancellation
+
+# 连接池配置
+POOL_CONNECTIONS = 4     # 每个Session缓存的主机连接池数量
+POOL_MAXSIZE = 16        # 每个主机保持的最大空闲连接数（应不小于并发请求数）
+DEFAULT_TIMEOUT = 60     # 默认请求超时（秒）
+
+# 全局Session表 {provider: Session}，跨线程共享
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+# 当前线程的取消范围：{"token": 取消令牌, "connections": {连接: 注销回调的函数}}
+_scope = threading.local()
+
+
+def _abort_connection(conn):
+    """关闭连接的socket，阻塞在读写上的线程立即收到连接错误"""
+    # 响应以关闭连接结束时http.client会提前清空conn.sock，因此用连接时记下的socket
+    sock = getattr(conn, "connected_sock", None) or getattr(conn, "sock", None)
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def _untrack(conn):
+    scope = getattr(_scope, "current", None)
+    if scope is not None:
+        remove = scope["connections"].pop(conn, None)
+        if remove is not None:
+            remove()
+
+
+class _TrackedHTTPConnection(HTTPConnection):
+    """记下建立的socket，取消时即使响应已接管socket也能关闭"""
+
+    connected_sock = None
+
+    def connect(self):
+        super().connect()
+        self.connected_sock = self.sock
+
+
+class _TrackedHTTPSConnection(HTTPSConnection):
+    connected_sock = None
+
+    def connect(self):
+        super().connect()
+        self.connected_sock = self.sock
+
+
+class _CancellableMixin:
+    """从连接池取出连接时登记到当前线程的取消令牌，归还时注销"""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        scope = getattr(_scope, "current", None)
+        if scope is not None and conn not in scope["connections"]:
+            scope["connections"][conn] = scope["token"].add_callback(lambda: _abort_connection(conn))
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            _untrack(conn)
+        super()._put_conn(conn)
+
+
+class _CancellableHTTPConnectionPool(_CancellableMixin, HTTPConnectionPool):
+    ConnectionCls = _TrackedHTTPConnection
+
+
+class _CancellableHTTPSConnectionPool(_CancellableMixin, HTTPSConnectionPool):
+    ConnectionCls = _TrackedHTTPSConnection
+
+
+class _CancellableAdapter(HTTPAdapter):
+    """使用可取消连接池的HTTPAdapter"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CancellableHTTPConnectionPool,
+            "https": _CancellableHTTPSConnectionPool,
+        }
+
+
+@contextlib.contextmanager
+def cancellable(token: Optional[cancellation.CancelToken]):
+    """
+    在此范围内当前线程发出的请求（包括读取流式响应）可被令牌取消：取消时关闭正在使用的连接
+
+    Args:
+        token: 取消令牌，为None时不做任何处理
+    """
+    if token is None:
+        yield
+        return
+
+    previous = getattr(_scope, "current", None)
+    scope = {"token": token, "connections": {}}
+    _scope.current = scope
+    try:
+        yield
+    finally:
+        _scope.current = previous
+        for remove in scope["connections"].values():
+            remove()
+
+
+def _create_session() -> requests.Session:
+    """
+    创建带有调优连接池的Session
+
+    Returns:
+        配置好的requests.Session
+    """
+    session = requests.Session()
+    adapter = _CancellableAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=False,
+        max_retries=0  # 重试策略由上层决定，这里不做隐式重试
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session(provider: str) -> requests.Session:
+    """
+    获取指定服务商的共享Session，不存在时创建
+
+    Args:
+        provider: 服务商名称（openrouter, openai, anthropic, custom）
+
+    Returns:
+        该服务商的requests.Session
+    """
+    session = _sessions.get(provider)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = _create_session()
+            _sessions[provider] = session
+        return session
+
+
+def post(provider: str, url: str, timeout: float = DEFAULT_TIMEOUT, **kwargs) -> requests.Response:
+    """
+    通过服务商的共享连接池发送POST请求
+
+    Args:
+        provider: 服务商名称
+        url: 请求地址
+        timeout: 超时时间（秒）
+        **kwargs: 透传给Session.post的参数（headers, json等）
+
+    Returns:
+        requests.Response对象
+    """
+    return get_session(provider).post(url, timeout=timeout, **kwargs)
+
+
+def close_all():
+    """关闭所有Session并释放连接（退出程序或切换配置时调用）"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            try:
+                session.close()
+            except Exception as e:
+                print(f"关闭HTTP连接池失败: {e}")
+        _sessions.clear()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+图片列表模块
+列表模型用 列表 + {路径: 位置} 字典保存图片，去重和按路径查找都是O(1)；
+虚拟列表框只把可见的几十行放进Listbox，翻译完成时只刷新状态变化的那一行，
+几万张图片也不会在界面线程中逐行重建
+"""
+
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+from typing import Callable, Iterable, Iterator, List, Optional
+
+
+class ImageListModel:
+    """有序且不重复的图片路径列表"""
+
+    def __init__(self, paths: Iterable[str] = ()):
+        self._paths = []
+        self._index = {}  # {路径: 在列表中的位置}
+        self.extend(paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __getitem__(self, index: int) -> str:
+        return self._paths[index]
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._index
+
+    def index(self, path: str) -> Optional[int]:
+        """路径所在的位置，不在列表中时返回None"""
+        return self._index.get(path)
+
+    def extend(self, paths: Iterable[str]) -> List[str]:
+        """
+        追加图片，跳过已存在的路径
+
+        Returns:
+            实际新增的路径
+        """
+        added = []
+        for path in paths:
+            if path not in self._index:
+                self._index[path] = len(self._paths)
+                self._paths.append(path)
+                added.append(path)
+        return added
+
+    def pop(self, index: int) -> str:
+        """移除并返回指定位置的图片，之后各项的位置前移一位"""
+        path = self._paths.pop(index)
+        del self._index[path]
+        for position in range(index, len(self._paths)):
+            self._index[self._paths[position]] = position
+        return path
+
+    def clear(self):
+        self._paths.clear()
+        self._index.clear()
+
+
+class VirtualImageListbox:
+    """
+    虚拟列表框：Listbox中只保留可见的行，滚动时按需重新填充
+
+    Args:
+        parent: 父控件
+        row_count: 返回总行数的函数
+        format_row: 返回某一行显示文本的函数
+        on_select: 用户选中某一行时的回调，参数为行号
+    """
+
+    def __init__(self, parent, row_count: Callable[[], int], format_row: Callable[[int], str],
+                 on_select: Callable[[int], None]):
+        self.row_count = row_count
+        self.format_row = format_row
+        self.on_select = on_select
+        self.first = 0          # 可见区域第一行的行号
+        self.visible_rows = 1   # Listbox能显示的行数
+        self.selected = None    # 选中的行号
+
+        self.listbox = tk.Listbox(parent, selectmode=tk.SINGLE, exportselection=False)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self.yview)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # 与Tk的Listbox行高计算方式一致：行距 + 1 + 两倍选中边框
+        linespace = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace")
+        pixels = lambda option: self.listbox.winfo_pixels(self.listbox.cget(option))
+        self._line_height = linespace + 1 + 2 * pixels("selectborderwidth")
+        self._padding = 2 * (pixels("borderwidth") + pixels("highlightthickness"))
+        self.listbox.bind("<Configure>", self._on_configure)
+        self.listbox.bind("<<ListboxSelect>>", self._on_listbox_select)
+        self.listbox.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.listbox.bind("<Button-4>", lambda event: self.scroll_rows(-3) or "break")
+        self.listbox.bind("<Button-5>", lambda event: self.scroll_rows(3) or "break")
+        self.listbox.bind("<Up>", lambda event: self._select_relative(-1) or "break")
+        self.listbox.bind("<Down>", lambda event: self._select_relative(1) or "break")
+
+    def bind(self, sequence: str, func):
+        self.listbox.bind(sequence, func)
+
+    def selected_index(self) -> Optional[int]:
+        """选中的行号，没有选中时返回None"""
+        if self.selected is not None and self.selected < self.row_count():
+            return self.selected
+        return None
+
+    def select(self, index: Optional[int]):
+        """选中某一行并滚动到可见位置"""
+        self.selected = index
+        if index is not None:
+            self.see(index)
+        self.refresh()
+
+    def see(self, index: int):
+        """滚动使某一行可见"""
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + self.visible_rows:
+            self.first = index - self.visible_rows + 1
+        self._clamp_first()
+
+    def refresh(self):
+        """重新填充可见的行（总行数变化或滚动后调用）"""
+        self._clamp_first()
+        total = self.row_count()
+        last = min(total, self.first + self.visible_rows)
+
+        self.listbox.delete(0, tk.END)
+        for index in range(self.first, last):
+            self.listbox.insert(tk.END, self.format_row(index))
+        self._show_selection()
+
+        if total:
+            self.scrollbar.set(self.first / total, last / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def refresh_row(self, index: int):
+        """只刷新一行（该行不可见时什么也不做）"""
+        row = index - self.first
+        if 0 <= row < self.listbox.size():
+            self.listbox.delete(row)
+            self.listbox.insert(row, self.format_row(index))
+            self._show_selection()
+
+    def scroll_rows(self, count: int):
+        self.first += count
+        self.refresh()
+
+    def yview(self, *args):
+        """滚动条命令：moveto 比例 / scroll 数量 units|pages"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * self.row_count())
+        elif args[0] == "scroll":
+            step = max(1, self.visible_rows - 1) if args[2] == "pages" else 1
+            self.first += int(args[1]) * step
+        self.refresh()
+
+    def _clamp_first(self):
+        total = self.row_count()
+        self.first = max(0, min(self.first, total - self.visible_rows))
+
+    def _show_selection(self):
+        self.listbox.selection_clear(0, tk.END)
+        if self.selected is not None:
+            row = self.selected - self.first
+            if 0 <= row < self.listbox.size():
+                self.listbox.selection_set(row)
+                self.listbox.activate(row)
+
+    def _on_configure(self, event):
+        # 只放入完整可见的行，Listbox自身不会出现滚动
+        visible_rows = max(1, (event.height - self._padding) // self._line_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.refresh()
+
+    def _on_listbox_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.first + selection[0]
+            self.on_select(self.selected)
+
+    def _on_mouse_wheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def _select_relative(self, step: int):
+        total = self.row_count()
+        if not total:
+            return
+        current = self.selected if self.selected is not None else self.first
+        index = max(0, min(total - 1, current + step))
+        if index != self.selected:
+            self.select(index)
+            self.on_select(index)
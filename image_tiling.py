@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+长图切片模块
+把竖向长条漫画（如800x20000的条漫）切成带重叠区域的切片分别翻译，
+再按从上到下的顺序合并结果，并去掉重叠区域中重复识别的文本块
+"""
+
+import io
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageOps
+
+import upload_optimizer
+
+# 高宽比达到该值才视为长条漫画
+TALL_ASPECT_RATIO = 3.0
+# 合并时只在相邻切片首尾的若干文本块之间查重（重叠带里的文本块数量有限）
+DEDUP_WINDOW = 4
+# 文本相似度达到该值视为同一文本块
+DEDUP_SIMILARITY = 0.85
+
+
+def should_tile(width: int, height: int, tile_height: int) -> bool:
+    """
+    判断图片是否需要切片
+
+    Args:
+        width: 图片宽度
+        height: 图片高度
+        tile_height: 切片高度
+
+    Returns:
+        是否为需要切片的长图
+    """
+    if width <= 0 or tile_height <= 0:
+        return False
+    return height / width >= TALL_ASPECT_RATIO and height > tile_height
+
+
+def compute_tile_bounds(height: int, tile_height: int, overlap: int) -> List[Tuple[int, int]]:
+    """
+    计算每个切片的纵向范围
+
+    Args:
+        height: 图片高度
+        tile_height: 切片高度
+        overlap: 相邻切片的重叠高度
+
+    Returns:
+        [(top, bottom), ...]，覆盖整张图片且相邻切片重叠overlap像素
+    """
+    overlap = max(0, min(overlap, tile_height // 2))
+    step = tile_height - overlap
+    bounds = []
+    top = 0
+    while True:
+        bottom = min(top + tile_height, height)
+        bounds.append((top, bottom))
+        if bottom >= height:
+            break
+        top += step
+
+    # 最后一片过短时并入上一片，避免只含半个气泡的碎片
+    if len(bounds) > 1 and bounds[-1][1] - bounds[-1][0] <= overlap:
+        bounds.pop()
+        bounds[-1] = (bounds[-1][0], height)
+    return bounds
+
+
+def split_tall_image(image_bytes: bytes, tile_height: int, overlap: int,
+                     upload_settings: Dict) -> List[Tuple[bytes, str]]:
+    """
+    把长图切成重叠切片并按上传设置编码
+
+    Args:
+        image_bytes: 原始图片字节
+        tile_height: 切片高度
+        overlap: 重叠高度
+        upload_settings: 上传优化设置（max_edge, format, quality）
+
+    Returns:
+        [(切片字节, MIME类型), ...]，从上到下排列
+    """
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        image = ImageOps.exif_transpose(img)
+        image.load()
+
+    width, height = image.size
+    tiles = []
+    for top, bottom in compute_tile_bounds(height, tile_height, overlap):
+        tile = image.crop((0, top, width, bottom))
+        data, mime_type, _ = upload_optimizer.encode_image_for_upload(
+            tile,
+            max_edge=upload_settings["max_edge"],
+            output_format=upload_settings["format"],
+            quality=upload_settings["quality"]
+        )
+        tiles.append((data, mime_type))
+
+    print(f"✂️ 长图切片: {width}x{height} → {len(tiles)} 片（切片高度 {tile_height}，重叠 {overlap}）")
+    return tiles
+
+
+def merge_tile_results(tile_results: List[List[Dict]]) -> List[Dict]:
+    """
+    按从上到下的顺序合并切片结果，去掉重叠区域的重复文本块
+
+    Args:
+        tile_results: 每个切片的翻译结果列表
+
+    Returns:
+        合并后的结果列表
+    """
+    merged = []
+    previous_tail = []
+
+    for results in tile_results:
+        results = list(results or [])
+        kept = []
+
+        for index, item in enumerate(results):
+            duplicate_of = None
+            if index < DEDUP_WINDOW:
+                for candidate in previous_tail:
+                    if _is_same_block(candidate, item):
+                        duplicate_of = candidate
+                        break
+
+            if duplicate_of is None:
+                kept.append(item)
+            elif (duplicate_of in merged and len(_normalize(item.get('original_text', '')))
+                  > len(_normalize(duplicate_of.get('original_text', '')))):
+                # 被切断的气泡在下一片中更完整，用更完整的版本替换
+                merged[merged.index(duplicate_of)] = item
+
+        merged.extend(kept)
+        previous_tail = merged[-DEDUP_WINDOW:] if results else previous_tail
+
+    return merged
+
+
+def _normalize(text: str) -> str:
+    """去掉空白和标点并转为小写，用于比较文本"""
+    return re.sub(r'[\W_]+', '', str(text)).lower()
+
+
+def _is_same_block(a: Dict, b: Dict) -> bool:
+    """判断两个文本块是否为同一气泡（完全相同、包含关系或高度相似）"""
+    text_a = _normalize(a.get('original_text', ''))
+    text_b = _normalize(b.get('original_text', ''))
+    if not text_a or not text_b:
+        return False
+    if text_a == text_b:
+        return True
+    shorter, longer = sorted((text_a, text_b), key=len)
+    if len(shorter) >= 4 and shorter in longer:
+        return True
+    return SequenceMatcher(None, text_a, text_b).ratio() >= DEDUP_SIMILARITY
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+视口分块渲染模块
+把缩放后的图片划分为固定大小的图块，只重采样画布可见区域（加一圈边距）内的图块，
+放大时内存占用只与画布大小有关，而不是与 图片尺寸 × 缩放比例² 成正比；
+缩小时从后台预先生成的多级缩略图（1/2、1/4、1/8…）中选最接近的较大一级重采样
+"""
+
+import math
+import threading
+from typing import List, Tuple
+
+from PIL import Image
+
+# 图块边长（缩放后像素）
+TILE_SIZE = 512
+# 可见区域外额外渲染的边距（缩放后像素），拖动时邻近图块已经就绪
+VIEWPORT_MARGIN = 256
+# 多级缩略图最小一级的长边（像素）
+PYRAMID_MIN_EDGE = 256
+
+
+def scaled_size(image_size: Tuple[int, int], scale: float) -> Tuple[int, int]:
+    """缩放后的图片尺寸（至少1像素）"""
+    width, height = image_size
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def fit_scale(image_size: Tuple[int, int], canvas_size: Tuple[int, int], padding: int = 20,
+              min_scale: float = 0.1) -> float:
+    """
+    适应画布的缩放比例（四周留边距，不超过原始大小）
+
+    Args:
+        image_size: 图片尺寸
+        canvas_size: 画布尺寸
+        padding: 留白像素
+        min_scale: 最小缩放比例
+
+    Returns:
+        缩放比例
+    """
+    image_width, image_height = image_size
+    canvas_width, canvas_height = canvas_size
+    if canvas_width <= 1 or canvas_height <= 1 or image_width <= 0 or image_height <= 0:
+        return 1.0
+    scale = min((canvas_width - padding) / image_width, (canvas_height - padding) / image_height, 1.0)
+    return max(scale, min_scale)
+
+
+def split_into_tiles(image: Image.Image, tile_size: int = TILE_SIZE):
+    """
+    把已缩放的整图切成图块
+
+    Returns:
+        [((列号, 行号), 图块图片), ...]
+    """
+    width, height = image.size
+    tiles = []
+    for col, row in visible_tiles(width, height, (0, 0, width, height), 0, tile_size):
+        tiles.append(((col, row), image.crop(tile_box(col, row, width, height, tile_size))))
+    return tiles
+
+
+def visible_tiles(scaled_width: int, scaled_height: int, view_box: Tuple[float, float, float, float],
+                  margin: int = VIEWPORT_MARGIN, tile_size: int = TILE_SIZE) -> List[Tuple[int, int]]:
+    """
+    计算与可见区域（含边距）相交的图块
+
+    Args:
+        scaled_width: 缩放后图片宽度
+        scaled_height: 缩放后图片高度
+        view_box: 可见区域在缩放后图片坐标系中的范围 (x0, y0, x1, y1)
+        margin: 额外边距
+        tile_size: 图块边长
+
+    Returns:
+        [(列号, 行号), ...]，按行优先排列
+    """
+    x0, y0, x1, y1 = view_box
+    x0 = max(0, x0 - margin)
+    y0 = max(0, y0 - margin)
+    x1 = min(scaled_width, x1 + margin)
+    y1 = min(scaled_height, y1 + margin)
+    if x1 <= x0 or y1 <= y0:
+        return []
+
+    first_col, last_col = int(x0 // tile_size), int(math.ceil(x1 / tile_size)) - 1
+    first_row, last_row = int(y0 // tile_size), int(math.ceil(y1 / tile_size)) - 1
+    return [(col, row) for row in range(first_row, last_row + 1) for col in range(first_col, last_col + 1)]
+
+
+def tile_box(col: int, row: int, scaled_width: int, scaled_height: int,
+             tile_size: int = TILE_SIZE) -> Tuple[int, int, int, int]:
+    """图块在缩放后图片中的范围 (x0, y0, x1, y1)，边缘图块会被裁短"""
+    x0 = col * tile_size
+    y0 = row * tile_size
+    return x0, y0, min(x0 + tile_size, scaled_width), min(y0 + tile_size, scaled_height)
+
+
+def fast_resample(effective_scale: float):
+    """
+    滚轮缩放过程中使用的快速重采样方法
+
+    Args:
+        effective_scale: 相对重采样来源（缩略图某一级）的缩放比例
+
+    Returns:
+        放大时用NEAREST，缩小时用BILINEAR（来源已是最接近的一级，缩小不超过2倍）
+    """
+    return Image.Resampling.NEAREST if effective_scale >= 1.0 else Image.Resampling.BILINEAR
+
+
+def render_tile(source: Image.Image, scale: float, box: Tuple[int, int, int, int],
+                resample=Image.Resampling.LANCZOS) -> Image.Image:
+    """
+    只重采样一个图块
+
+    Args:
+        source: 原图
+        scale: 缩放比例
+        box: 图块在缩放后图片中的范围
+        resample: 重采样方法
+
+    Returns:
+        图块图片（尺寸为box的宽高）
+    """
+    x0, y0, x1, y1 = box
+    if scale == 1.0:
+        return source.crop(box)
+
+    width, height = source.size
+    source_box = (x0 / scale, y0 / scale, min(width, x1 / scale), min(height, y1 / scale))
+    # resize的box参数只读取该区域（滤波核仍可引用区域外的像素，相邻图块之间没有接缝）
+    return source.resize((x1 - x0, y1 - y0), resample, box=source_box)
+
+
+class MipmapPyramid:
+    """
+    多级缩略图：以已解码的图片为第0级，之后每级边长减半，由后台线程逐级生成
+
+    第0级可以是原图，也可以是按适应窗口大小缩小解码的JPEG（draft模式），
+    放大到超过其分辨率时再用add_full_resolution补上原图
+    """
+
+    def __init__(self, image: Image.Image, min_edge: int = PYRAMID_MIN_EDGE,
+                 full_size: Tuple[int, int] = None):
+        self.min_edge = min_edge
+        self.full_width = (full_size or image.size)[0]
+        # [(相对原图的缩放比例, 图片), ...]，比例从大到小
+        self._levels = [(image.width / self.full_width, image)]
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._cancelled = False
+
+    @property
+    def levels(self) -> List[Tuple[float, Image.Image]]:
+        with self._lock:
+            return list(self._levels)
+
+    @property
+    def base_scale(self) -> float:
+        """已解码的最高分辨率相对原图的缩放比例（1.0表示已有原图）"""
+        with self._lock:
+            return self._levels[0][0]
+
+    @property
+    def complete(self) -> bool:
+        """是否已生成到最小一级"""
+        with self._lock:
+            return max(self._levels[-1][1].size) <= self.min_edge
+
+    def build(self):
+        """逐级生成缩略图（在工作线程中调用），每完成一级立即可用；被取消后再次调用会从上次停下的一级继续"""
+        self._cancelled = False
+        with self._build_lock:
+            current = self._levels[-1][1]
+            while max(current.size) > self.min_edge and not self._cancelled:
+                # reduce按2×2像素块取平均，比LANCZOS快得多，适合生成缩略图
+                current = current.reduce(2)
+                with self._lock:
+                    self._levels.append((current.width / self.full_width, current))
+
+    def add_full_resolution(self, image: Image.Image):
+        """第0级是缩小解码的图片时，补上原图作为新的第0级"""
+        with self._lock:
+            if self._levels[0][0] < 1.0:
+                self._levels.insert(0, (1.0, image))
+
+    def cancel(self):
+        """切换图片后停止生成"""
+        self._cancelled = True
+
+    def source_for_scale(self, scale: float) -> Tuple[Image.Image, float]:
+        """
+        选择重采样的来源：不小于目标缩放比例的最小一级
+
+        Args:
+            scale: 相对原图的目标缩放比例
+
+        Returns:
+            (来源图片, 来源相对原图的缩放比例)
+        """
+        with self._lock:
+            for level_scale, image in reversed(self._levels):
+                if level_scale >= scale:
+                    return image, level_scale
+            level_scale, image = self._levels[0]
+            return image, level_scale
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+翻译任务调度模块
+按优先级调度翻译任务：交互式翻译（正在阅读的页）排在排队中的批量任务之前，
+并保留一个只处理交互式任务的工作线程，批量翻译占满并发时当前页也不必等待在途请求完成；
+已在排队或翻译中的页面再次请求时挂到原任务上（必要时提前），不会被拒绝或重复翻译；
+每个任务带一个取消令牌，执行中的任务也可以取消（由work配合令牌尽快停止）
+"""
+
+import heapq
+import itertools
+import threading
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple
+
+import cancellation
+
+# 优先级：数值越小越先执行
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_CANCELLED = "cancelled"
+
+
+class JobCancelledError(cancellation.CancelledError):
+    """任务在开始执行前被取消"""
+
+
+class ScheduledJob:
+    """
+    一个调度任务
+
+    Attributes:
+        keys: 任务覆盖的页面（通常为图片路径；多页合并时一个任务覆盖多页）
+        priority: 当前优先级
+        tag: 调用方的标记（例如所属的批量翻译），用于批量取消
+        cancel_token: 取消令牌（work应使用同一个令牌）
+        status: 任务状态
+        result: work的返回值（完成后）
+        error: work抛出的异常；开始前被取消时为JobCancelledError，执行中被取消时通常为CancelledError
+    """
+
+    def __init__(self, keys: Iterable[Hashable], work: Callable[[], Any], priority: int, tag: Any = None,
+                 cancel_token: cancellation.CancelToken = None):
+        self.keys = tuple(keys)
+        self.work = work
+        self.priority = priority
+        self.tag = tag
+        self.cancel_token = cancel_token or cancellation.CancelToken()
+        self.status = JOB_QUEUED
+        self.result = None
+        self.error = None
+        self.callbacks = []  # 完成或取消时在工作线程中调用 callback(job)
+        self.sequence = 0    # 入队序号，同优先级先进先出；提前时重新入队，旧的堆条目作废
+
+
+class PriorityScheduler:
+    """
+    优先级任务调度器
+
+    Args:
+        concurrency: 普通工作线程数（同时执行的任务数）
+        express_workers: 只执行交互式任务的额外工作线程数
+    """
+
+    def __init__(self, concurrency: int, express_workers: int = 1):
+        self._condition = threading.Condition()
+        self._heap = []      # [(优先级, 序号, 任务)]
+        self._counter = itertools.count()
+        self._active = {}    # {页面: 排队中或执行中的任务}
+        self._concurrency = max(1, int(concurrency))
+        self._workers = 0
+        self._express_limit = max(0, int(express_workers))
+        self._express_workers = 0
+        self._closed = False
+
+    def set_concurrency(self, concurrency: int):
+        """调整普通工作线程数（减少时多出的线程执行完当前任务后退出）"""
+        with self._condition:
+            self._concurrency = max(1, int(concurrency))
+            self._ensure_workers()
+            self._condition.notify_all()
+
+    def find(self, key: Hashable) -> Optional[ScheduledJob]:
+        """页面所在的排队中或执行中的任务，没有时返回None"""
+        with self._condition:
+            return self._active.get(key)
+
+    def active_count(self, predicate: Callable[[ScheduledJob], bool] = None) -> int:
+        """排队中和执行中（且满足条件）的任务数"""
+        with self._condition:
+            jobs = {id(job): job for job in self._active.values()}.values()
+            return sum(1 for job in jobs if predicate is None or predicate(job))
+
+    def submit(self, keys: Iterable[Hashable], work: Callable[[], Any], priority: int = PRIORITY_BATCH,
+               on_done: Callable[[ScheduledJob], None] = None, tag: Any = None,
+               cancel_token: cancellation.CancelToken = None) -> ScheduledJob:
+        """
+        提交新任务
+
+        Args:
+            keys: 任务覆盖的页面
+            work: 在工作线程中执行的函数
+            priority: 优先级
+            on_done: 完成或取消时在工作线程中调用的回调
+            tag: 调用方的标记
+            cancel_token: work检查的取消令牌，cancel取消执行中的任务时触发
+
+        Raises:
+            ValueError: 其中某页已在排队或翻译中（应先用find/request挂到已有任务上）
+        """
+        job = ScheduledJob(keys, work, priority, tag, cancel_token)
+        if on_done is not None:
+            job.callbacks.append(on_done)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("调度器已关闭")
+            busy = [key for key in job.keys if key in self._active]
+            if busy:
+                raise ValueError(f"页面已在翻译队列中: {busy[0]}")
+            for key in job.keys:
+                self._active[key] = job
+            self._push(job)
+            self._ensure_workers()
+            self._condition.notify_all()
+        return job
+
+    def request(self, key: Hashable, work: Callable[[], Any], priority: int = PRIORITY_INTERACTIVE,
+                on_done: Callable[[ScheduledJob], None] = None, tag: Any = None,
+                cancel_token: cancellation.CancelToken = None) -> Tuple[ScheduledJob, bool]:
+        """
+        请求翻译一页：已在排队或翻译中时挂到原任务上（work和cancel_token不使用），排队中且优先级更高时提前
+
+        Returns:
+            (任务, 是否挂到了已有任务上)
+        """
+        with self._condition:
+            job = self._active.get(key)
+            if job is None:
+                return self.submit([key], work, priority, on_done, tag, cancel_token), False
+
+            if on_done is not None:
+                job.callbacks.append(on_done)
+            if job.status == JOB_QUEUED and priority < job.priority:
+                job.priority = priority
+                self._push(job)
+                self._ensure_workers()
+                self._condition.notify_all()
+            return job, True
+
+    def cancel_queued(self, predicate: Callable[[ScheduledJob], bool]) -> List[ScheduledJob]:
+        """
+        取消尚未开始执行且满足条件的任务（执行中的任务不受影响），回调收到JobCancelledError
+
+        Returns:
+            被取消的任务
+        """
+        with self._condition:
+            cancelled = []
+            for job in {id(job): job for job in self._active.values()}.values():
+                if job.status == JOB_QUEUED and predicate(job):
+                    job.status = JOB_CANCELLED
+                    job.error = JobCancelledError("任务已取消")
+                    self._release(job)
+                    cancelled.append(job)
+            callbacks = [(job, list(job.callbacks)) for job in cancelled]
+
+        for job, job_callbacks in callbacks:
+            self._run_callbacks(job, job_callbacks)
+        return cancelled
+
+    def cancel(self, predicate: Callable[[ScheduledJob], bool]) -> List[ScheduledJob]:
+        """
+        取消满足条件的任务：排队中的直接取消（同cancel_queued），执行中的触发其取消令牌，
+        由work尽快停止，之后照常以work抛出的异常完成
+
+        Returns:
+            被取消的任务（包括执行中的）
+        """
+        cancelled = self.cancel_queued(predicate)
+        with self._condition:
+            running = [job for job in {id(job): job for job in self._active.values()}.values()
+                       if job.status == JOB_RUNNING and predicate(job)]
+        for job in running:
+            job.cancel_token.cancel()
+        return cancelled + running
+
+    def shutdown(self):
+        """停止接受新任务，工作线程执行完当前任务后退出（排队中的任务不再执行）"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _push(self, job: ScheduledJob):
+        job.sequence = next(self._counter)
+        heapq.heappush(self._heap, (job.priority, job.sequence, job))
+
+    def _release(self, job: ScheduledJob):
+        for key in job.keys:
+            if self._active.get(key) is job:
+                del self._active[key]
+
+    def _ensure_workers(self):
+        """按需启动工作线程（调用时已持有锁）"""
+        while self._workers < self._concurrency and self._workers < len(self._heap):
+            self._workers += 1
+            threading.Thread(target=self._worker_loop, args=(False,), name="translate-worker",
+                             daemon=True).start()
+        if (self._express_workers < self._express_limit and self._heap
+                and self._heap[0][0] <= PRIORITY_INTERACTIVE):
+            self._express_workers += 1
+            threading.Thread(target=self._worker_loop, args=(True,), name="translate-express",
+                             daemon=True).start()
+
+    def _pop(self, express: bool) -> Optional[ScheduledJob]:
+        """取出优先级最高的排队任务（调用时已持有锁）；交互式专用线程只取交互式任务"""
+        while self._heap:
+            priority, sequence, job = self._heap[0]
+            if job.status != JOB_QUEUED or sequence != job.sequence:
+                heapq.heappop(self._heap)  # 已取消或已提前的旧条目
+                continue
+            if express and priority > PRIORITY_INTERACTIVE:
+                return None
+            heapq.heappop(self._heap)
+            return job
+        return None
+
+    def _worker_loop(self, express: bool):
+        while True:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        self._leave(express)
+                        return
+                    if not express and self._workers > self._concurrency:
+                        self._leave(express)
+                        return
+                    job = self._pop(express)
+                    if job is not None:
+                        break
+                    self._condition.wait()
+                job.status = JOB_RUNNING
+
+            try:
+                job.result = job.work()
+            except Exception as e:
+                job.error = e
+
+            with self._condition:
+                job.status = JOB_DONE
+                self._release(job)
+                callbacks = list(job.callbacks)
+            self._run_callbacks(job, callbacks)
+
+    def _leave(self, express: bool):
+        if express:
+            self._express_workers -= 1
+        else:
+            self._workers -= 1
+
+    @staticmethod
+    def _run_callbacks(job: ScheduledJob, callbacks):
+        for callback in callbacks:
+            try:
+                callback(job)
+            except Exception as e:
+                print(f"⚠️ 翻译任务回调出错: {e}")
@@ -17,14 +17,15 @@ import config
 class TextDetectionApp:
     """文本检测应用主类"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, use_cache: bool = None):
         """
         初始化应用
         
         Args:
             api_key: OpenRouter API密钥
+            use_cache: 是否使用磁盘翻译缓存，不提供时按高级设置决定
         """
-        self.ai_client = AIClient(api_key)
+        self.ai_client = AIClient(api_key, use_cache)
         self.image_processor = ImageProcessor()
     
     def validate_image_file(self, image_path: str) -> bool:
@@ -172,6 +173,7 @@ def main():
     parser.add_argument('-k', '--api-key', help='OpenRouter API密钥')
     parser.add_argument('--save-json', action='store_true', help='保存检测结果为JSON文件')
     parser.add_argument('--no-summary', action='store_true', help='不显示检测结果摘要')
+    parser.add_argument('--no-cache', action='store_true', help='跳过翻译缓存，强制重新调用API')
     
     args = parser.parse_args()
     
@@ -182,7 +184,7 @@ def main():
         sys.exit(1)
     
     # 创建应用实例
-    app = TextDetectionApp(api_key)
+    app = TextDetectionApp(api_key, use_cache=False if args.no_cache else None)
     
     # 处理图片
     result = app.process_single_image(
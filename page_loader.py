@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""
+页面加载与预读模块
+只用PIL解码一次：JPEG按适应窗口的大小直接以1/2、1/4、1/8的比例解码（draft模式），
+放大到超过该分辨率时才读取原图；
+在后台线程中提前解码相邻的若干页，生成多级缩略图和适应窗口大小的预览，
+翻页时直接使用已解码的结果，不在界面线程中解码；
+压缩包内的图片按需读取成员字节后解码
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+import archive_reader
+import image_viewport
+
+# EXIF方向标签；取值5～8时图片需要旋转90度，宽高互换
+EXIF_ORIENTATION = 0x0112
+
+
+class LoadedPage:
+    """已解码的页面"""
+
+    def __init__(self, path: str, image: Image.Image, full_size: Tuple[int, int]):
+        self.path = path
+        self.size = full_size         # 原图尺寸（按EXIF方向旋转后）
+        self.pyramid = image_viewport.MipmapPyramid(image, full_size=full_size)
+        self.fit_scale = None         # 预先渲染的适应窗口比例
+        self.fit_image = None         # 按fit_scale缩放后的整页预览
+        self._full_lock = threading.Lock()
+        self._full_thread = None
+
+    @property
+    def image(self) -> Image.Image:
+        """目前已解码的最高分辨率图片"""
+        return self.pyramid.levels[0][1]
+
+    def needs_full_resolution(self, scale: float) -> bool:
+        """按该比例显示时，已解码的图片分辨率是否不够"""
+        scaled_width, scaled_height = image_viewport.scaled_size(self.size, scale)
+        image = self.image
+        return scaled_width > image.width or scaled_height > image.height
+
+    def load_full_resolution(self):
+        """读取原图（已读取时直接返回）"""
+        with self._full_lock:
+            if self.pyramid.base_scale >= 1.0:
+                return
+            image, _ = _decode(self.path)
+            self.pyramid.add_full_resolution(image)
+
+    def load_full_resolution_in_background(self):
+        """在后台线程中读取原图，重复调用不会重复读取"""
+        if self.pyramid.base_scale < 1.0 and self._full_thread is None:
+            self._full_thread = threading.Thread(target=self.load_full_resolution, daemon=True)
+            self._full_thread.start()
+
+    def render_fit_preview(self, canvas_size: Tuple[int, int]):
+        """按画布大小预先渲染适应窗口的预览（从多级缩略图重采样）"""
+        scale = image_viewport.fit_scale(self.size, canvas_size)
+        scaled_width, scaled_height = image_viewport.scaled_size(self.size, scale)
+        source, level_scale = self.pyramid.source_for_scale(scale)
+        self.fit_image = image_viewport.render_tile(source, scale / level_scale, (0, 0, scaled_width, scaled_height))
+        self.fit_scale = scale
+
+
+def _decode(path: str, canvas_size: Tuple[int, int] = None) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    解码为RGB图片并按EXIF方向旋转
+
+    Args:
+        path: 图片路径
+        canvas_size: 画布大小；指定时JPEG只解码到不小于适应窗口所需的尺寸
+
+    Returns:
+        (图片, 原图尺寸)
+
+    Raises:
+        ValueError: 无法读取图片
+    """
+    try:
+        image = Image.open(archive_reader.open_image_source(path))
+        orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+        transposed = orientation in (5, 6, 7, 8)
+        width, height = image.size
+        full_size = (height, width) if transposed else (width, height)
+
+        if canvas_size:
+            scale = image_viewport.fit_scale(full_size, canvas_size)
+            draft_width, draft_height = image_viewport.scaled_size(full_size, scale)
+            # 只对JPEG生效：解码时直接缩小，其他格式忽略
+            image.draft("RGB", (draft_height, draft_width) if transposed else (draft_width, draft_height))
+
+        image.load()
+        if orientation != 1:
+            ImageOps.exif_transpose(image, in_place=True)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+    except Exception as e:
+        raise ValueError("无法读取图片文件") from e
+    return image, full_size
+
+
+def decode_page(path: str, canvas_size: Tuple[int, int] = None) -> LoadedPage:
+    """
+    解码图片文件
+
+    Args:
+        path: 图片路径
+        canvas_size: 画布大小；指定时JPEG按适应窗口的大小缩小解码，原图延迟到放大时读取
+
+    Raises:
+        ValueError: 无法读取图片
+    """
+    image, full_size = _decode(path, canvas_size)
+    return LoadedPage(path, image, full_size)
+
+
+class PagePrefetcher:
+    """相邻页预读：单个后台线程按优先级解码，结果保存在容量有限的页面缓存中"""
+
+    def __init__(self, capacity: int = 5):
+        self.capacity = max(1, capacity)
+        self._pages = OrderedDict()   # {path: LoadedPage}，从旧到新
+        self._wanted = []             # 按优先级排列的待预读路径
+        self._canvas_size = None
+        self._loading = None          # 正在解码的路径
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def get(self, path: str, wait: bool = True) -> Optional[LoadedPage]:
+        """
+        取出已预读的页面
+
+        Args:
+            path: 图片路径
+            wait: 该页正在解码时是否等待其完成
+
+        Returns:
+            已解码的页面，未预读时返回None
+        """
+        with self._condition:
+            while wait and self._loading == path:
+                self._condition.wait()
+            page = self._pages.get(path)
+            if page is not None:
+                self._pages.move_to_end(path)
+            return page
+
+    def put(self, page: LoadedPage):
+        """放入页面（如界面线程同步解码的当前页），以便往回翻页时复用"""
+        with self._condition:
+            self._pages[page.path] = page
+            self._pages.move_to_end(page.path)
+            self._trim()
+
+    def request(self, paths: Iterable[str], canvas_size: Tuple[int, int] = None):
+        """
+        设置需要预读的页面（按优先级排列），替换之前的请求
+
+        Args:
+            paths: 图片路径，越靠前越先解码
+            canvas_size: 画布大小，用于预先渲染适应窗口的预览
+        """
+        with self._condition:
+            self._wanted = [path for path in paths if path not in self._pages]
+            self._canvas_size = canvas_size
+            self._condition.notify_all()
+            # 预读线程在锁内把 _thread 置为None后才退出，因此不为None时它一定会处理新的请求
+            if self._wanted and self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def set_capacity(self, capacity: int):
+        with self._condition:
+            self.capacity = max(1, capacity)
+            self._trim()
+
+    def clear(self):
+        """清空缓存和待预读列表"""
+        with self._condition:
+            self._pages.clear()
+            self._wanted = []
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._wanted:
+                    self._thread = None
+                    return
+                path = self._wanted.pop(0)
+                if path in self._pages:
+                    continue
+                self._loading = path
+                canvas_size = self._canvas_size
+
+            page = None
+            try:
+                page = decode_page(path, canvas_size)
+                page.pyramid.build()
+                if canvas_size:
+                    page.render_fit_preview(canvas_size)
+            except Exception as e:
+                print(f"⚠️ 预读失败 {path}: {e}")
+
+            with self._condition:
+                self._loading = None
+                if page is not None:
+                    self._pages[path] = page
+                    self._trim(keep=path)
+                self._condition.notify_all()
+
+    def _trim(self, keep: str = None):
+        """超出容量时淘汰最久未使用的页面"""
+        for path in list(self._pages):
+            if len(self._pages) <= self.capacity:
+                break
+            if path != keep:
+                del self._pages[path]
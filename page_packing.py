@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+多页合并模块
+批量翻译时把若干张小图（如四格漫画）放进同一条多模态消息，
+要求模型按页码分别返回结果，再拆分回每一页，减少请求次数和重复的提示词开销
+"""
+
+import json
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+# 合并请求的最大输出token数（多页结果比单页长）
+PACKED_MAX_TOKENS = 8192
+
+
+def group_pages(items: Sequence, is_small: Callable[[object], bool], max_pages: int) -> List[List]:
+    """
+    把相邻的小图分组，每组最多max_pages张；其余图片单独成组
+
+    Args:
+        items: 按页序排列的图片（通常为路径）
+        is_small: 判断图片是否可以合并的函数
+        max_pages: 每组最多页数
+
+    Returns:
+        分组列表，保持原有页序
+    """
+    groups = []
+    current = []
+    for item in items:
+        if max_pages > 1 and is_small(item):
+            current.append(item)
+            if len(current) >= max_pages:
+                groups.append(current)
+                current = []
+            continue
+
+        if current:
+            groups.append(current)
+            current = []
+        groups.append([item])
+
+    if current:
+        groups.append(current)
+    return groups
+
+
+def build_packed_prompt(prompt: str, page_count: int) -> str:
+    """
+    在单页提示词后追加多页说明，要求按页码返回结果
+
+    Args:
+        prompt: 单页翻译提示词
+        page_count: 本次请求包含的页数
+
+    Returns:
+        多页提示词
+    """
+    example_pages = ",\n".join(f'  "{page}": [ ... ]' for page in range(1, min(page_count, 2) + 1))
+    return f"""{prompt}
+
+【多页模式】本次请求包含 {page_count} 张图片，依次为第1页到第{page_count}页，每张图片前都标注了页码。
+请分别识别并翻译每一页，以下要求覆盖上面的返回格式：
+- 返回一个JSON对象，键为页码字符串（"1"到"{page_count}"），值为该页的文本块数组，数组元素格式与上面相同
+- 每一页都必须出现在结果中，没有文本的页返回空数组 []
+- 不要把不同页的文本混在一起
+
+```json
+{{
+{example_pages}
+}}
+```"""
+
+
+def page_label(page: int) -> str:
+    """放在每张图片前面的页码标注"""
+    return f"第{page}页："
+
+
+def split_packed_response(content: str, page_count: int) -> Optional[Dict[int, List[Dict]]]:
+    """
+    把多页响应拆分回每一页
+
+    Args:
+        content: 模型返回的文本
+        page_count: 请求中的页数
+
+    Returns:
+        {页码(从1开始): 文本块列表}；只包含响应中出现的页，无法解析时返回None
+    """
+    pages = _split_raw(content, page_count)
+    if pages is None:
+        return None
+    return {page: _normalize_items(items) for page, items in pages.items()}
+
+
+def split_packed_text(content: str, page_count: int) -> Optional[Dict[int, str]]:
+    """
+    把多页响应拆分回每一页的JSON数组文本，交给单页的解析阶段解析（可替换的解析器也适用于多页请求）
+
+    Args:
+        content: 模型返回的文本
+        page_count: 请求中的页数
+
+    Returns:
+        {页码(从1开始): 该页文本块数组的JSON文本}；只包含响应中出现的页，无法解析时返回None
+    """
+    pages = _split_raw(content, page_count)
+    if pages is None:
+        return None
+    return {page: json.dumps(items, ensure_ascii=False) for page, items in pages.items()}
+
+
+def _split_raw(content: str, page_count: int) -> Optional[Dict[int, List]]:
+    """按页码拆分响应中的原始文本块（未过滤字段），无法解析时返回None"""
+    data = _load_json(content)
+    if data is None:
+        return None
+
+    pages = {}
+    if isinstance(data, dict):
+        for key, items in data.items():
+            page = _page_number(key)
+            if page is not None and 1 <= page <= page_count and isinstance(items, list):
+                pages[page] = items
+    elif isinstance(data, list):
+        # 兼容模型返回带page字段的扁平数组
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            page = _page_number(item.get('page'))
+            if page is not None and 1 <= page <= page_count:
+                pages.setdefault(page, []).append(item)
+    else:
+        return None
+
+    return pages
+
+
+def _load_json(content: str):
+    """从响应中提取JSON（优先代码块，其次最外层的对象或数组）"""
+    candidates = []
+    block_match = re.search(r'```(?:json)?\s*(.*?)\s*```', content, re.DOTALL)
+    if block_match:
+        candidates.append(block_match.group(1))
+
+    for open_char, close_char in (('{', '}'), ('[', ']')):
+        start = content.find(open_char)
+        end = content.rfind(close_char)
+        if start != -1 and end > start:
+            candidates.append(content[start:end + 1])
+
+    for candidate in candidates:
+        # 去掉对象和数组末尾多余的逗号
+        candidate = re.sub(r',\s*([}\]])', r'\1', candidate.strip())
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def _page_number(value) -> Optional[int]:
+    """把"1"、1、"第1页"、"page 1"等页码写法转为整数"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    match = re.search(r'\d+', str(value or ''))
+    return int(match.group(0)) if match else None
+
+
+def _normalize_items(items: List) -> List[Dict]:
+    """只保留包含原文和译文的文本块，并统一字段"""
+    normalized = []
+    for item in items:
+        if isinstance(item, dict) and 'original_text' in item and 'translation' in item:
+            normalized.append({
+                'type': item.get('type', '未分类'),
+                'original_text': item.get('original_text', ''),
+                'translation': item.get('translation', '')
+            })
+    return normalized
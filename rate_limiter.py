@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+服务商限流模块
+每个服务商一个令牌桶（每分钟请求数、每分钟token数），
+遇到429/5xx时按Retry-After或指数退避加随机抖动重试，
+连续失败时熔断器打开，暂停该服务商的所有请求而不是让整个批量翻译失败
+"""
+
+import email.utils
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import requests
+
+import cancellation
+
+# 视为暂时性错误、可以重试的HTTP状态码（529为Anthropic的过载状态）
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+
+# 默认重试与熔断设置
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 1.0       # 首次退避秒数
+DEFAULT_BACKOFF_MAX = 60.0       # 单次退避上限（秒）
+DEFAULT_BREAKER_THRESHOLD = 5    # 连续失败多少次后熔断
+DEFAULT_BREAKER_COOLDOWN = 30.0  # 熔断后暂停秒数
+
+# 单张图片的token估算上限（大图会被服务商缩放到约1.15MP）
+MAX_IMAGE_TOKENS = 1600
+
+
+class RetryableError(Exception):
+    """重试次数用尽后仍失败的暂时性错误（限流、服务端错误、网络中断）"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def _sleep_or_cancel(sleep: Callable[[float], None], seconds: float,
+                     cancel: Optional[cancellation.CancelToken]):
+    """等待seconds秒；有取消令牌时在令牌上等待，取消后立即抛出CancelledError"""
+    if cancel is None:
+        sleep(seconds)
+    elif cancel.wait(seconds):
+        raise cancellation.CancelledError()
+
+
+class TokenBucket:
+    """令牌桶：按每分钟速率补充令牌，容量为一分钟的配额"""
+
+    def __init__(self, rate_per_minute: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = float(rate_per_minute)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate_per_minute <= 0
+
+    def acquire(self, amount: float = 1, cancel: Optional[cancellation.CancelToken] = None) -> float:
+        """
+        取出令牌，不足时阻塞等待
+
+        Args:
+            amount: 需要的令牌数（超过容量时按容量计算，避免永远等不到）
+            cancel: 可选的取消令牌，等待中取消时抛出CancelledError
+
+        Returns:
+            等待的秒数
+        """
+        cancellation.check(cancel)
+        if self.unlimited or amount <= 0:
+            return 0.0
+
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                wait = (amount - self._tokens) * 60.0 / self.rate_per_minute
+            _sleep_or_cancel(self._sleep, wait, cancel)
+            waited += wait
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_minute / 60.0)
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，冷却期内所有请求暂停等待"""
+
+    def __init__(self, failure_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+                 cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self._paused_until = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._clock() < self._paused_until
+
+    def wait_until_available(self, cancel: Optional[cancellation.CancelToken] = None) -> float:
+        """熔断器打开时阻塞到冷却结束，返回等待的秒数；等待中取消时抛出CancelledError"""
+        waited = 0.0
+        while True:
+            cancellation.check(cancel)
+            with self._lock:
+                remaining = self._paused_until - self._clock()
+            if remaining <= 0:
+                return waited
+            _sleep_or_cancel(self._sleep, remaining, cancel)
+            waited += remaining
+
+    def pause(self, seconds: float):
+        """暂停所有请求至少seconds秒（如服务商返回了Retry-After）"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> bool:
+        """记录一次失败，返回熔断器是否因此打开"""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.consecutive_failures < self.failure_threshold:
+                return False
+            # 冷却结束后放行的请求再次失败会立即重新熔断
+            self.consecutive_failures = self.failure_threshold - 1
+            self._paused_until = max(self._paused_until, self._clock() + self.cooldown)
+            return True
+
+
+class ProviderLimiter:
+    """单个服务商的限流、重试和熔断"""
+
+    def __init__(self, provider: str, settings: Dict, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep, rng: Optional[random.Random] = None):
+        self.provider = provider
+        self.settings = dict(settings)
+        self.max_retries = max(0, int(settings.get("max_retries", DEFAULT_MAX_RETRIES)))
+        self.backoff_base = float(settings.get("backoff_base", DEFAULT_BACKOFF_BASE))
+        self.backoff_max = float(settings.get("backoff_max", DEFAULT_BACKOFF_MAX))
+        self.request_bucket = TokenBucket(settings.get("requests_per_minute", 0), clock, sleep)
+        self.token_bucket = TokenBucket(settings.get("tokens_per_minute", 0), clock, sleep)
+        self.breaker = CircuitBreaker(settings.get("breaker_threshold", DEFAULT_BREAKER_THRESHOLD),
+                                      settings.get("breaker_cooldown", DEFAULT_BREAKER_COOLDOWN),
+                                      clock, sleep)
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+
+    def call(self, send: Callable[[], requests.Response], estimated_tokens: int = 0,
+             cancel: Optional[cancellation.CancelToken] = None) -> requests.Response:
+        """
+        在限流和熔断保护下发送请求，暂时性错误自动重试
+
+        Args:
+            send: 发送一次请求并返回Response的函数
+            estimated_tokens: 本次请求预估消耗的token数
+            cancel: 可选的取消令牌，取消后不再发送或重试；熔断冷却、令牌桶限速和退避等待都会被打断
+
+        Returns:
+            非暂时性错误的响应（成功或4xx由调用方处理）
+
+        Raises:
+            RetryableError: 重试次数用尽
+            cancellation.CancelledError: 已取消
+        """
+        attempt = 0
+        while True:
+            paused = self.breaker.wait_until_available(cancel)
+            if paused:
+                print(f"⏸️ {self.provider} 熔断冷却，已暂停 {paused:.1f} 秒")
+            self.request_bucket.acquire(1, cancel)
+            self.token_bucket.acquire(estimated_tokens, cancel)
+
+            retry_after = None
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if cancel is not None and cancel.cancelled:
+                    raise cancellation.CancelledError() from e  # 取消时连接被主动关闭，不算失败
+                error = RetryableError(f"网络请求失败: {e}")
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    self.breaker.record_success()
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                error = RetryableError(f"API调用失败，状态码: {response.status_code}, 响应: {response.text[:500]}",
+                                       response.status_code, retry_after)
+                response.close()
+
+            if self.breaker.record_failure():
+                print(f"🔌 {self.provider} 连续失败，熔断 {self.breaker.cooldown:.0f} 秒")
+
+            if attempt >= self.max_retries:
+                raise error
+
+            attempt += 1
+            if retry_after is not None:
+                # 服务商明确要求等待时，该服务商的所有请求一起暂停，下一轮在熔断器处等待
+                delay = min(retry_after, self.backoff_max * 5)
+                print(f"🔁 {error}；按Retry-After暂停 {delay:.1f} 秒后第 {attempt}/{self.max_retries} 次重试")
+                self.breaker.pause(delay)
+            else:
+                delay = backoff_delay(attempt - 1, self.backoff_base, self.backoff_max, self._rng)
+                print(f"🔁 {error}；{delay:.1f} 秒后第 {attempt}/{self.max_retries} 次重试")
+                _sleep_or_cancel(self._sleep, delay, cancel)
+
+
+def backoff_delay(attempt: int, base: float, max_delay: float, rng: Optional[random.Random] = None) -> float:
+    """
+    指数退避加随机抖动（full jitter）
+
+    Args:
+        attempt: 第几次重试（从0开始）
+        base: 首次退避秒数
+        max_delay: 退避上限
+
+    Returns:
+        [0, min(max_delay, base * 2^attempt)] 内的随机秒数
+    """
+    rng = rng or random
+    ceiling = min(max_delay, base * (2 ** attempt))
+    return rng.uniform(0, ceiling)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After头（秒数或HTTP日期），无法解析时返回None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def estimate_tokens(prompt: str, image_sizes, expected_output_tokens: int = 1000) -> int:
+    """
+    粗略估算一次请求消耗的token数，用于每分钟token数限流
+
+    Args:
+        prompt: 提示词
+        image_sizes: [(宽, 高), ...]
+        expected_output_tokens: 预计输出token数
+
+    Returns:
+        估算的token数
+    """
+    image_tokens = sum(min(MAX_IMAGE_TOKENS, int(width * height / 750)) for width, height in image_sizes)
+    return len(prompt) + image_tokens + expected_output_tokens
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str, settings: Dict) -> ProviderLimiter:
+    """获取服务商共享的限流器，设置变化时重建"""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None or limiter.settings != settings:
+            limiter = ProviderLimiter(provider, settings)
+            _limiters[provider] = limiter
+        return limiter
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+阅读时预翻译模块
+阅读第i页时，以最低优先级在后台翻译之后K张未翻译的图片，翻到下一页时结果通常已经就绪；
+同时在途的预翻译任务数和每次启动累计预翻译的页数都有上限，避免意外花费；
+跳到别处时取消不在新范围内、尚未开始的预翻译任务
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Sequence
+
+import cancellation
+import job_scheduler
+
+# 预翻译的优先级低于批量翻译
+PRIORITY_READ_AHEAD = job_scheduler.PRIORITY_BATCH + 10
+
+
+def plan_read_ahead(image_list: Sequence[str], current_index: int, pages: int,
+                    is_translated: Callable[[str], bool]) -> List[str]:
+    """
+    当前页之后最近的pages张未翻译图片（按页序）
+
+    Args:
+        image_list: 图片列表
+        current_index: 当前页的位置
+        pages: 向后预翻译的页数
+        is_translated: 判断图片是否已有翻译结果的函数
+    """
+    window = []
+    for index in range(current_index + 1, len(image_list)):
+        if len(window) >= pages:
+            break
+        if not is_translated(image_list[index]):
+            window.append(image_list[index])
+    return window
+
+
+class ReadAhead:
+    """
+    预翻译控制器（与界面无关，回调在工作线程中调用）
+
+    Args:
+        scheduler: 翻译任务调度器
+        make_work: 根据图片路径和取消令牌生成翻译函数（在工作线程中执行，返回 {图片路径: 翻译结果}）
+        on_done: 预翻译任务完成或取消时的回调
+    """
+
+    def __init__(self, scheduler: job_scheduler.PriorityScheduler,
+                 make_work: Callable[[str, cancellation.CancelToken], Callable[[], Any]],
+                 on_done: Callable[[job_scheduler.ScheduledJob], None] = None):
+        self.scheduler = scheduler
+        self.make_work = make_work
+        self.on_done = on_done
+        self.enabled = False
+        self.pages = 3
+        self.max_concurrency = 1
+        self.page_limit = 50
+        self.spent = 0             # 本次启动已提交的预翻译页数
+        self._window = []          # 当前应预翻译的图片（按页序）
+        self._image_list = []      # 最近一次update_position的图片列表和当前页，设置变化时据此重新计算范围
+        self._current_index = -1
+        self._in_flight = set()    # 排队中或翻译中的预翻译图片
+        self._is_translated = lambda path: False
+        self._lock = threading.Lock()
+
+    def configure(self, settings: Dict[str, Any]):
+        """
+        应用预翻译设置（enabled, pages, max_concurrency, page_limit），立即按当前页重新计算范围：
+        开启或调大时马上开始预翻译，关闭时取消排队中的预翻译
+        """
+        with self._lock:
+            self.enabled = bool(settings["enabled"])
+            self.pages = settings["pages"]
+            self.max_concurrency = settings["max_concurrency"]
+            self.page_limit = settings["page_limit"]
+        self._replan()
+
+    def update_position(self, image_list: Sequence[str], current_index: int,
+                        is_translated: Callable[[str], bool]):
+        """当前页变化时调用：重新计算预翻译范围，取消范围外尚未开始的预翻译"""
+        with self._lock:
+            self._image_list = image_list
+            self._current_index = current_index
+            self._is_translated = is_translated
+        self._replan()
+
+    def _replan(self):
+        with self._lock:
+            pages = self.pages if self.enabled else 0
+            image_list, current_index, is_translated = self._image_list, self._current_index, self._is_translated
+        self._set_window(plan_read_ahead(image_list, current_index, pages, is_translated))
+
+    def cancel_all(self):
+        """取消所有尚未开始的预翻译（例如清空图片列表时）"""
+        self._set_window([])
+
+    def in_flight_count(self) -> int:
+        with self._lock:
+            return len(self._in_flight)
+
+    def remaining_budget(self) -> int:
+        """本次启动还能预翻译的页数"""
+        with self._lock:
+            return max(0, self.page_limit - self.spent)
+
+    def _set_window(self, window: List[str]):
+        with self._lock:
+            self._window = list(window)
+        keep = set(window)
+        # 取消回调会重新获取锁，因此在锁外取消；用户点击翻译而提前的任务不取消
+        self.scheduler.cancel_queued(lambda job: job.tag is self and job.priority == PRIORITY_READ_AHEAD
+                                     and job.keys[0] not in keep)
+        self._fill()
+
+    def _fill(self):
+        """在并发上限和花费上限内，按页序提交预翻译任务"""
+        with self._lock:
+            if not self.enabled:
+                return
+            for path in self._window:
+                if len(self._in_flight) >= self.max_concurrency or self.spent >= self.page_limit:
+                    break
+                if path in self._in_flight or self._is_translated(path) or self.scheduler.find(path) is not None:
+                    continue  # 已翻译，或已由当前页翻译/批量翻译处理
+
+                token = cancellation.CancelToken()
+                try:
+                    self.scheduler.submit([path], self.make_work(path, token), PRIORITY_READ_AHEAD,
+                                          on_done=self._job_done, tag=self, cancel_token=token)
+                except ValueError:
+                    continue  # 刚被其他请求加入队列
+                self._in_flight.add(path)
+                self.spent += 1
+                if self.spent == self.page_limit:
+                    print(f"💰 预翻译已达本次上限 {self.page_limit} 页，之后不再自动预翻译")
+
+    def _job_done(self, job: job_scheduler.ScheduledJob):
+        with self._lock:
+            self._in_flight.discard(job.keys[0])
+            if isinstance(job.error, job_scheduler.JobCancelledError):
+                self.spent -= 1  # 未发出请求，不计入花费
+        if self.on_done is not None:
+            self.on_done(job)
+        self._fill()
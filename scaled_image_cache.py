@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+缩放图片缓存模块
+按字节预算（而不是条目数）缓存缩放后的图片和图块，超出预算时淘汰最久未使用的条目；
+适应窗口的缩放比例可以固定，其图块不会被淘汰
+"""
+
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from PIL import Image
+
+# 默认内存预算 256MB
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def image_nbytes(image: Image.Image) -> int:
+    """估算图片解码后占用的内存字节数"""
+    bytes_per_pixel = {"1": 1, "L": 1, "P": 1, "LA": 2, "RGB": 3, "RGBA": 4, "CMYK": 4, "I": 4, "F": 4}
+    return image.width * image.height * bytes_per_pixel.get(image.mode, 4)
+
+
+class ScaledImageCache:
+    """
+    字节预算的LRU缓存
+
+    键为以缩放比例开头的元组，如 (scale, col, row)；
+    缩放比例等于pinned_scale的条目不会被淘汰
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.pinned_scale = None
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # {key: (image, nbytes)}，从旧到新
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Tuple) -> Optional[Image.Image]:
+        """读取缓存并标记为最近使用，未命中返回None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Tuple, image: Image.Image):
+        """写入缓存，超出预算时淘汰最久未使用的未固定条目"""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes_used -= old[1]
+
+        nbytes = image_nbytes(image)
+        self._entries[key] = (image, nbytes)
+        self.bytes_used += nbytes
+        self._evict()
+
+    def pin_scale(self, scale: Optional[float]):
+        """固定某个缩放比例（通常为适应窗口的比例），其条目不参与淘汰"""
+        self.pinned_scale = scale
+        self._evict()
+
+    def set_max_bytes(self, max_bytes: int):
+        """调整内存预算"""
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def clear(self):
+        """清空缓存（保留统计计数）"""
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def stats(self) -> str:
+        """命中/未命中/淘汰统计"""
+        total = self.hits + self.misses
+        hit_rate = self.hits / total * 100 if total else 0.0
+        return (f"{len(self._entries)} 项, {self.bytes_used / 1024 / 1024:.1f}/"
+                f"{self.max_bytes / 1024 / 1024:.0f}MB, 命中 {self.hits} 未命中 {self.misses} "
+                f"({hit_rate:.0f}%), 淘汰 {self.evictions}")
+
+    def _evict(self):
+        if self.bytes_used <= self.max_bytes:
+            return
+        for key in list(self._entries):
+            if self.bytes_used <= self.max_bytes:
+                break
+            if self.pinned_scale is not None and key[0] == self.pinned_scale:
+                continue
+            _, nbytes = self._entries.pop(key)
+            self.bytes_used -= nbytes
+            self.evictions += 1
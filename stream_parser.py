@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+流式响应解析模块
+解析OpenAI兼容接口和Anthropic接口的SSE流，并增量解析模型输出的JSON数组，
+每当一个文本块对象闭合就立即产出，无需等待完整响应
+"""
+
+import json
+from typing import Dict, Iterator, List
+
+
+class IncrementalJSONArrayParser:
+    """增量JSON数组解析器：逐段喂入文本，产出数组中已闭合的顶层对象"""
+
+    def __init__(self):
+        self.text = ""            # 已接收的完整文本
+        self._pos = 0             # 下一个待扫描字符的位置
+        self._in_array = False    # 是否已进入顶层数组
+        self._finished = False    # 顶层数组是否已结束
+        self._depth = 0           # 当前对象嵌套深度
+        self._in_string = False
+        self._escape = False
+        self._object_start = -1
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """
+        喂入一段文本
+
+        Args:
+            chunk: 新收到的文本片段
+
+        Returns:
+            本次新闭合的对象列表
+        """
+        self.text += chunk
+        completed = []
+        text = self.text
+
+        while self._pos < len(text) and not self._finished:
+            char = text[self._pos]
+
+            if not self._in_array:
+                if char == '[':
+                    # 前面的说明文字里也可能出现"["，只有紧接着"{"或"]"的才是结果数组的开头
+                    following = text[self._pos + 1:].lstrip()
+                    if not following:
+                        break  # 等下一段文本再判断
+                    self._in_array = following[0] in '{]'
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._object_start = self._pos
+                self._depth += 1
+            elif char == '}' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    item = self._load_object(text[self._object_start:self._pos + 1])
+                    if item is not None:
+                        completed.append(item)
+            elif char == ']' and self._depth == 0:
+                self._finished = True
+
+            self._pos += 1
+
+        return completed
+
+    @staticmethod
+    def _load_object(object_text: str):
+        try:
+            item = json.loads(object_text)
+        except json.JSONDecodeError:
+            # 单个对象格式错误时跳过，最终结果由完整解析兜底
+            return None
+        return item if isinstance(item, dict) else None
+
+
+def iter_sse_text(response, provider: str) -> Iterator[str]:
+    """
+    从SSE流式响应中逐段取出模型输出的文本
+
+    Args:
+        response: 以stream=True发出的requests.Response
+        provider: 服务商名称，anthropic使用Messages事件格式，其余按OpenAI格式解析
+
+    Returns:
+        文本片段迭代器
+    """
+    # SSE固定为UTF-8，避免requests按ISO-8859-1猜测编码导致中文乱码
+    response.encoding = 'utf-8'
+
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+
+        payload = line[5:].strip()
+        if payload == '[DONE]':
+            break
+
+        try:
+            event = json.loads(payload)
+        except json.JSONDecodeError:
+            continue
+
+        if 'error' in event and event.get('type') != 'content_block_delta':
+            raise Exception(f"API错误: {event['error']}")
+
+        if provider == "anthropic":
+            if event.get('type') == 'content_block_delta':
+                delta = event.get('delta', {})
+                if delta.get('type') == 'text_delta' and delta.get('text'):
+                    yield delta['text']
+            elif event.get('type') == 'message_stop':
+                break
+        else:
+            for choice in event.get('choices', []):
+                text = (choice.get('delta') or {}).get('content')
+                if text:
+                    yield text
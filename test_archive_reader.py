@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+测试压缩包读取
+验证不解压直接列出、读取和解码CBZ内的图片
+"""
+
+import io
+import os
+import tempfile
+import zipfile
+
+from PIL import Image
+
+import archive_reader
+import folder_scanner
+import page_loader
+
+
+def _png_bytes(size=(40, 60), color=(10, 20, 30)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _write_cbz(path, members):
+    with zipfile.ZipFile(path, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+
+def test_member_path_roundtrip():
+    """压缩包内图片路径可以拆分回压缩包路径和成员路径"""
+    path = archive_reader.member_path(os.path.join("lib", "Vol 1.CBZ"), "ch1/001.jpg")
+    assert archive_reader.split_member_path(path) == (os.path.join("lib", "Vol 1.CBZ"), "ch1/001.jpg")
+    assert archive_reader.split_member_path(os.path.join("lib", "001.jpg")) is None
+    assert archive_reader.file_system_path(path) == os.path.join("lib", "Vol 1.CBZ")
+
+
+def test_scan_and_read_cbz_without_extracting():
+    """扫描压缩包得到按自然顺序排列的图片，按需读取字节并解码"""
+    print("🧪 测试CBZ读取...")
+    with tempfile.TemporaryDirectory() as root:
+        cbz_path = os.path.join(root, "Series 01.cbz")
+        page = _png_bytes()
+        _write_cbz(cbz_path, {
+            "ch1/10.png": page,
+            "ch1/2.png": page,
+            "ch1/notes.txt": b"not an image",
+            "__MACOSX/ch1/._2.png": b"resource fork",
+        })
+
+        paths = [path for chunk in folder_scanner.scan_paths([cbz_path]) for path in chunk]
+        assert [archive_reader.split_member_path(path)[1] for path in paths] == ["ch1/2.png", "ch1/10.png"]
+
+        assert archive_reader.read_bytes(paths[0]) == page
+        assert archive_reader.exists(paths[0])
+        assert not archive_reader.exists(archive_reader.member_path(cbz_path, "ch1/99.png"))
+
+        loaded = page_loader.decode_page(paths[1])
+        assert loaded.size == (40, 60)
+
+        assert os.listdir(root) == ["Series 01.cbz"]  # 没有解压出任何文件
+        archive_reader.close_all()
+    print("✅ 直接读取压缩包内的图片")
+
+
+def test_folder_scan_expands_archives():
+    """扫描文件夹时压缩包按自然顺序展开，排在同级图片之后"""
+    with tempfile.TemporaryDirectory() as root:
+        page = _png_bytes()
+        with open(os.path.join(root, "cover.png"), "wb") as f:
+            f.write(page)
+        _write_cbz(os.path.join(root, "Vol 10.cbz"), {"1.png": page})
+        _write_cbz(os.path.join(root, "Vol 2.cbz"), {"1.png": page})
+        with open(os.path.join(root, "broken.zip"), "wb") as f:
+            f.write(b"not a zip")
+
+        paths = [path for chunk in folder_scanner.scan_folder(root) for path in chunk]
+
+        assert [os.path.basename(archive_reader.file_system_path(path)) for path in paths] == \
+            ["cover.png", "Vol 2.cbz", "Vol 10.cbz"]
+
+
+def main():
+    """主函数"""
+    print("🔧 压缩包读取测试")
+    print("=" * 40)
+    test_member_path_roundtrip()
+    test_scan_and_read_cbz_without_extracting()
+    test_folder_scan_expands_archives()
+
+
+if __name__ == "__main__":
+    main()
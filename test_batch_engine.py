@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+测试批量并发执行
+验证有界并发、按序产出以及单页失败时的行为
+"""
+
+import random
+import threading
+import time
+
+import batch_engine
+
+
+def test_results_in_input_order():
+    """乱序完成的任务按输入顺序产出"""
+    print("🧪 测试按序产出...")
+
+    def worker(page):
+        time.sleep(random.uniform(0, 0.02))
+        return page * 10
+
+    pages = list(range(20))
+    outputs = list(batch_engine.run_ordered(pages, worker, concurrency=5))
+
+    assert [index for index, _, _, _ in outputs] == pages
+    assert [result for _, _, result, _ in outputs] == [p * 10 for p in pages]
+    assert all(error is None for _, _, _, error in outputs)
+    print("✅ 结果顺序正确")
+
+
+def test_concurrency_is_bounded():
+    """同时在途的任务数不超过并发数"""
+    print("🧪 测试并发上限...")
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0}
+
+    def worker(page):
+        with lock:
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        time.sleep(0.01)
+        with lock:
+            state["running"] -= 1
+        return page
+
+    list(batch_engine.run_ordered(range(30), worker, concurrency=4))
+
+    print(f"📊 峰值并发: {state['peak']}")
+    assert 1 < state["peak"] <= 4
+    print("✅ 并发上限正常")
+
+
+def test_errors_are_yielded():
+    """失败的任务以异常形式产出，不影响其他任务"""
+    print("🧪 测试失败任务...")
+
+    def worker(page):
+        if page == 2:
+            raise ValueError("bad page")
+        return page
+
+    outputs = list(batch_engine.run_ordered(range(5), worker, concurrency=2))
+
+    assert isinstance(outputs[2][3], ValueError)
+    assert outputs[2][2] is None
+    assert [result for _, _, result, _ in outputs if result is not None] == [0, 1, 3, 4]
+    print("✅ 失败任务处理正常")
+
+
+def main():
+    """主函数"""
+    print("🔧 批量并发执行测试")
+    print("=" * 40)
+    test_results_in_input_order()
+    test_concurrency_is_bounded()
+    test_errors_are_yielded()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+测试翻译取消
+验证取消令牌、在途HTTP请求被直接断开、流式翻译取消时保留已收到的文本块、调度器取消执行中的任务
+"""
+
+import copy
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+import cancellation
+import config
+import http_transport
+import job_scheduler
+import translation_engine
+
+
+class _StallingProviderHandler(BaseHTTPRequestHandler):
+    """模拟迟迟不返回的服务商：流式请求先发出一个文本块，然后都等到放行为止"""
+
+    received = threading.Event()
+    release = threading.Event()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        _StallingProviderHandler.received.set()
+        try:
+            if request.get("stream"):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                block = '[{"type": "对话", "original_text": "Hello", "translation": "你好"},'
+                event = {"choices": [{"delta": {"content": block}}]}
+                # 注释行补足长度，让客户端的读取缓冲立即交出第一个文本块
+                self.wfile.write(f"data: {json.dumps(event)}\n\n: {'x' * 2048}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            _StallingProviderHandler.release.wait(10)
+        except OSError:
+            pass  # 客户端取消时已断开连接
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Provider:
+    """启动模拟服务商并创建指向它的翻译引擎"""
+
+    def __init__(self, stream):
+        _StallingProviderHandler.received = threading.Event()
+        _StallingProviderHandler.release = threading.Event()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StallingProviderHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        manager = config.ConfigManager()
+        manager.config = copy.deepcopy(config.DEFAULT_CONFIG)
+        manager.config["api_provider"] = "custom"
+        manager.config["custom"].update(api_key="test", base_url=f"http://127.0.0.1:{self.server.server_port}")
+        manager.config["advanced_settings"] = {"stream_responses": stream, "max_retries": 0}
+        self.engine = translation_engine.TranslationEngine(manager, use_cache=False)
+
+    def close(self):
+        _StallingProviderHandler.release.set()
+        http_transport.close_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _make_image():
+    output = io.BytesIO()
+    Image.new("RGB", (40, 30), "white").save(output, format="PNG")
+    return output.getvalue()
+
+
+def _translate_in_thread(engine, token, on_block=None):
+    """在后台线程翻译，返回 (线程, 结果字典)"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["results"] = engine.translate(_make_image(), on_block=on_block, cancel=token)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+def test_token_callbacks():
+    """取消时调用已注册的回调，注销后不再调用，取消后注册立即调用"""
+    token = cancellation.CancelToken()
+    calls = []
+    token.add_callback(lambda: calls.append("a"))
+    remove = token.add_callback(lambda: calls.append("b"))
+    remove()
+    cancellation.check(token)
+
+    token.cancel()
+    token.cancel()
+    assert calls == ["a"] and token.cancelled
+    token.add_callback(lambda: calls.append("late"))
+    assert calls == ["a", "late"]
+    try:
+        cancellation.check(token)
+        assert False, "已取消时应抛出CancelledError"
+    except cancellation.CancelledError:
+        pass
+
+
+def test_cancel_aborts_in_flight_request():
+    """取消时直接断开等待中的请求，不必等到60秒超时"""
+    print("🧪 测试中断在途请求...")
+    provider = _Provider(stream=False)
+    try:
+        token = cancellation.CancelToken()
+        thread, outcome = _translate_in_thread(provider.engine, token)
+        assert _StallingProviderHandler.received.wait(5)
+
+        started = time.monotonic()
+        token.cancel()
+        thread.join(5)
+        elapsed = time.monotonic() - started
+
+        assert not thread.is_alive()
+        assert isinstance(outcome.get("error"), cancellation.CancelledError), outcome
+        assert elapsed < 2
+        print(f"✅ 取消后 {elapsed:.2f} 秒内返回")
+    finally:
+        provider.close()
+
+
+def test_streaming_cancel_keeps_partial_blocks():
+    """流式翻译取消时CancelledError带有已收到的文本块"""
+    print("🧪 测试流式取消保留部分结果...")
+    provider = _Provider(stream=True)
+    try:
+        token = cancellation.CancelToken()
+        blocks = []
+        first_block = threading.Event()
+
+        def on_block(block):
+            blocks.append(block)
+            first_block.set()
+
+        thread, outcome = _translate_in_thread(provider.engine, token, on_block)
+        assert first_block.wait(5)
+        token.cancel()
+        thread.join(5)
+
+        error = outcome.get("error")
+        assert isinstance(error, cancellation.CancelledError), outcome
+        assert [block["translation"] for block in error.partial_results] == ["你好"]
+        assert blocks == error.partial_results
+        print("✅ 已收到的文本块已保留")
+    finally:
+        provider.close()
+
+
+def test_scheduler_cancels_running_job():
+    """调度器取消执行中的任务时触发其令牌，排队中的任务直接取消"""
+    scheduler = job_scheduler.PriorityScheduler(1, express_workers=0)
+    try:
+        token = cancellation.CancelToken()
+        started = threading.Event()
+        finished = threading.Event()
+
+        def work():
+            started.set()
+            if token.wait(5):
+                raise cancellation.CancelledError()
+            return "done"
+
+        running = scheduler.submit(["p1"], work, cancel_token=token,
+                                   on_done=lambda job: finished.set())
+        assert started.wait(5)
+        queued = scheduler.submit(["p2"], lambda: "p2")
+
+        cancelled = scheduler.cancel(lambda job: True)
+        assert set(cancelled) == {running, queued}
+        assert finished.wait(5)
+        assert isinstance(running.error, cancellation.CancelledError)
+        assert isinstance(queued.error, job_scheduler.JobCancelledError)
+    finally:
+        scheduler.shutdown()
+
+
+def main():
+    """主函数"""
+    print("🔧 翻译取消测试")
+    print("=" * 40)
+    test_token_callbacks()
+    test_cancel_aborts_in_flight_request()
+    test_streaming_cancel_keeps_partial_blocks()
+    test_scheduler_cancels_running_job()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+测试文件夹导入
+验证自然排序、递归扫描、格式过滤和分块产出
+"""
+
+import os
+import tempfile
+
+import folder_scanner
+
+
+def _touch(*parts):
+    path = os.path.join(*parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb"):
+        pass
+    return path
+
+
+def test_natural_sort_key():
+    """数字按数值排序，第2话排在第10话之前"""
+    names = ["page10.jpg", "Page2.jpg", "page1.jpg", "cover.jpg"]
+    assert sorted(names, key=folder_scanner.natural_sort_key) == ["cover.jpg", "page1.jpg", "Page2.jpg", "page10.jpg"]
+
+    paths = [os.path.join("Ch 10", "1.jpg"), os.path.join("Ch 2", "10.jpg"), os.path.join("Ch 2", "9.jpg")]
+    assert sorted(paths, key=folder_scanner.natural_sort_key) == [paths[2], paths[1], paths[0]]
+
+
+def test_scan_folder_recursive_in_reading_order():
+    """递归扫描按章节/页码顺序排列，跳过不支持的格式和隐藏文件"""
+    print("🧪 测试递归扫描...")
+    with tempfile.TemporaryDirectory() as root:
+        expected = []
+        for chapter in (1, 2, 10):
+            for page in (1, 2, 11):
+                expected.append(_touch(root, "Series", f"Chapter {chapter}", f"{page}.jpg"))
+        _touch(root, "Series", "Chapter 2", "notes.txt")
+        _touch(root, "Series", "Chapter 2", ".thumb.jpg")
+        _touch(root, "Series", ".cache", "1.jpg")
+
+        found = [path for chunk in folder_scanner.scan_folder(os.path.join(root, "Series")) for path in chunk]
+
+        assert found == expected
+    print(f"✅ 找到 {len(found)} 张图片，顺序正确")
+
+
+def test_scan_yields_chunks():
+    """大文件夹分块产出，每块不超过chunk_size"""
+    with tempfile.TemporaryDirectory() as root:
+        for page in range(25):
+            _touch(root, f"{page:03d}.png")
+
+        chunks = list(folder_scanner.scan_folder(root, chunk_size=10))
+
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+        assert os.path.basename(chunks[0][0]) == "000.png"
+
+
+def test_scan_paths_mixes_files_and_folders():
+    """拖入的文件保持原顺序，文件夹原位展开"""
+    with tempfile.TemporaryDirectory() as root:
+        loose = _touch(root, "b.jpg")
+        folder_page = _touch(root, "folder", "1.png")
+        other = _touch(root, "a.jpeg")
+        unsupported = _touch(root, "readme.md")
+
+        found = [path for chunk in folder_scanner.scan_paths([loose, os.path.join(root, "folder"), other, unsupported])
+                 for path in chunk]
+
+        assert found == [loose, folder_page, other]
+
+
+def main():
+    """主函数"""
+    print("🔧 文件夹导入测试")
+    print("=" * 40)
+    test_natural_sort_key()
+    test_scan_folder_recursive_in_reading_order()
+    test_scan_yields_chunks()
+    test_scan_paths_mixes_files_and_folders()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+测试HTTP连接池复用
+验证同一服务商的多次请求复用同一条keep-alive连接
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_transport
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    """记录客户端连接端口的简单HTTP/1.1处理器"""
+
+    protocol_version = "HTTP/1.1"
+    client_ports = set()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        _EchoHandler.client_ports.add(self.client_address[1])
+
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_session_reused_per_provider():
+    """同一服务商返回同一个Session，不同服务商互不共享"""
+    print("🧪 测试Session复用...")
+    try:
+        a1 = http_transport.get_session("openrouter")
+        a2 = http_transport.get_session("openrouter")
+        b = http_transport.get_session("anthropic")
+
+        assert a1 is a2
+        assert a1 is not b
+        adapter = a1.get_adapter("https://example.com")
+        assert adapter._pool_maxsize == http_transport.POOL_MAXSIZE
+        print("✅ Session复用正常")
+    finally:
+        http_transport.close_all()
+
+
+def test_keep_alive_connection():
+    """多次POST只建立一条TCP连接"""
+    print("🧪 测试keep-alive连接复用...")
+    _EchoHandler.client_ports = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _EchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/chat/completions"
+        for _ in range(5):
+            response = http_transport.post("custom", url, json={"ping": 1}, timeout=5)
+            assert response.json() == {"ok": True}
+
+        print(f"📊 服务端看到的连接数: {len(_EchoHandler.client_ports)}")
+        assert len(_EchoHandler.client_ports) == 1
+        print("✅ 连接复用正常")
+    finally:
+        http_transport.close_all()
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    """主函数"""
+    print("🔧 HTTP连接池测试")
+    print("=" * 40)
+    test_session_reused_per_provider()
+    test_keep_alive_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+测试图片列表模型
+验证去重、按路径查找和移除后位置的更新，以及大列表添加的耗时
+"""
+
+import time
+
+import image_list_view
+
+
+def test_extend_skips_duplicates():
+    """重复的路径被跳过，只返回实际新增的路径"""
+    model = image_list_view.ImageListModel(["a.png", "b.png"])
+
+    added = model.extend(["b.png", "c.png", "c.png", "d.png"])
+
+    assert added == ["c.png", "d.png"]
+    assert list(model) == ["a.png", "b.png", "c.png", "d.png"]
+    assert "c.png" in model and "x.png" not in model
+    assert model.index("d.png") == 3
+    assert model.index("x.png") is None
+
+
+def test_pop_updates_positions():
+    """移除后后面各项的位置前移，被移除的路径可以重新添加"""
+    model = image_list_view.ImageListModel(["a.png", "b.png", "c.png", "d.png"])
+
+    assert model.pop(1) == "b.png"
+
+    assert len(model) == 3
+    assert model[1] == "c.png"
+    assert [model.index(path) for path in ("a.png", "c.png", "d.png")] == [0, 1, 2]
+    assert model.extend(["b.png"]) == ["b.png"]
+    assert model.index("b.png") == 3
+
+    model.clear()
+    assert len(model) == 0 and "a.png" not in model
+
+
+def test_large_library_is_linear():
+    """两万张图片分批添加（每批都与已有列表去重）也应很快完成"""
+    print("🧪 测试大列表添加...")
+    paths = [f"/comics/vol/{index:05d}.jpg" for index in range(20000)]
+    model = image_list_view.ImageListModel()
+
+    start = time.perf_counter()
+    for offset in range(0, len(paths), 500):
+        model.extend(paths[:offset + 500])  # 每批都包含之前已添加的路径
+    elapsed = time.perf_counter() - start
+
+    assert len(model) == 20000
+    assert model.index(paths[-1]) == 19999
+    assert elapsed < 2.0, f"添加耗时过长: {elapsed:.2f}s"
+    print(f"✅ 40批共 {sum(range(500, 20001, 500))} 次去重检查，耗时 {elapsed * 1000:.0f}ms")
+
+
+def main():
+    """主函数"""
+    print("🔧 图片列表模型测试")
+    print("=" * 40)
+    test_extend_skips_duplicates()
+    test_pop_updates_positions()
+    test_large_library_is_linear()
+
+
+if __name__ == "__main__":
+    main()
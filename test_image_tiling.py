@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+测试长图切片
+验证切片范围、切片编码以及合并时的重叠去重
+"""
+
+import io
+
+from PIL import Image
+
+import image_tiling
+
+UPLOAD_SETTINGS = {"max_edge": 0, "format": "JPEG", "quality": 85}
+
+
+def _block(text, translation=None):
+    return {"type": "对话气泡", "original_text": text, "translation": translation or f"译:{text}"}
+
+
+def test_tile_bounds_cover_image_with_overlap():
+    """切片覆盖整张图片，相邻切片重叠"""
+    print("🧪 测试切片范围...")
+    bounds = image_tiling.compute_tile_bounds(6000, 1600, 200)
+
+    assert bounds[0][0] == 0
+    assert bounds[-1][1] == 6000
+    for (_, prev_bottom), (next_top, _) in zip(bounds, bounds[1:]):
+        assert prev_bottom - next_top == 200
+    print(f"✅ {len(bounds)} 片: {bounds}")
+
+
+def test_short_last_tile_merged():
+    """最后一片短于重叠高度时并入上一片"""
+    bounds = image_tiling.compute_tile_bounds(2950, 1600, 200)
+    assert bounds == [(0, 1600), (1400, 2950)]
+
+
+def test_should_tile_only_tall_images():
+    """只有足够细长的图片才切片"""
+    assert image_tiling.should_tile(800, 20000, 1600)
+    assert not image_tiling.should_tile(1200, 1800, 1600)
+    assert not image_tiling.should_tile(800, 1500, 1600)
+
+
+def test_split_tall_image():
+    """长图按切片编码，切片高度与计算结果一致"""
+    buffer = io.BytesIO()
+    Image.new("RGB", (800, 6000), (240, 240, 240)).save(buffer, format="PNG")
+
+    tiles = image_tiling.split_tall_image(buffer.getvalue(), 1600, 200, UPLOAD_SETTINGS)
+    bounds = image_tiling.compute_tile_bounds(6000, 1600, 200)
+
+    assert len(tiles) == len(bounds)
+    for (data, mime_type), (top, bottom) in zip(tiles, bounds):
+        assert mime_type == "image/jpeg"
+        with Image.open(io.BytesIO(data)) as tile:
+            assert tile.size == (800, bottom - top)
+
+
+def test_merge_removes_overlap_duplicates():
+    """重叠区域重复识别的文本块只保留一次，顺序不变"""
+    print("🧪 测试切片结果合并...")
+    tile_results = [
+        [_block("First line"), _block("Where are you going?")],
+        [_block("Where are you going?"), _block("Home.")],
+        [],
+        [_block("The end")],
+    ]
+
+    merged = image_tiling.merge_tile_results(tile_results)
+
+    assert [item["original_text"] for item in merged] == [
+        "First line", "Where are you going?", "Home.", "The end"]
+    print("✅ 合并去重正常")
+
+
+def test_merge_prefers_complete_block():
+    """被切断的气泡用下一片中更完整的版本替换"""
+    tile_results = [
+        [_block("Intro"), _block("I told you not")],
+        [_block("I told you not to come here!"), _block("Sorry")],
+    ]
+
+    merged = image_tiling.merge_tile_results(tile_results)
+
+    assert [item["original_text"] for item in merged] == [
+        "Intro", "I told you not to come here!", "Sorry"]
+
+
+def main():
+    """主函数"""
+    print("🔧 长图切片测试")
+    print("=" * 40)
+    test_tile_bounds_cover_image_with_overlap()
+    test_short_last_tile_merged()
+    test_should_tile_only_tall_images()
+    test_split_tall_image()
+    test_merge_removes_overlap_duplicates()
+    test_merge_prefers_complete_block()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+测试视口分块渲染
+验证可见图块只与画布大小有关、拼接后的图块与整图缩放一致，以及多级缩略图的选择
+"""
+
+import random
+
+from PIL import Image, ImageChops, ImageStat
+
+import image_viewport
+
+
+def _noise_image(width, height, seed=0):
+    rng = random.Random(seed)
+    return Image.frombytes("RGB", (width, height), bytes(rng.getrandbits(8) for _ in range(width * height * 3)))
+
+
+def test_visible_tiles_bounded_by_canvas():
+    """放大倍数再高，需要渲染的图块数量也只取决于画布大小"""
+    print("🧪 测试可见图块数量...")
+    canvas = (1600, 1000)
+    counts = []
+    for scale in (1.0, 4.0, 10.0):
+        scaled_width, scaled_height = image_viewport.scaled_size((3000, 4500), scale)
+        view = (scaled_width / 2, scaled_height / 2, scaled_width / 2 + canvas[0], scaled_height / 2 + canvas[1])
+        counts.append(len(image_viewport.visible_tiles(scaled_width, scaled_height, view)))
+
+    tile = image_viewport.TILE_SIZE
+    margin = image_viewport.VIEWPORT_MARGIN
+    limit = ((canvas[0] + 2 * margin) // tile + 2) * ((canvas[1] + 2 * margin) // tile + 2)
+    assert all(0 < count <= limit for count in counts)
+    print(f"✅ 各缩放比例下的图块数: {counts}（上限 {limit}）")
+
+
+def test_visible_tiles_clipped_to_image():
+    """视口超出图片范围时只返回图片内的图块"""
+    assert image_viewport.visible_tiles(300, 300, (1000, 1000, 2000, 2000)) == []
+    assert image_viewport.visible_tiles(300, 300, (-500, -500, 100, 100)) == [(0, 0)]
+
+
+def test_tiles_match_full_resize():
+    """逐块重采样拼接的结果与整图缩放基本一致（无明显接缝）"""
+    source = _noise_image(300, 200)
+    for scale in (0.37, 1.0, 2.5):
+        scaled_width, scaled_height = image_viewport.scaled_size(source.size, scale)
+        full = source.resize((scaled_width, scaled_height), Image.Resampling.LANCZOS,
+                             box=(0, 0, scaled_width / scale, scaled_height / scale))
+        stitched = Image.new("RGB", (scaled_width, scaled_height))
+        for col, row in image_viewport.visible_tiles(scaled_width, scaled_height,
+                                                     (0, 0, scaled_width, scaled_height), tile_size=64):
+            box = image_viewport.tile_box(col, row, scaled_width, scaled_height, tile_size=64)
+            stitched.paste(image_viewport.render_tile(source, scale, box), box[:2])
+
+        if scale == 1.0:
+            assert ImageChops.difference(full, stitched).getbbox() is None
+        else:
+            max_diff = max(high for _, high in ImageChops.difference(full, stitched).getextrema())
+            assert max_diff <= 8, f"缩放 {scale} 时图块接缝差异过大: {max_diff}"
+
+
+def test_pyramid_levels_and_selection():
+    """多级缩略图逐级减半，并选择不小于目标比例的最小一级"""
+    print("🧪 测试多级缩略图...")
+    pyramid = image_viewport.MipmapPyramid(Image.new("RGB", (4000, 3000)), min_edge=256)
+    assert pyramid.source_for_scale(0.2)[1] == 1.0  # 生成前只能使用原图
+
+    pyramid.build()
+    levels = pyramid.levels
+    assert [image.size for _, image in levels[:4]] == [(4000, 3000), (2000, 1500), (1000, 750), (500, 375)]
+    assert max(levels[-1][1].size) <= 256
+
+    assert pyramid.source_for_scale(0.2)[1] == 0.25
+    assert pyramid.source_for_scale(0.5)[1] == 0.5
+    assert pyramid.source_for_scale(0.51)[1] == 1.0
+    assert pyramid.source_for_scale(3.0)[1] == 1.0
+    print(f"✅ 共 {len(levels)} 级")
+
+
+def test_pyramid_from_reduced_decode():
+    """第0级为缩小解码的图片时，比例相对原图计算，补上原图后成为新的第0级"""
+    pyramid = image_viewport.MipmapPyramid(Image.new("RGB", (500, 375)), min_edge=256, full_size=(4000, 3000))
+    assert pyramid.base_scale == 0.125
+    assert pyramid.source_for_scale(0.5)[1] == 0.125  # 没有更高分辨率时退回第0级
+
+    pyramid.build()
+    assert [level_scale for level_scale, _ in pyramid.levels] == [0.125, 0.0625]
+
+    pyramid.add_full_resolution(Image.new("RGB", (4000, 3000)))
+    assert pyramid.base_scale == 1.0
+    assert pyramid.source_for_scale(0.5)[1] == 1.0
+    assert pyramid.source_for_scale(0.1)[1] == 0.125
+
+
+def test_render_from_pyramid_level():
+    """从缩略图重采样的图块与从原图重采样的结果接近"""
+    source = _noise_image(400, 400, seed=1).resize((800, 800), Image.Resampling.BILINEAR)
+    pyramid = image_viewport.MipmapPyramid(source)
+    pyramid.build()
+
+    scale = 0.3
+    box = (0, 0, 120, 120)
+    level_image, level_scale = pyramid.source_for_scale(scale)
+    from_level = image_viewport.render_tile(level_image, scale / level_scale, box)
+    from_original = image_viewport.render_tile(source, scale, box)
+
+    assert level_scale == 0.5
+    assert from_level.size == from_original.size
+    mean_diff = ImageStat.Stat(ImageChops.difference(from_level, from_original)).mean
+    assert max(mean_diff) < 12
+
+
+def test_fast_resample_for_draft_pass():
+    """快速渲染：放大用NEAREST，缩小用BILINEAR，尺寸与高质量图块一致"""
+    assert image_viewport.fast_resample(3.0) == Image.Resampling.NEAREST
+    assert image_viewport.fast_resample(0.7) == Image.Resampling.BILINEAR
+
+    source = _noise_image(200, 200, seed=2)
+    box = (64, 64, 128, 128)
+    draft = image_viewport.render_tile(source, 2.5, box, image_viewport.fast_resample(2.5))
+    final = image_viewport.render_tile(source, 2.5, box)
+    assert draft.size == final.size == (64, 64)
+
+
+def main():
+    """主函数"""
+    print("🔧 视口分块渲染测试")
+    print("=" * 40)
+    test_visible_tiles_bounded_by_canvas()
+    test_visible_tiles_clipped_to_image()
+    test_tiles_match_full_resize()
+    test_pyramid_levels_and_selection()
+    test_pyramid_from_reduced_decode()
+    test_render_from_pyramid_level()
+    test_fast_resample_for_draft_pass()
+
+
+if __name__ == "__main__":
+    main()
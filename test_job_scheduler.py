@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+测试翻译任务调度
+验证交互式任务插队、重复请求挂到已有任务、排队任务提前、交互式专用线程以及取消排队任务
+"""
+
+import threading
+
+import job_scheduler
+
+
+class _Recorder:
+    """记录任务执行顺序，first任务阻塞到放行为止"""
+
+    def __init__(self):
+        self.order = []
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def blocking(self, name):
+        def work():
+            self.started.set()
+            self.release.wait(5)
+            return self.record(name)
+        return work
+
+    def job(self, name):
+        return lambda: self.record(name)
+
+    def record(self, name):
+        with self.lock:
+            self.order.append(name)
+        return name
+
+
+def _wait_all(jobs):
+    """等待任务全部结束（完成或取消）"""
+    events = []
+    for job in jobs:
+        event = threading.Event()
+        events.append(event)
+        job.callbacks.append(lambda _, event=event: event.set())
+    for job, event in zip(jobs, events):
+        if job.status in (job_scheduler.JOB_DONE, job_scheduler.JOB_CANCELLED):
+            event.set()
+        assert event.wait(5), "任务未在限定时间内结束"
+
+
+def test_interactive_jumps_ahead_of_batch():
+    """交互式任务排在已排队的批量任务之前"""
+    print("🧪 测试交互式任务插队...")
+    recorder = _Recorder()
+    scheduler = job_scheduler.PriorityScheduler(1, express_workers=0)
+    try:
+        first = scheduler.submit(["p1"], recorder.blocking("p1"))
+        assert recorder.started.wait(5)
+        batch = [scheduler.submit([f"p{i}"], recorder.job(f"p{i}")) for i in range(2, 5)]
+        current, attached = scheduler.request("p9", recorder.job("p9"), job_scheduler.PRIORITY_INTERACTIVE)
+        assert not attached
+
+        recorder.release.set()
+        _wait_all([first, current] + batch)
+        assert recorder.order == ["p1", "p9", "p2", "p3", "p4"]
+        print("✅ 当前页优先翻译")
+    finally:
+        scheduler.shutdown()
+
+
+def test_request_attaches_and_promotes():
+    """已排队的页面再次请求时挂到原任务并提前，不重复翻译"""
+    recorder = _Recorder()
+    scheduler = job_scheduler.PriorityScheduler(1, express_workers=0)
+    try:
+        first = scheduler.submit(["p1"], recorder.blocking("p1"))
+        assert recorder.started.wait(5)
+        batch_a = scheduler.submit(["a1", "a2"], recorder.job("a"))
+        batch_b = scheduler.submit(["b1"], recorder.job("b"))
+
+        finished = []
+        job, attached = scheduler.request("b1", recorder.job("duplicate"), on_done=finished.append)
+        assert attached and job is batch_b
+        assert job.priority == job_scheduler.PRIORITY_INTERACTIVE
+
+        try:
+            scheduler.submit(["a2"], recorder.job("again"))
+            assert False, "已排队的页面不应再次提交"
+        except ValueError:
+            pass
+
+        recorder.release.set()
+        _wait_all([first, batch_a, batch_b])
+        assert recorder.order == ["p1", "b", "a"]
+        assert finished == [batch_b] and batch_b.result == "b"
+        assert scheduler.find("b1") is None and scheduler.active_count() == 0
+    finally:
+        scheduler.shutdown()
+
+
+def test_express_worker_runs_while_batch_busy():
+    """批量任务占满并发时，交互式任务由专用线程立即执行"""
+    print("🧪 测试交互式专用线程...")
+    recorder = _Recorder()
+    scheduler = job_scheduler.PriorityScheduler(1, express_workers=1)
+    try:
+        batch = scheduler.submit(["p1"], recorder.blocking("p1"))
+        assert recorder.started.wait(5)
+        current, _ = scheduler.request("p2", recorder.job("p2"))
+
+        _wait_all([current])
+        assert recorder.order == ["p2"] and batch.status == job_scheduler.JOB_RUNNING
+
+        recorder.release.set()
+        _wait_all([batch])
+        print("✅ 当前页无需等待在途的批量请求")
+    finally:
+        scheduler.shutdown()
+
+
+def test_cancel_queued_batch_jobs():
+    """只取消排队中的批量任务，执行中和已提前的任务继续"""
+    recorder = _Recorder()
+    scheduler = job_scheduler.PriorityScheduler(1, express_workers=0)
+    try:
+        running = scheduler.submit(["p1"], recorder.blocking("p1"), tag="batch")
+        assert recorder.started.wait(5)
+        queued = scheduler.submit(["p2"], recorder.job("p2"), tag="batch")
+        promoted = scheduler.submit(["p3"], recorder.job("p3"), tag="batch")
+        scheduler.request("p3", recorder.job("p3"))
+
+        errors = []
+        queued.callbacks.append(lambda job: errors.append(job.error))
+        cancelled = scheduler.cancel_queued(lambda job: job.tag == "batch"
+                                            and job.priority == job_scheduler.PRIORITY_BATCH)
+
+        assert cancelled == [queued]
+        assert isinstance(errors[0], job_scheduler.JobCancelledError)
+        recorder.release.set()
+        _wait_all([running, promoted])
+        assert recorder.order == ["p1", "p3"]
+    finally:
+        scheduler.shutdown()
+
+
+def main():
+    """主函数"""
+    print("🔧 翻译任务调度测试")
+    print("=" * 40)
+    test_interactive_jumps_ahead_of_batch()
+    test_request_attaches_and_promotes()
+    test_express_worker_runs_while_batch_busy()
+    test_cancel_queued_batch_jobs()
+
+
+if __name__ == "__main__":
+    main()
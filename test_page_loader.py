@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+测试相邻页预读
+验证后台解码、JPEG缩小解码与延迟读取原图、适应窗口预览、容量淘汰以及读取失败的处理
+"""
+
+import os
+import tempfile
+import time
+
+from PIL import Image
+
+import image_viewport
+import page_loader
+
+
+def _write_pages(directory, count, size=(1200, 1800)):
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"page_{index:02d}.png")
+        Image.new("RGB", size, (index * 20, 100, 150)).save(path)
+        paths.append(path)
+    return paths
+
+
+def _wait_for(prefetcher, path, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        page = prefetcher.get(path)
+        if page is not None:
+            return page
+        time.sleep(0.01)
+    return None
+
+
+def test_prefetch_decodes_in_background():
+    """预读的页面已解码、生成了多级缩略图和适应窗口的预览"""
+    print("🧪 测试相邻页预读...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = _write_pages(temp_dir, 3)
+        prefetcher = page_loader.PagePrefetcher(capacity=3)
+        prefetcher.request(paths[1:], canvas_size=(800, 600))
+
+        page = _wait_for(prefetcher, paths[2])
+
+        assert page is not None
+        assert page.image.size == (1200, 1800)
+        assert page.pyramid.complete
+        assert page.fit_scale == image_viewport.fit_scale((1200, 1800), (800, 600))
+        assert page.fit_image.size == image_viewport.scaled_size((1200, 1800), page.fit_scale)
+        assert _wait_for(prefetcher, paths[1]) is not None
+    print("✅ 预读正常")
+
+
+def test_jpeg_draft_decode_and_full_resolution():
+    """JPEG按适应窗口的大小缩小解码，放大超过该分辨率时才读取原图"""
+    print("🧪 测试JPEG缩小解码...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "page.jpg")
+        Image.new("RGB", (4000, 6000), (200, 120, 40)).save(path)
+
+        page = page_loader.decode_page(path, canvas_size=(800, 600))
+        assert page.size == (4000, 6000)
+        assert page.image.size == (500, 750)  # 1/8解码，不小于适应窗口所需的尺寸
+        assert not page.needs_full_resolution(image_viewport.fit_scale(page.size, (800, 600)))
+        assert page.needs_full_resolution(0.5)
+
+        page.load_full_resolution()
+        assert page.image.size == (4000, 6000)
+        assert page.pyramid.base_scale == 1.0
+        assert not page.needs_full_resolution(1.0)
+    print("✅ 初次显示只解码了1/64的像素")
+
+
+def test_exif_orientation_applied():
+    """按EXIF方向旋转，原图尺寸为旋转后的宽高"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "rotated.jpg")
+        image = Image.new("RGB", (400, 200))
+        exif = image.getexif()
+        exif[page_loader.EXIF_ORIENTATION] = 6
+        image.save(path, exif=exif)
+
+        page = page_loader.decode_page(path)
+        assert page.size == (200, 400)
+        assert page.image.size == (200, 400)
+
+
+def test_capacity_evicts_least_recent():
+    """超出容量时淘汰最久未使用的页面"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = _write_pages(temp_dir, 3, size=(64, 64))
+        prefetcher = page_loader.PagePrefetcher(capacity=2)
+        for path in paths:
+            prefetcher.put(page_loader.decode_page(path))
+
+        assert prefetcher.get(paths[0], wait=False) is None
+        assert prefetcher.get(paths[1], wait=False) is not None
+        assert prefetcher.get(paths[2], wait=False) is not None
+
+
+def test_unreadable_page_skipped():
+    """无法解码的文件不会进入缓存，也不会阻塞后续预读"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        broken = os.path.join(temp_dir, "broken.png")
+        with open(broken, "wb") as f:
+            f.write(b"not an image")
+        good = _write_pages(temp_dir, 1, size=(64, 64))[0]
+
+        prefetcher = page_loader.PagePrefetcher(capacity=4)
+        prefetcher.request([broken, good])
+
+        assert _wait_for(prefetcher, good) is not None
+        assert prefetcher.get(broken) is None
+
+        try:
+            page_loader.decode_page(broken)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("无法读取的图片应抛出ValueError")
+
+
+def main():
+    """主函数"""
+    print("🔧 相邻页预读测试")
+    print("=" * 40)
+    test_prefetch_decodes_in_background()
+    test_jpeg_draft_decode_and_full_resolution()
+    test_exif_orientation_applied()
+    test_capacity_evicts_least_recent()
+    test_unreadable_page_skipped()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+测试多页合并
+验证小图分组、多页提示词以及按页码拆分响应
+"""
+
+import page_packing
+
+
+def test_group_consecutive_small_pages():
+    """相邻小图按上限分组，大图单独成组且顺序不变"""
+    print("🧪 测试小图分组...")
+    pages = ["s1", "s2", "s3", "BIG", "s4", "s5", "s6", "s7", "s8"]
+
+    groups = page_packing.group_pages(pages, lambda name: name.startswith("s"), 3)
+
+    assert groups == [["s1", "s2", "s3"], ["BIG"], ["s4", "s5", "s6"], ["s7", "s8"]]
+    assert [page for group in groups for page in group] == pages
+    print(f"✅ {len(pages)} 张图片 → {len(groups)} 个请求")
+
+
+def test_packed_prompt_mentions_every_page():
+    """多页提示词包含页数说明并保留原提示词"""
+    prompt = page_packing.build_packed_prompt("原始提示词", 4)
+
+    assert prompt.startswith("原始提示词")
+    assert "第1页到第4页" in prompt
+    assert '"1"到"4"' in prompt
+
+
+def test_split_keyed_response():
+    """按页码键拆分响应，空页保留为空列表"""
+    print("🧪 测试多页响应拆分...")
+    content = '''```json
+{
+  "1": [{"type": "对话气泡", "original_text": "Hi", "translation": "嗨"}],
+  "2": [],
+  "3": [{"type": "旁白", "original_text": "Later", "translation": "稍后", "extra": 1},
+        {"note": "无效项"}],
+}
+```'''
+
+    pages = page_packing.split_packed_response(content, 3)
+
+    assert pages[1] == [{"type": "对话气泡", "original_text": "Hi", "translation": "嗨"}]
+    assert pages[2] == []
+    assert pages[3] == [{"type": "旁白", "original_text": "Later", "translation": "稍后"}]
+    print("✅ 拆分正常")
+
+
+def test_split_flat_array_with_page_field():
+    """兼容带page字段的扁平数组，缺失的页不出现在结果中"""
+    content = '''[
+  {"page": "第1页", "type": "对话气泡", "original_text": "A", "translation": "甲"},
+  {"page": 3, "type": "对话气泡", "original_text": "C", "translation": "丙"},
+  {"page": 9, "type": "对话气泡", "original_text": "X", "translation": "越界"}
+]'''
+
+    pages = page_packing.split_packed_response(content, 3)
+
+    assert sorted(pages) == [1, 3]
+    assert pages[3][0]["translation"] == "丙"
+
+
+def test_unparseable_response():
+    """无法解析的响应返回None，由调用方逐页重试"""
+    assert page_packing.split_packed_response("抱歉，我无法处理这些图片。", 2) is None
+
+
+def main():
+    """主函数"""
+    print("🔧 多页合并测试")
+    print("=" * 40)
+    test_group_consecutive_small_pages()
+    test_packed_prompt_mentions_every_page()
+    test_split_keyed_response()
+    test_split_flat_array_with_page_field()
+    test_unparseable_response()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+测试服务商限流
+使用模拟时钟验证令牌桶、Retry-After、指数退避和熔断暂停
+"""
+
+import email.utils
+import random
+import threading
+import time
+
+import requests
+
+import cancellation
+import rate_limiter
+
+
+class _FakeClock:
+    """模拟时钟：sleep只推进时间，不真正等待"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class _FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = f"status {status_code}"
+
+    def close(self):
+        pass
+
+
+def _limiter(clock, **settings):
+    return rate_limiter.ProviderLimiter("test", settings, clock=clock, sleep=clock.sleep, rng=random.Random(0))
+
+
+def test_token_bucket_limits_rate():
+    """每分钟60个请求：突发用完一分钟配额后每秒放行一个"""
+    print("🧪 测试令牌桶...")
+    clock = _FakeClock()
+    bucket = rate_limiter.TokenBucket(60, clock=clock, sleep=clock.sleep)
+
+    for _ in range(60):
+        assert bucket.acquire() == 0.0
+    waited = bucket.acquire()
+
+    assert abs(waited - 1.0) < 1e-6
+    assert abs(clock.now - 1.0) < 1e-6
+    print("✅ 令牌桶限速正常")
+
+
+def test_parse_retry_after():
+    """Retry-After支持秒数和HTTP日期"""
+    assert rate_limiter.parse_retry_after("12") == 12.0
+    assert rate_limiter.parse_retry_after(None) is None
+    assert rate_limiter.parse_retry_after("soon") is None
+    http_date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 25 <= rate_limiter.parse_retry_after(http_date) <= 31
+
+
+def test_retry_after_honored():
+    """429携带Retry-After时按指定时间暂停后重试"""
+    print("🧪 测试Retry-After...")
+    clock = _FakeClock()
+    limiter = _limiter(clock)
+    responses = [_FakeResponse(429, {"Retry-After": "7"}), _FakeResponse(200)]
+
+    response = limiter.call(lambda: responses.pop(0))
+
+    assert response.status_code == 200
+    assert clock.sleeps == [7.0]
+    print("✅ 按Retry-After等待后重试成功")
+
+
+def test_backoff_on_server_errors_and_network_failures():
+    """5xx和网络错误按指数退避加抖动重试，退避时间不超过上限"""
+    clock = _FakeClock()
+    limiter = _limiter(clock, backoff_base=1.0, backoff_max=4.0, breaker_threshold=10)
+    attempts = []
+
+    def send():
+        attempts.append(clock.now)
+        if len(attempts) == 1:
+            raise requests.exceptions.ConnectionError("reset")
+        if len(attempts) < 5:
+            return _FakeResponse(503)
+        return _FakeResponse(200)
+
+    assert limiter.call(send).status_code == 200
+    assert len(attempts) == 5
+    for attempt, delay in enumerate(clock.sleeps):
+        assert 0 <= delay <= min(4.0, 2 ** attempt)
+
+
+def test_non_retryable_status_returned():
+    """非暂时性错误（如401）直接返回给调用方，不重试"""
+    clock = _FakeClock()
+    limiter = _limiter(clock)
+    calls = []
+
+    response = limiter.call(lambda: calls.append(1) or _FakeResponse(401))
+
+    assert response.status_code == 401
+    assert len(calls) == 1
+
+
+def test_retries_exhausted_raises():
+    """重试次数用尽后抛出RetryableError并带上状态码"""
+    clock = _FakeClock()
+    limiter = _limiter(clock, max_retries=2, breaker_threshold=10)
+
+    try:
+        limiter.call(lambda: _FakeResponse(500))
+    except rate_limiter.RetryableError as e:
+        assert e.status_code == 500
+    else:
+        raise AssertionError("重试用尽后应抛出RetryableError")
+
+
+def test_circuit_breaker_pauses_requests():
+    """连续失败达到阈值后熔断，冷却期内的请求等待而不是失败"""
+    print("🧪 测试熔断器...")
+    clock = _FakeClock()
+    limiter = _limiter(clock, max_retries=0, breaker_threshold=2, breaker_cooldown=30)
+
+    for _ in range(2):
+        try:
+            limiter.call(lambda: _FakeResponse(502))
+        except rate_limiter.RetryableError:
+            pass
+    assert limiter.breaker.is_open
+
+    opened_at = clock.now
+    sent_at = []
+    limiter.call(lambda: sent_at.append(clock.now) or _FakeResponse(200))
+
+    assert sent_at[0] >= opened_at + 30
+    assert not limiter.breaker.is_open
+    assert limiter.breaker.consecutive_failures == 0
+    print("✅ 熔断冷却后恢复请求")
+
+
+def _assert_cancelled_quickly(wait, token):
+    """0.1秒后取消，wait应在1秒内抛出CancelledError"""
+    threading.Timer(0.1, token.cancel).start()
+    started = time.monotonic()
+    try:
+        wait()
+        raise AssertionError("取消后应抛出CancelledError")
+    except cancellation.CancelledError:
+        pass
+    assert time.monotonic() - started < 1
+
+
+def test_cancel_interrupts_waits():
+    """熔断冷却、令牌桶限速和Retry-After暂停都能被取消打断"""
+    print("🧪 测试取消打断等待...")
+    breaker = rate_limiter.CircuitBreaker(cooldown=300)
+    breaker.pause(300)
+    token = cancellation.CancelToken()
+    _assert_cancelled_quickly(lambda: breaker.wait_until_available(token), token)
+
+    bucket = rate_limiter.TokenBucket(1)
+    bucket.acquire()
+    token = cancellation.CancelToken()
+    _assert_cancelled_quickly(lambda: bucket.acquire(1, token), token)
+
+    limiter = rate_limiter.ProviderLimiter("test", {"max_retries": 3, "backoff_max": 60})
+    sent = []
+    token = cancellation.CancelToken()
+    _assert_cancelled_quickly(
+        lambda: limiter.call(lambda: sent.append(1) or _FakeResponse(429, {"Retry-After": "300"}), cancel=token),
+        token)
+    assert sent == [1]
+    print("✅ 取消后立即停止等待")
+
+
+def test_estimate_tokens():
+    """token估算包含提示词、图片和预计输出"""
+    assert rate_limiter.estimate_tokens("x" * 100, [(750, 1000)], 0) == 1100
+    assert rate_limiter.estimate_tokens("", [(4000, 4000)], 0) == rate_limiter.MAX_IMAGE_TOKENS
+
+
+def main():
+    """主函数"""
+    print("🔧 服务商限流测试")
+    print("=" * 40)
+    test_token_bucket_limits_rate()
+    test_parse_retry_after()
+    test_retry_after_honored()
+    test_backoff_on_server_errors_and_network_failures()
+    test_non_retryable_status_returned()
+    test_retries_exhausted_raises()
+    test_circuit_breaker_pauses_requests()
+    test_cancel_interrupts_waits()
+    test_estimate_tokens()
+
+
+if __name__ == "__main__":
+    main()
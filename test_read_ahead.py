@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+测试阅读时预翻译
+验证预翻译范围、并发上限、花费上限，以及跳页时取消范围外尚未开始的预翻译
+"""
+
+import copy
+import threading
+import time
+
+import config
+import job_scheduler
+import read_ahead
+
+
+def _settings(**overrides):
+    settings = {"enabled": True, "pages": 3, "max_concurrency": 1, "page_limit": 50}
+    settings.update(overrides)
+    return settings
+
+
+class _Translator:
+    """模拟翻译：记录翻译过的页，可以阻塞到放行为止"""
+
+    def __init__(self, block=False):
+        self.translated = []
+        self.results = {}
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def make_work(self, path, cancel_token):
+        def work():
+            self.release.wait(5)
+            with self.lock:
+                self.translated.append(path)
+                self.results[path] = [{"translation": path}]
+            return {path: self.results[path]}
+        return work
+
+    def is_translated(self, path):
+        with self.lock:
+            return path in self.results
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError("条件未在限定时间内满足")
+
+
+def test_plan_skips_translated_pages():
+    """只选当前页之后最近的K张未翻译图片"""
+    pages = [f"p{i}" for i in range(10)]
+    done = {"p3", "p4"}
+    assert read_ahead.plan_read_ahead(pages, 1, 3, done.__contains__) == ["p2", "p5", "p6"]
+    assert read_ahead.plan_read_ahead(pages, 8, 3, done.__contains__) == ["p9"]
+
+
+def test_translates_upcoming_pages_within_concurrency_cap():
+    """后台依次翻译之后几页，同时在途的预翻译不超过上限"""
+    print("🧪 测试预翻译...")
+    pages = [f"p{i}" for i in range(6)]
+    translator = _Translator(block=True)
+    scheduler = job_scheduler.PriorityScheduler(4, express_workers=0)
+    controller = read_ahead.ReadAhead(scheduler, translator.make_work)
+    try:
+        controller.configure(_settings(pages=3, max_concurrency=1))
+        controller.update_position(pages, 0, translator.is_translated)
+        assert controller.in_flight_count() == 1 and scheduler.find("p1") is not None
+        assert scheduler.find("p2") is None
+
+        translator.release.set()
+        _wait_until(lambda: len(translator.translated) == 3 and controller.in_flight_count() == 0)
+        assert translator.translated == ["p1", "p2", "p3"]
+        print("✅ 之后的页已在后台翻译")
+    finally:
+        scheduler.shutdown()
+
+
+def test_page_limit_caps_spending():
+    """达到每次启动的页数上限后不再预翻译"""
+    pages = [f"p{i}" for i in range(10)]
+    translator = _Translator()
+    scheduler = job_scheduler.PriorityScheduler(2, express_workers=0)
+    controller = read_ahead.ReadAhead(scheduler, translator.make_work)
+    try:
+        controller.configure(_settings(pages=5, max_concurrency=2, page_limit=2))
+        controller.update_position(pages, 0, translator.is_translated)
+        _wait_until(lambda: controller.in_flight_count() == 0 and len(translator.translated) == 2)
+
+        controller.update_position(pages, 4, translator.is_translated)
+        time.sleep(0.05)
+        assert sorted(translator.translated) == ["p1", "p2"]
+        assert controller.remaining_budget() == 0
+    finally:
+        scheduler.shutdown()
+
+
+def test_jump_cancels_queued_pages_outside_new_window():
+    """跳到别处时取消新范围外尚未开始的预翻译并退还额度，执行中的继续完成"""
+    print("🧪 测试跳页取消...")
+    pages = [f"p{i}" for i in range(20)]
+    translator = _Translator(block=True)
+    scheduler = job_scheduler.PriorityScheduler(1, express_workers=0)
+    done = []
+    controller = read_ahead.ReadAhead(scheduler, translator.make_work, on_done=done.append)
+    try:
+        controller.configure(_settings(pages=2, max_concurrency=2))
+        controller.update_position(pages, 0, translator.is_translated)
+        _wait_until(lambda: scheduler.find("p1").status == job_scheduler.JOB_RUNNING)
+        queued = scheduler.find("p2")
+        assert controller.spent == 2
+
+        controller.update_position(pages, 10, translator.is_translated)
+        assert queued.status == job_scheduler.JOB_CANCELLED
+        assert scheduler.find("p11") is not None and scheduler.find("p12") is None
+
+        translator.release.set()
+        _wait_until(lambda: "p11" in translator.translated and "p12" in translator.translated)
+        assert "p2" not in translator.translated and "p1" in translator.translated
+        assert controller.spent == 3
+        assert any(isinstance(job.error, job_scheduler.JobCancelledError) for job in done)
+        print("✅ 跳页后只翻译新位置之后的页")
+    finally:
+        scheduler.shutdown()
+
+
+def test_disabled_does_nothing():
+    """未启用时不提交任何任务"""
+    translator = _Translator()
+    scheduler = job_scheduler.PriorityScheduler(1, express_workers=0)
+    controller = read_ahead.ReadAhead(scheduler, translator.make_work)
+    try:
+        controller.configure(_settings(enabled=False))
+        controller.update_position(["p0", "p1"], 0, translator.is_translated)
+        assert scheduler.active_count() == 0 and controller.spent == 0
+    finally:
+        scheduler.shutdown()
+
+
+def test_settings_change_applies_without_restart():
+    """设置窗口保存后重新configure即按当前页生效：开启后立即预翻译，调大页数后补上新范围"""
+    print("🧪 测试修改设置立即生效...")
+    pages = [f"p{i}" for i in range(10)]
+    translator = _Translator(block=True)
+    scheduler = job_scheduler.PriorityScheduler(4, express_workers=0)
+    controller = read_ahead.ReadAhead(scheduler, translator.make_work)
+    manager = config.ConfigManager()
+    manager.config = copy.deepcopy(config.DEFAULT_CONFIG)
+    manager.config["advanced_settings"] = {}
+    try:
+        controller.configure(manager.get_read_ahead_settings())
+        controller.update_position(pages, 2, translator.is_translated)
+        assert scheduler.active_count() == 0
+
+        manager.config["advanced_settings"].update(read_ahead_enabled=True, read_ahead_pages=1,
+                                                   read_ahead_concurrency=4)
+        controller.configure(manager.get_read_ahead_settings())
+        assert scheduler.find("p3") is not None and scheduler.find("p4") is None
+
+        manager.config["advanced_settings"]["read_ahead_pages"] = 3
+        controller.configure(manager.get_read_ahead_settings())
+        assert all(scheduler.find(path) is not None for path in ("p3", "p4", "p5"))
+
+        translator.release.set()
+        _wait_until(lambda: sorted(translator.translated) == ["p3", "p4", "p5"])
+        print("✅ 无需重启即按新设置预翻译")
+    finally:
+        scheduler.shutdown()
+
+
+def main():
+    """主函数"""
+    print("🔧 阅读时预翻译测试")
+    print("=" * 40)
+    test_plan_skips_translated_pages()
+    test_translates_upcoming_pages_within_concurrency_cap()
+    test_page_limit_caps_spending()
+    test_jump_cancels_queued_pages_outside_new_window()
+    test_disabled_does_nothing()
+    test_settings_change_applies_without_restart()
+
+
+if __name__ == "__main__":
+    main()
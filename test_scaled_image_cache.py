@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+测试缩放图片缓存
+验证字节预算、LRU淘汰顺序、固定缩放比例以及统计计数
+"""
+
+from PIL import Image
+
+from scaled_image_cache import ScaledImageCache, image_nbytes
+
+TILE_BYTES = 100 * 100 * 3
+
+
+def _tile():
+    return Image.new("RGB", (100, 100))
+
+
+def test_evicts_least_recently_used_by_bytes():
+    """超出字节预算时淘汰最久未使用的条目"""
+    print("🧪 测试字节预算LRU...")
+    cache = ScaledImageCache(max_bytes=3 * TILE_BYTES)
+    for col in range(3):
+        cache.put((0.5, col, 0), _tile())
+    assert cache.get((0.5, 0, 0)) is not None  # 0号变为最近使用
+
+    cache.put((0.5, 3, 0), _tile())
+
+    assert (0.5, 1, 0) not in cache
+    assert (0.5, 0, 0) in cache and (0.5, 3, 0) in cache
+    assert cache.bytes_used == 3 * TILE_BYTES
+    assert cache.evictions == 1
+    print(f"✅ {cache.stats()}")
+
+
+def test_pinned_scale_never_evicted():
+    """固定的缩放比例不会被淘汰"""
+    cache = ScaledImageCache(max_bytes=2 * TILE_BYTES)
+    cache.pin_scale(0.25)
+    cache.put((0.25, 0, 0), _tile())
+    for col in range(5):
+        cache.put((2.0, col, 0), _tile())
+
+    assert (0.25, 0, 0) in cache
+    assert cache.bytes_used <= 2 * TILE_BYTES
+
+
+def test_counters_and_budget_change():
+    """命中、未命中计数，以及缩小预算时立即淘汰"""
+    cache = ScaledImageCache(max_bytes=10 * TILE_BYTES)
+    assert cache.get((1.0, 0, 0)) is None
+    cache.put((1.0, 0, 0), _tile())
+    cache.put((1.0, 0, 0), _tile())  # 覆盖写入不重复计算字节
+    cache.put((1.0, 1, 0), _tile())
+    assert cache.get((1.0, 0, 0)) is not None
+
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.bytes_used == 2 * TILE_BYTES
+
+    cache.set_max_bytes(TILE_BYTES)
+    assert len(cache) == 1 and (1.0, 0, 0) in cache
+
+
+def test_image_nbytes():
+    """按颜色模式估算内存"""
+    assert image_nbytes(Image.new("RGBA", (10, 10))) == 400
+    assert image_nbytes(Image.new("L", (10, 10))) == 100
+
+
+def main():
+    """主函数"""
+    print("🔧 缩放图片缓存测试")
+    print("=" * 40)
+    test_evicts_least_recently_used_by_bytes()
+    test_pinned_scale_never_evicted()
+    test_counters_and_budget_change()
+    test_image_nbytes()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+测试流式响应解析
+验证SSE事件解析和JSON数组的增量解析
+"""
+
+import json
+
+from stream_parser import IncrementalJSONArrayParser, iter_sse_text
+
+SAMPLE_CONTENT = '''```json
+[
+  {
+    "type": "对话气泡",
+    "original_text": "Say \\"hi\\" {now}!",
+    "translation": "说\\"嗨\\"{现在}！"
+  },
+  {
+    "type": "旁白",
+    "original_text": "[Meanwhile]",
+    "translation": "[与此同时]"
+  }
+]
+```'''
+
+
+class _FakeStreamResponse:
+    """模拟requests流式响应，只提供iter_lines"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.encoding = None
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_objects_emitted_as_they_close():
+    """对象在闭合时立即产出，且不受字符串中的括号和转义影响"""
+    print("🧪 测试增量JSON解析...")
+    for size in (1, 3, 7, len(SAMPLE_CONTENT)):
+        parser = IncrementalJSONArrayParser()
+        emitted = []
+        first_emit_at = None
+        for chunk in _chunks(SAMPLE_CONTENT, size):
+            new_items = parser.feed(chunk)
+            if new_items and first_emit_at is None:
+                first_emit_at = len(parser.text)
+            emitted.extend(new_items)
+
+        assert [item["translation"] for item in emitted] == ['说"嗨"{现在}！', "[与此同时]"]
+        assert parser.text == SAMPLE_CONTENT
+        # 分段喂入时，第一个对象在第二个对象开始之前就已产出
+        if size < len(SAMPLE_CONTENT):
+            assert first_emit_at < SAMPLE_CONTENT.index('"旁白"')
+    print("✅ 增量解析正常")
+
+
+def test_bracket_in_leading_prose():
+    """说明文字中的"["不会被当作结果数组的开头"""
+    content = '识别到的文字 [共2处]：\n' + SAMPLE_CONTENT
+    for size in (1, 4, len(content)):
+        parser = IncrementalJSONArrayParser()
+        emitted = []
+        for chunk in _chunks(content, size):
+            emitted.extend(parser.feed(chunk))
+        assert [item["translation"] for item in emitted] == ['说"嗨"{现在}！', "[与此同时]"]
+
+
+def test_openai_sse_stream():
+    """解析OpenAI兼容格式的SSE流"""
+    lines = [": keep-alive", ""]
+    for chunk in _chunks(SAMPLE_CONTENT, 20):
+        lines.append("data: " + json.dumps({"choices": [{"delta": {"content": chunk}}]}, ensure_ascii=False))
+    lines.append("data: [DONE]")
+
+    text = "".join(iter_sse_text(_FakeStreamResponse(lines), "openrouter"))
+    assert text == SAMPLE_CONTENT
+
+
+def test_anthropic_sse_stream():
+    """解析Anthropic Messages格式的SSE流"""
+    lines = ["event: message_start", 'data: {"type": "message_start", "message": {}}']
+    for chunk in _chunks(SAMPLE_CONTENT, 20):
+        event = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}}
+        lines.append("event: content_block_delta")
+        lines.append("data: " + json.dumps(event, ensure_ascii=False))
+    lines.append('data: {"type": "message_stop"}')
+
+    text = "".join(iter_sse_text(_FakeStreamResponse(lines), "anthropic"))
+    assert text == SAMPLE_CONTENT
+
+
+def test_error_event_raises():
+    """流中的错误事件抛出异常"""
+    lines = ['data: {"error": {"message": "rate limited"}}']
+    try:
+        list(iter_sse_text(_FakeStreamResponse(lines), "openai"))
+    except Exception as e:
+        assert "rate limited" in str(e)
+    else:
+        raise AssertionError("错误事件应当抛出异常")
+
+
+def main():
+    """主函数"""
+    print("🔧 流式响应解析测试")
+    print("=" * 40)
+    test_objects_emitted_as_they_close()
+    test_bracket_in_leading_prose()
+    test_openai_sse_stream()
+    test_anthropic_sse_stream()
+    test_error_event_raises()
+
+
+if __name__ == "__main__":
+    main()
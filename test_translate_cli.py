@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+测试命令行批量翻译
+验证输入展开、NDJSON逐页写出、失败记录以及 --skip-existing 的断点续传
+"""
+
+import io
+import json
+import os
+import tempfile
+import zipfile
+
+import translate_cli
+import translation_engine
+
+
+class _FakeEngine(translation_engine.TranslationEngine):
+    """模拟翻译引擎：每页单独一组，按文件名决定成功或失败"""
+
+    def __init__(self):
+        super().__init__(use_cache=False)
+        self.translated = []
+
+    def plan_page_groups(self, image_paths):
+        return [[path] for path in image_paths]
+
+    def translate_page_group(self, image_paths):
+        path = image_paths[0]
+        self.translated.append(path)
+        if "broken" in path:
+            raise RuntimeError("API调用失败")
+        return {path: [{"type": "对话", "original_text": "こんにちは", "translation": "你好"}]}
+
+
+def _touch(*parts):
+    path = os.path.join(*parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb"):
+        pass
+    return path
+
+
+def test_expand_inputs():
+    """通配符、文件夹和压缩包都展开为图片路径，重复的只保留一次"""
+    with tempfile.TemporaryDirectory() as root:
+        page1 = _touch(root, "ch 1", "1.jpg")
+        page2 = _touch(root, "ch 2", "1.jpg")
+        _touch(root, "ch 2", "notes.txt")
+        cbz = os.path.join(root, "extra.cbz")
+        with zipfile.ZipFile(cbz, "w") as archive:
+            archive.writestr("001.png", b"")
+
+        paths = translate_cli.expand_inputs([os.path.join(root, "ch *"), page1, cbz,
+                                             os.path.join(root, "missing.jpg")])
+
+        assert paths[:2] == [page1, page2]
+        assert len(paths) == 3 and paths[2].endswith("extra.cbz::001.png")
+
+
+def test_ndjson_written_per_page():
+    """每页写出一行NDJSON，失败的页记录错误并计数"""
+    print("🧪 测试NDJSON输出...")
+    engine = _FakeEngine()
+    output = io.StringIO()
+
+    failed = translate_cli.translate_all(engine, ["a.jpg", "broken.jpg", "c.jpg"], output, jobs=2)
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert failed == 1
+    assert [record["path"] for record in records] == ["a.jpg", "broken.jpg", "c.jpg"]
+    assert [record["status"] for record in records] == ["ok", "error", "ok"]
+    assert records[0]["results"][0]["translation"] == "你好"
+    assert "API调用失败" in records[1]["error"]
+    print("✅ 按页序逐行写出结果")
+
+
+def test_skip_existing_resumes_after_interruption():
+    """只跳过成功的页；中断时写了一半的行被忽略，续写的记录另起一行"""
+    with tempfile.TemporaryDirectory() as root:
+        output_path = os.path.join(root, "results.ndjson")
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"path": "a.jpg", "status": "ok", "results": []}) + "\n")
+            f.write(json.dumps({"path": "b.jpg", "status": "error", "error": "timeout"}) + "\n")
+            f.write('{"path": "c.jpg", "sta')  # 崩溃时写了一半
+
+        assert translate_cli.load_completed_paths(output_path) == {"a.jpg"}
+
+        engine = _FakeEngine()
+        with translate_cli.open_output(output_path) as output:
+            translate_cli.translate_all(engine, ["b.jpg", "c.jpg"], output, jobs=1)
+
+        assert engine.translated == ["b.jpg", "c.jpg"]
+        assert translate_cli.load_completed_paths(output_path) == {"a.jpg", "b.jpg", "c.jpg"}
+
+
+def main():
+    """主函数"""
+    print("🔧 命令行批量翻译测试")
+    print("=" * 40)
+    test_expand_inputs()
+    test_ndjson_written_per_page()
+    test_skip_existing_resumes_after_interruption()
+
+
+if __name__ == "__main__":
+    main()
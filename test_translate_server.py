@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+测试翻译任务服务
+启动本地模拟服务商和任务服务，验证提交图片/压缩包、轮询状态、取回结果、队列满时拒绝提交，
+以及按服务器路径提交只在指定目录内可用
+"""
+
+import copy
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+import config
+import http_transport
+import translate_server
+import translation_engine
+
+
+class _MockProviderHandler(BaseHTTPRequestHandler):
+    """模拟OpenAI兼容服务商：按图片张数返回固定的翻译结果"""
+
+    protocol_version = "HTTP/1.1"
+    request_count = 0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        _MockProviderHandler.request_count += 1
+
+        content = request["messages"][0]["content"]
+        images = sum(1 for part in content if part.get("type") == "image_url")
+        blocks = [{"type": "对话", "original_text": "Hello", "translation": f"你好{images}"}]
+        body = json.dumps({"choices": [{"message": {"content": json.dumps(blocks, ensure_ascii=False)}}]},
+                          ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def _make_image(size=(40, 30)):
+    output = io.BytesIO()
+    Image.new("RGB", size, "white").save(output, format="PNG")
+    return output.getvalue()
+
+
+def _request(base_url, path, data=None, content_type="application/octet-stream"):
+    """发送请求，返回 (状态码, JSON)"""
+    request = urllib.request.Request(base_url + path, data=data)
+    if data is not None:
+        request.add_header("Content-Type", content_type)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _wait_done(base_url, job_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        _, status = _request(base_url, f"/jobs/{job_id}")
+        if status["status"] == translate_server.JOB_DONE:
+            return status
+        time.sleep(0.05)
+    raise AssertionError("任务未在限定时间内完成")
+
+
+class _Services:
+    """模拟服务商 + 翻译任务服务"""
+
+    def __init__(self, workers=1, queue_size=10, start_workers=True, paths_root=None):
+        self.provider = _start(ThreadingHTTPServer(("127.0.0.1", 0), _MockProviderHandler))
+
+        manager = config.ConfigManager()
+        manager.config = copy.deepcopy(config.DEFAULT_CONFIG)
+        manager.config["api_provider"] = "custom"
+        manager.config["custom"].update(api_key="test",
+                                        base_url=f"http://127.0.0.1:{self.provider.server_port}")
+        manager.config["advanced_settings"] = {}
+
+        engine = translation_engine.TranslationEngine(manager, use_cache=False)
+        self.job_manager = translate_server.JobManager(engine, workers, page_concurrency=2,
+                                                       queue_size=queue_size)
+        if start_workers:
+            self.job_manager.start()
+        self.server = _start(translate_server.create_server("127.0.0.1", 0, self.job_manager, paths_root))
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.job_manager.stop(timeout=5)
+        self.provider.shutdown()
+        self.provider.server_close()
+        http_transport.close_all()
+
+
+def test_submit_image_and_poll():
+    """上传单张图片，轮询到完成后取回结果"""
+    print("🧪 测试提交图片...")
+    services = _Services()
+    try:
+        status, job = _request(services.base_url, "/jobs?name=page01.png", _make_image())
+        assert status == 202 and job["total"] == 1
+
+        finished = _wait_done(services.base_url, job["job_id"])
+        assert finished["done"] == 1 and finished["failed"] == 0
+
+        status, results = _request(services.base_url, f"/jobs/{job['job_id']}/results")
+        assert status == 200
+        assert results["pages"] == [{"page": "page01.png", "status": "ok",
+                                     "results": [{"type": "对话", "original_text": "Hello",
+                                                  "translation": "你好1"}]}]
+        print("✅ 图片任务完成")
+    finally:
+        services.close()
+
+
+def test_submit_archive_in_natural_order():
+    """上传CBZ，包内图片按自然顺序逐页翻译"""
+    services = _Services()
+    try:
+        archive_data = io.BytesIO()
+        with zipfile.ZipFile(archive_data, "w") as archive:
+            archive.writestr("10.png", _make_image())
+            archive.writestr("2.png", _make_image())
+            archive.writestr("notes.txt", b"")
+
+        status, job = _request(services.base_url, "/jobs?name=vol1.cbz", archive_data.getvalue())
+        assert status == 202 and job["total"] == 2
+
+        _wait_done(services.base_url, job["job_id"])
+        _, results = _request(services.base_url, f"/jobs/{job['job_id']}/results")
+        assert [page["page"] for page in results["pages"]] == ["vol1.cbz::2.png", "vol1.cbz::10.png"]
+        assert all(page["status"] == "ok" for page in results["pages"])
+    finally:
+        services.close()
+
+
+def test_archive_limits():
+    """按目录中的解压后大小和图片张数拒绝过大的压缩包；通过的压缩包保存为临时文件逐页读取"""
+    print("🧪 测试压缩包限制...")
+    archive_data = io.BytesIO()
+    with zipfile.ZipFile(archive_data, "w", zipfile.ZIP_DEFLATED) as archive:
+        for index in range(3):
+            archive.writestr(f"{index}.png", b"\0" * 10000)
+    data = archive_data.getvalue()
+
+    limits = (translate_server.MAX_ARCHIVE_MEMBERS, translate_server.MAX_ARCHIVE_MEMBER_BYTES,
+              translate_server.MAX_ARCHIVE_UNCOMPRESSED_BYTES)
+    services = _Services(start_workers=False)
+    try:
+        for members, member_bytes, total_bytes in ((2, 10000, 30000), (3, 9999, 30000), (3, 10000, 29999)):
+            (translate_server.MAX_ARCHIVE_MEMBERS, translate_server.MAX_ARCHIVE_MEMBER_BYTES,
+             translate_server.MAX_ARCHIVE_UNCOMPRESSED_BYTES) = members, member_bytes, total_bytes
+            status, body = _request(services.base_url, "/jobs?name=big.cbz", data)
+            assert status == 400 and "error" in body
+
+        translate_server.MAX_ARCHIVE_MEMBER_BYTES = 10000
+        translate_server.MAX_ARCHIVE_UNCOMPRESSED_BYTES = 30000
+        translate_server.MAX_ARCHIVE_MEMBERS = 3
+        pages, temp_path = translate_server.pages_from_upload(data, "ok.cbz")
+        assert [name for name, _ in pages] == ["ok.cbz::0.png", "ok.cbz::1.png", "ok.cbz::2.png"]
+        assert translation_engine.read_image(pages[1][1]) == b"\0" * 10000
+        translate_server.discard_temp_archive(temp_path)
+        assert not os.path.exists(temp_path)
+        print("✅ 过大的压缩包被拒绝")
+    finally:
+        (translate_server.MAX_ARCHIVE_MEMBERS, translate_server.MAX_ARCHIVE_MEMBER_BYTES,
+         translate_server.MAX_ARCHIVE_UNCOMPRESSED_BYTES) = limits
+        services.close()
+
+
+def test_queue_full_and_errors():
+    """队列满时返回503，未知任务返回404，错误的JSON请求返回400"""
+    print("🧪 测试错误处理...")
+    services = _Services(queue_size=1, start_workers=False)
+    try:
+        assert _request(services.base_url, "/jobs", _make_image())[0] == 202
+        status, body = _request(services.base_url, "/jobs", _make_image())
+        assert status == 503 and "error" in body
+
+        assert _request(services.base_url, "/jobs/unknown")[0] == 404
+        # 未指定 --paths-root 时不接受按服务器路径提交
+        assert _request(services.base_url, "/jobs", b'{"paths": ["/etc"]}', "application/json")[0] == 403
+
+        status, health = _request(services.base_url, "/health")
+        assert status == 200 and health["queued"] == 1
+        print("✅ 错误处理正常")
+    finally:
+        services.close()
+
+
+def test_paths_limited_to_root():
+    """按服务器路径提交时只能读取指定目录内的文件，目录外（包括..和符号链接）返回403"""
+    print("🧪 测试路径限制...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, "comics")
+        os.makedirs(os.path.join(root, "vol1"))
+        with open(os.path.join(root, "vol1", "01.png"), "wb") as f:
+            f.write(_make_image())
+        with open(os.path.join(temp_dir, "secret.png"), "wb") as f:
+            f.write(_make_image())
+
+        services = _Services(paths_root=root)
+        try:
+            def submit(paths):
+                return _request(services.base_url, "/jobs", json.dumps({"paths": paths}).encode("utf-8"),
+                                "application/json")
+
+            status, job = submit(["vol1"])
+            assert status == 202 and job["total"] == 1
+            _wait_done(services.base_url, job["job_id"])
+            _, results = _request(services.base_url, f"/jobs/{job['job_id']}/results")
+            assert [page["page"] for page in results["pages"]] == [os.path.join("vol1", "01.png")]
+
+            assert submit(["../secret.png"])[0] == 403
+            assert submit([os.path.join(temp_dir, "secret.png")])[0] == 403
+            assert submit(["*.png"])[0] == 400
+            assert _request(services.base_url, "/jobs", b'{"files": []}', "application/json")[0] == 400
+
+            if hasattr(os, "symlink"):
+                os.symlink(os.path.join(temp_dir, "secret.png"), os.path.join(root, "vol1", "02.png"))
+                assert submit(["vol1"])[0] == 403
+            print("✅ 只能提交允许目录内的文件")
+        finally:
+            services.close()
+
+
+def main():
+    """主函数"""
+    print("🔧 翻译任务服务测试")
+    print("=" * 40)
+    test_submit_image_and_poll()
+    test_submit_archive_in_natural_order()
+    test_archive_limits()
+    test_queue_full_and_errors()
+    test_paths_limited_to_root()
+
+
+if __name__ == "__main__":
+    main()
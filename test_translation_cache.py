@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+测试翻译缓存
+验证缓存键、持久化读取以及按容量的LRU淘汰
+"""
+
+import json
+import os
+import tempfile
+
+from translation_cache import TranslationCache, is_cacheable
+
+SAMPLE_RESULTS = [
+    {"type": "对话气泡", "original_text": "Hello world", "translation": "你好世界"}
+]
+
+
+def _make_key(image_bytes=b"image", language="中文", prompt="prompt", base_url="https://api.example.com/v1"):
+    return TranslationCache.make_key(image_bytes, "custom", base_url, "model", language, "自然", prompt)
+
+
+def test_key_depends_on_all_inputs():
+    """任一输入变化都会得到不同的缓存键"""
+    print("🧪 测试缓存键...")
+    base = _make_key()
+    assert base == _make_key()
+    assert base != _make_key(image_bytes=b"other")
+    assert base != _make_key(language="日文")
+    assert base != _make_key(prompt="prompt2")
+    assert base != _make_key(base_url="https://other.example.com/v1")
+    print("✅ 缓存键正确")
+
+
+def test_persistence_across_instances():
+    """重新打开缓存后仍能读取之前的结果"""
+    print("🧪 测试缓存持久化...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "cache.db")
+        key = _make_key()
+
+        cache = TranslationCache(db_path)
+        assert cache.get(key) is None
+        cache.put(key, SAMPLE_RESULTS)
+        cache.close()
+
+        reopened = TranslationCache(db_path)
+        assert reopened.get(key) == SAMPLE_RESULTS
+        assert reopened.hits == 1
+        reopened.close()
+    print("✅ 缓存持久化正常")
+
+
+def test_lru_eviction_by_size():
+    """超过容量上限时淘汰最久未使用的条目"""
+    print("🧪 测试容量淘汰...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        entry_size = len(json.dumps(SAMPLE_RESULTS, ensure_ascii=False).encode("utf-8"))
+        cache = TranslationCache(os.path.join(temp_dir, "cache.db"), max_bytes=entry_size * 3)
+
+        keys = [_make_key(image_bytes=bytes([i])) for i in range(3)]
+        for key in keys:
+            cache.put(key, SAMPLE_RESULTS)
+
+        # 访问第一个条目，使第二个成为最久未使用
+        cache.get(keys[0])
+        cache.put(_make_key(image_bytes=b"new"), SAMPLE_RESULTS)
+
+        assert cache.total_bytes() <= cache.max_bytes
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) == SAMPLE_RESULTS
+        cache.close()
+    print("✅ 容量淘汰正常")
+
+
+def test_error_results_not_cacheable():
+    """空结果和解析错误不写入缓存"""
+    assert is_cacheable(SAMPLE_RESULTS)
+    assert not is_cacheable([])
+    assert not is_cacheable([{"type": "解析错误", "original_text": "", "translation": ""}])
+
+
+def main():
+    """主函数"""
+    print("🔧 翻译缓存测试")
+    print("=" * 40)
+    test_key_depends_on_all_inputs()
+    test_persistence_across_instances()
+    test_lru_eviction_by_size()
+    test_error_results_not_cacheable()
+
+
+if __name__ == "__main__":
+    main()
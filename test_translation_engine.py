@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+测试翻译引擎库接口
+用替换的请求阶段代替真实API，验证单张/批量/异步翻译、阶段替换、多页合并，以及引擎不导入tkinter
+"""
+
+import asyncio
+import copy
+import io
+import json
+import subprocess
+import sys
+import threading
+import time
+
+from PIL import Image
+
+import config
+import translation_engine
+
+
+def _make_manager(**advanced_settings):
+    """使用默认配置的配置管理器（不读写用户配置文件）"""
+    manager = config.ConfigManager()
+    manager.config = copy.deepcopy(config.DEFAULT_CONFIG)
+    manager.config["advanced_settings"] = dict(advanced_settings)
+    return manager
+
+
+def _make_image(size=(64, 48)):
+    """生成一张PNG图片（模拟请求阶段按宽度返回文本）"""
+    image = Image.new("RGB", size, "white")
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+class _FakeRequester:
+    """模拟请求阶段：按图片尺寸决定返回的文本，记录每次请求的图片数"""
+
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, images, prompt, context, on_block=None, max_tokens=4000):
+        with self.lock:
+            self.requests.append(len(images))
+        blocks = []
+        for upload_data, _ in images:
+            with Image.open(io.BytesIO(upload_data)) as img:
+                width = img.size[0]
+            if width == 13:
+                raise RuntimeError("API调用失败")
+            blocks.append([{"type": "对话", "original_text": f"w{width}", "translation": f"宽{width}"}])
+
+        if len(images) == 1:
+            return "```json\n" + json.dumps(blocks[0], ensure_ascii=False) + "\n```"
+        return json.dumps({str(page): page_blocks for page, page_blocks in enumerate(blocks, 1)},
+                          ensure_ascii=False)
+
+
+def test_translate_single_image():
+    """图片字节经过编码、请求、解析三个阶段得到翻译结果"""
+    print("🧪 测试单张翻译...")
+    requester = _FakeRequester()
+    engine = translation_engine.TranslationEngine(_make_manager(), use_cache=False, requester=requester)
+
+    results = engine.translate(_make_image())
+
+    assert results == [{"type": "对话", "original_text": "w64", "translation": "宽64"}]
+    assert requester.requests == [1]
+    print("✅ 单张翻译正常")
+
+
+def test_custom_stages():
+    """编码和解析阶段可以单独替换"""
+    encoded = []
+
+    def encoder(image_data, upload_settings):
+        encoded.append(len(image_data))
+        return image_data, "image/png"
+
+    def parser(content):
+        return [{"type": "原样", "original_text": "", "translation": content[:7]}]
+
+    engine = translation_engine.TranslationEngine(_make_manager(), use_cache=False, encoder=encoder,
+                                                  requester=_FakeRequester(), parser=parser)
+    results = engine.translate(_make_image())
+
+    assert len(encoded) == 1
+    assert results[0]["translation"] == "```json"
+
+
+def test_translate_many_keeps_order_and_isolates_errors():
+    """批量翻译按输入顺序产出，某张失败不影响其他图片"""
+    print("🧪 测试批量翻译...")
+    engine = translation_engine.TranslationEngine(_make_manager(), use_cache=False, requester=_FakeRequester())
+    images = [_make_image((20, 20)), _make_image((13, 20)), _make_image((30, 20))]
+
+    outputs = list(engine.translate_many(images, concurrency=3))
+
+    assert [image for image, _, _ in outputs] == images
+    assert outputs[0][1][0]["translation"] == "宽20" and outputs[0][2] is None
+    assert outputs[1][1] is None and "API调用失败" in str(outputs[1][2])
+    assert outputs[2][1][0]["translation"] == "宽30"
+    print("✅ 批量翻译顺序正确")
+
+
+def test_tiles_share_concurrency_bound():
+    """多页并发时各页的切片请求共用批量并发数，在途请求不会变成并发数的平方"""
+    print("🧪 测试切片并发上限...")
+
+    class _CountingRequester(_FakeRequester):
+        def __init__(self):
+            super().__init__()
+            self.in_flight = 0
+            self.peak = 0
+
+        def __call__(self, images, prompt, context, on_block=None, max_tokens=4000):
+            with self.lock:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+            try:
+                time.sleep(0.02)
+                return super().__call__(images, prompt, context, on_block, max_tokens)
+            finally:
+                with self.lock:
+                    self.in_flight -= 1
+
+    requester = _CountingRequester()
+    engine = translation_engine.TranslationEngine(
+        _make_manager(batch_concurrency=2, tile_height=400, tile_overlap=0), use_cache=False, requester=requester)
+    images = [_make_image((100 + index, 1600)) for index in range(3)]
+
+    outputs = list(engine.translate_many(images, concurrency=3))
+
+    assert all(error is None for _, _, error in outputs)
+    assert len(requester.requests) == 12 and requester.peak <= 2
+    print(f"✅ 切片请求最多 {requester.peak} 个同时在途")
+
+
+def test_translate_many_packs_small_pages():
+    """开启多页合并时相邻小图合并为一次请求，结果拆回每一张"""
+    requester = _FakeRequester()
+    engine = translation_engine.TranslationEngine(
+        _make_manager(pack_small_pages=True, pack_max_pages=2), use_cache=False, requester=requester)
+    images = [_make_image((20, 20)), _make_image((21, 20)), _make_image((22, 20))]
+
+    outputs = list(engine.translate_many(images, concurrency=1))
+
+    assert sorted(requester.requests) == [1, 2]
+    assert [results[0]["translation"] for _, results, _ in outputs] == ["宽20", "宽21", "宽22"]
+
+
+def test_custom_parser_used_for_packed_pages():
+    """多页合并请求拆分后，每页同样交给替换的解析阶段"""
+    parsed = []
+
+    def parser(content):
+        parsed.append(content)
+        items = json.loads(content)
+        return [{"type": "自定义", "original_text": "", "translation": item["translation"].upper()} for item in items]
+
+    requester = _FakeRequester()
+    engine = translation_engine.TranslationEngine(
+        _make_manager(pack_small_pages=True, pack_max_pages=2), use_cache=False, requester=requester,
+        parser=parser)
+    images = [_make_image((20, 20)), _make_image((21, 20))]
+
+    results = engine.translate_packed(images)
+
+    assert requester.requests == [2] and len(parsed) == 2
+    assert [results[image][0]["type"] for image in images] == ["自定义", "自定义"]
+
+
+def test_async_variants():
+    """异步接口与同步接口结果一致"""
+    print("🧪 测试异步翻译...")
+    engine = translation_engine.TranslationEngine(_make_manager(), use_cache=False, requester=_FakeRequester())
+    images = [_make_image((20, 20)), _make_image((30, 20))]
+
+    async def run():
+        single = await engine.translate_async(images[0])
+        many = [results async for _, results, _ in engine.translate_many_async(images, concurrency=2)]
+        return single, many
+
+    single, many = asyncio.run(run())
+    assert single[0]["translation"] == "宽20"
+    assert [results[0]["translation"] for results in many] == ["宽20", "宽30"]
+    print("✅ 异步翻译正常")
+
+
+def test_engine_does_not_import_tkinter():
+    """导入引擎不会加载tkinter（命令行和服务端不需要图形界面）"""
+    code = "import sys, translation_engine; sys.exit(1 if 'tkinter' in sys.modules else 0)"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
+
+
+def test_build_request_data():
+    """按服务商构建请求头、地址和请求体"""
+    provider_config = {"api_key": "k", "base_url": "https://api.example.com/v1", "model_name": "m",
+                       "headers": {"X-Extra": "1"}}
+
+    assert translation_engine.build_headers("custom", provider_config)["X-Extra"] == "1"
+    assert "anthropic-version" in translation_engine.build_headers("anthropic", provider_config)
+    assert translation_engine.endpoint_url("anthropic", provider_config).endswith("/messages")
+    assert translation_engine.endpoint_url("openai", provider_config).endswith("/chat/completions")
+    assert translation_engine.build_request_data("anthropic", provider_config, "hi", 100)["max_tokens"] == 100
+    # 多页合并需要更大的输出上限，OpenAI兼容接口也要带上，否则按服务商默认值截断
+    assert translation_engine.build_request_data("openai", provider_config, "hi", 8000)["max_tokens"] == 8000
+    assert translation_engine.image_content_part("openai", b"x", "image/png")["image_url"]["url"] == \
+        "data:image/png;base64,eA=="
+
+
+def main():
+    """主函数"""
+    print("🔧 翻译引擎测试")
+    print("=" * 40)
+    test_translate_single_image()
+    test_custom_stages()
+    test_translate_many_keeps_order_and_isolates_errors()
+    test_tiles_share_concurrency_bound()
+    test_translate_many_packs_small_pages()
+    test_custom_parser_used_for_packed_pages()
+    test_async_variants()
+    test_engine_does_not_import_tkinter()
+    test_build_request_data()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+测试翻译日志
+验证重放、崩溃时半行记录的容错以及压缩重写
+"""
+
+import os
+import tempfile
+
+from translation_journal import TranslationJournal
+
+RESULT = [{"type": "对话气泡", "original_text": "Hi", "translation": "嗨"}]
+
+
+def test_replay_restores_list_and_results():
+    """重放日志恢复图片列表和翻译结果"""
+    print("🧪 测试日志重放...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "journal.jsonl")
+        journal = TranslationJournal(path)
+        journal.record_images_added(["a.png", "b.png", "c.png"])
+        journal.record_result("a.png", RESULT)
+        journal.record_result("b.png", RESULT)
+        journal.record_image_removed("b.png")
+        journal.record_images_added(["d.png"])
+        journal.record_result("d.png", RESULT)
+        journal.record_result_cleared("d.png")
+        journal.close()
+
+        image_list, results = TranslationJournal(path).load()
+
+        assert image_list == ["a.png", "c.png", "d.png"]
+        assert results == {"a.png": RESULT}
+    print("✅ 重放正常")
+
+
+def test_truncated_last_line_ignored():
+    """崩溃时写了一半的记录被忽略，之后追加的记录不受影响"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "journal.jsonl")
+        journal = TranslationJournal(path)
+        journal.record_images_added(["a.png", "b.png"])
+        journal.record_result("a.png", RESULT)
+        journal.close()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"op": "result", "path": "b.png", "resu')
+
+        journal = TranslationJournal(path)
+        image_list, results = journal.load()
+        assert image_list == ["a.png", "b.png"]
+        assert list(results) == ["a.png"]
+
+        journal.record_result("b.png", RESULT)
+        journal.close()
+        _, results = TranslationJournal(path).load()
+        assert sorted(results) == ["a.png", "b.png"]
+
+
+def test_compaction_keeps_state():
+    """日志膨胀后压缩重写，状态不变且记录数减少"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "journal.jsonl")
+        journal = TranslationJournal(path)
+        journal.record_images_added(["a.png"])
+        for _ in range(20):
+            journal.record_result("a.png", RESULT)
+        journal.close()
+
+        image_list, results = TranslationJournal(path).load()
+        with open(path, encoding="utf-8") as f:
+            line_count = sum(1 for _ in f)
+
+        assert image_list == ["a.png"] and results == {"a.png": RESULT}
+        assert line_count == 2
+        assert TranslationJournal(path).load() == (image_list, results)
+
+
+def test_large_library_replay_keeps_order():
+    """上万页的日志重放：增删后顺序与列表语义一致，重新添加的图片排到末尾"""
+    print("🧪 测试大列表重放...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "journal.jsonl")
+        journal = TranslationJournal(path)
+        pages = [f"p{i:05d}.png" for i in range(10000)]
+        journal.record_images_added(pages)
+        for image_path in pages[::2]:
+            journal.record_image_removed(image_path)
+        journal.record_images_added([pages[0], pages[1]])
+        journal.close()
+
+        image_list, _ = TranslationJournal(path).load()
+
+        assert image_list == pages[1::2] + [pages[0]]
+    print("✅ 大列表重放正常")
+
+
+def main():
+    """主函数"""
+    print("🔧 翻译日志测试")
+    print("=" * 40)
+    test_replay_restores_list_and_results()
+    test_truncated_last_line_ignored()
+    test_compaction_keeps_state()
+    test_large_library_replay_keeps_order()
+
+
+if __name__ == "__main__":
+    main()
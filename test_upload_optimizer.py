@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+测试上传优化
+验证缩小、重新编码、MIME类型以及坐标映射
+"""
+
+import io
+
+from PIL import Image
+
+import upload_optimizer
+
+
+def _encode(image, image_format, **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **kwargs)
+    return buffer.getvalue()
+
+
+def test_large_png_downscaled_to_jpeg():
+    """大尺寸PNG被缩小并转为JPEG"""
+    print("🧪 测试大图缩小...")
+    source = _encode(Image.new("RGB", (4000, 3000), (200, 30, 30)), "PNG")
+
+    data, mime_type, scale = upload_optimizer.prepare_image_for_upload(source, max_edge=2000)
+
+    with Image.open(io.BytesIO(data)) as result:
+        assert result.format == "JPEG"
+        assert result.size == (2000, 1500)
+    assert mime_type == "image/jpeg"
+    assert abs(scale - 0.5) < 1e-6
+    print(f"✅ {len(source)} → {len(data)} 字节, 缩放比例 {scale}")
+
+
+def test_small_jpeg_sent_unchanged():
+    """尺寸合适的JPEG原样上传"""
+    source = _encode(Image.new("RGB", (800, 1200), (10, 10, 10)), "JPEG", quality=90)
+
+    data, mime_type, scale = upload_optimizer.prepare_image_for_upload(source, max_edge=2048)
+
+    assert data == source
+    assert mime_type == "image/jpeg"
+    assert scale == 1.0
+
+
+def test_webp_mime_and_transparency():
+    """透明PNG转WebP/JPEG时MIME类型正确"""
+    source = _encode(Image.new("RGBA", (300, 300), (0, 0, 0, 0)), "PNG")
+
+    _, webp_mime, _ = upload_optimizer.prepare_image_for_upload(source, max_edge=100, output_format="WEBP")
+    jpeg_data, jpeg_mime, _ = upload_optimizer.prepare_image_for_upload(source, max_edge=100)
+
+    assert webp_mime == "image/webp"
+    assert jpeg_mime == "image/jpeg"
+    with Image.open(io.BytesIO(jpeg_data)) as result:
+        assert result.getpixel((50, 50)) == (255, 255, 255)
+
+
+def test_boxes_mapped_back_to_original():
+    """检测框坐标按缩放比例映射回原图"""
+    detections = [{"box_2d": [100, 50, 200, 150], "text_content": "HI"}]
+    mapped = upload_optimizer.scale_detections_to_original(detections, 0.5)
+
+    assert mapped[0]["box_2d"] == [200, 100, 400, 300]
+    assert detections[0]["box_2d"] == [100, 50, 200, 150]
+
+
+def main():
+    """主函数"""
+    print("🔧 上传优化测试")
+    print("=" * 40)
+    test_large_png_downscaled_to_jpeg()
+    test_small_jpeg_sent_unchanged()
+    test_webp_mime_and_transparency()
+    test_boxes_mapped_back_to_original()
+
+
+if __name__ == "__main__":
+    main()
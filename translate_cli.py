@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+命令行批量全图翻译
+不需要图形界面，可在无显示器的Linux服务器上运行：
+接受图片文件、通配符、文件夹或CBZ/ZIP压缩包，按 --jobs 指定的并发数翻译，
+每完成一页就向NDJSON文件追加一行结果，中断后用 --skip-existing 跳过已完成的页继续
+
+用法示例:
+    python translate_cli.py "漫画/第*话" series.cbz -o results.ndjson --jobs 4 --skip-existing
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+from typing import Iterable, List, Set
+
+import config
+import folder_scanner
+import rate_limiter
+import translation_engine
+
+
+def expand_inputs(inputs: Iterable[str]) -> List[str]:
+    """
+    展开命令行输入：通配符匹配后，文件夹递归扫描、压缩包展开为包内图片（去重并保持顺序）
+
+    Args:
+        inputs: 图片文件、通配符、文件夹或压缩包
+
+    Returns:
+        图片路径列表
+    """
+    paths = []
+    for pattern in inputs:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True), key=folder_scanner.natural_sort_key)
+            if not matches:
+                print(f"⚠️ 没有匹配的文件: {pattern}", file=sys.stderr)
+            paths.extend(matches)
+        elif os.path.exists(pattern):
+            paths.append(pattern)
+        else:
+            print(f"⚠️ 文件不存在: {pattern}", file=sys.stderr)
+
+    images = []
+    for chunk in folder_scanner.scan_paths(paths):
+        images.extend(chunk)
+    return list(dict.fromkeys(images))
+
+
+def load_completed_paths(output_path: str) -> Set[str]:
+    """读取已有的NDJSON结果文件，返回已成功翻译的图片路径（中断时写了一半的最后一行被忽略）"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and record.get("status") == "ok" and record.get("path"):
+                completed.add(record["path"])
+    return completed
+
+
+def open_output(output_path: str):
+    """以追加方式打开结果文件；上次中断留下的半行单独成行，避免和新记录粘在一起"""
+    needs_newline = False
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+
+    output = open(output_path, 'a', encoding='utf-8')
+    if needs_newline:
+        output.write("\n")
+    return output
+
+
+def write_record(output, record: dict):
+    """追加一行NDJSON并立即写出"""
+    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    output.flush()
+
+
+def translate_all(engine: translation_engine.TranslationEngine, image_paths: List[str], output,
+                  jobs: int) -> int:
+    """
+    并发翻译并按页序写出结果
+
+    Returns:
+        失败的页数
+    """
+    total = len(image_paths)
+    failed_count = 0
+
+    for done_count, (image_path, results, error) in enumerate(engine.translate_many(image_paths, jobs), 1):
+        if error is None:
+            write_record(output, {"path": image_path, "status": "ok", "results": results,
+                                  "time": time.time()})
+            print(f"✅ [{done_count}/{total}] {image_path}: {len(results)} 个文本块", file=sys.stderr)
+        else:
+            failed_count += 1
+            message = str(error)
+            if isinstance(error, rate_limiter.RetryableError):
+                message = f"重试次数用尽，已跳过: {message}"
+            write_record(output, {"path": image_path, "status": "error", "error": message,
+                                  "time": time.time()})
+            print(f"❌ [{done_count}/{total}] {image_path}: {message}", file=sys.stderr)
+
+    return failed_count
+
+
+def main():
+    """主函数"""
+    manager = config.config_manager
+    parser = argparse.ArgumentParser(description='漫画全图翻译（命令行批量模式）')
+    parser.add_argument('inputs', nargs='+', help='图片文件、通配符、文件夹或CBZ/ZIP压缩包')
+    parser.add_argument('-o', '--output', default='-',
+                        help='NDJSON结果文件，每页一行（默认输出到标准输出）')
+    parser.add_argument('-j', '--jobs', type=int, default=manager.get_batch_concurrency(),
+                        help='同时翻译的请求数（默认使用高级设置中的批量并发数）')
+    parser.add_argument('--skip-existing', action='store_true',
+                        help='跳过结果文件中已成功翻译的图片')
+    parser.add_argument('--no-cache', action='store_true', help='跳过翻译缓存，强制重新调用API')
+
+    args = parser.parse_args()
+
+    if args.jobs < 1:
+        parser.error("--jobs 必须大于0")
+    if args.skip_existing and args.output == '-':
+        parser.error("--skip-existing 需要用 -o 指定结果文件")
+
+    # 检查API密钥
+    api_key = manager.get_current_api_key()
+    if not api_key or api_key.startswith("<"):
+        print("错误: 当前服务商的API密钥未配置，请先在图形界面的设置中配置", file=sys.stderr)
+        sys.exit(1)
+
+    image_paths = expand_inputs(args.inputs)
+    if args.skip_existing:
+        completed = load_completed_paths(args.output)
+        skipped = sum(1 for path in image_paths if path in completed)
+        image_paths = [path for path in image_paths if path not in completed]
+        if skipped:
+            print(f"⏭️ 跳过已完成的 {skipped} 张图片", file=sys.stderr)
+
+    if not image_paths:
+        print("没有需要翻译的图片", file=sys.stderr)
+        return
+
+    print(f"🚀 开始翻译 {len(image_paths)} 张图片，并发数 {args.jobs}", file=sys.stderr)
+    engine = translation_engine.TranslationEngine(manager, use_cache=False if args.no_cache else None)
+
+    # 翻译过程中的调试输出改写到标准错误，标准输出只保留NDJSON结果
+    with contextlib.ExitStack() as stack:
+        if args.output == '-':
+            output = sys.stdout
+        else:
+            output = stack.enter_context(open_output(args.output))
+        stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        failed_count = translate_all(engine, image_paths, output, args.jobs)
+
+    print(f"🏁 完成: 成功 {len(image_paths) - failed_count} 张，失败 {failed_count} 张", file=sys.stderr)
+    if failed_count:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,504 @@
+# -*- coding: utf-8 -*-
+"""
+翻译任务服务
+用标准库的HTTP服务器把全图翻译作为本地服务提供给爬虫等其他程序：
+提交图片或CBZ/ZIP压缩包后立即返回任务ID，任务在有界队列中排队、由固定数量的工作线程执行，
+客户端轮询任务状态并取回结果；所有客户端共用同一个翻译引擎，连接池、限流器和翻译缓存都保持热状态
+
+接口:
+    POST /jobs                    请求体为图片或压缩包的字节（?name=名称 可选），
+                                  或JSON {"paths": [服务器本地的图片/文件夹/压缩包], "name": 名称}
+                                  （仅在以 --paths-root 启动时可用，且路径必须位于该目录内）
+    GET  /jobs                    所有任务的状态
+    GET  /jobs/<任务ID>            任务状态和进度
+    GET  /jobs/<任务ID>/results    已完成各页的翻译结果（按页序）
+    GET  /health                  服务状态
+
+用法示例:
+    python translate_server.py --port 8765 --workers 2 --jobs 4
+    curl --data-binary @page01.jpg "http://127.0.0.1:8765/jobs?name=page01.jpg"
+    python translate_server.py --paths-root D:/comics
+    curl -H "Content-Type: application/json" -d '{"paths": ["vol1"]}' http://127.0.0.1:8765/jobs
+"""
+
+import argparse
+import glob
+import io
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import config
+import archive_reader
+import folder_scanner
+import rate_limiter
+import translate_cli
+import translation_engine
+
+# 单次上传的最大字节数
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+# 上传压缩包的限制（按压缩包目录中记录的解压后大小检查，防止压缩炸弹）
+MAX_ARCHIVE_MEMBERS = 5000
+MAX_ARCHIVE_MEMBER_BYTES = 100 * 1024 * 1024
+MAX_ARCHIVE_UNCOMPRESSED_BYTES = 2 * 1024 * 1024 * 1024
+# 排队中的任务数上限，超出时拒绝提交（503）
+DEFAULT_QUEUE_SIZE = 100
+# 保留的已结束任务数，超出时丢弃最早提交的已结束任务
+MAX_FINISHED_JOBS = 1000
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+
+
+class TranslationJob:
+    """
+    一个翻译任务
+
+    Args:
+        name: 任务名称（上传的文件名或客户端指定的名称）
+        pages: [(页面名称, 图片路径或图片字节), ...]，按页序排列
+        temp_path: 上传压缩包保存的临时文件，任务结束后删除
+    """
+
+    def __init__(self, name: str, pages: List[Tuple[str, translation_engine.ImageInput]],
+                 temp_path: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.pages = pages      # 任务结束后释放，只保留结果
+        self.temp_path = temp_path
+        self.total = len(pages)
+        self.status = JOB_QUEUED
+        self.page_results = []  # 已完成的页，按页序
+        self.failed_count = 0
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.lock = threading.Lock()
+
+    def add_result(self, page_name: str, results: Optional[List[Dict]], error: Optional[Exception]):
+        """记录一页的翻译结果"""
+        if error is None:
+            record = {"page": page_name, "status": "ok", "results": results}
+        else:
+            message = str(error)
+            if isinstance(error, rate_limiter.RetryableError):
+                message = f"重试次数用尽，已跳过: {message}"
+            record = {"page": page_name, "status": "error", "error": message}
+        with self.lock:
+            self.page_results.append(record)
+            if error is not None:
+                self.failed_count += 1
+
+    def release(self):
+        """释放页面并删除临时压缩包（任务结束或不再执行时调用）"""
+        self.pages = []
+        if self.temp_path is not None:
+            discard_temp_archive(self.temp_path)
+            self.temp_path = None
+
+    def to_status(self) -> Dict:
+        """任务状态（不含翻译结果）"""
+        with self.lock:
+            return {
+                "job_id": self.id,
+                "name": self.name,
+                "status": self.status,
+                "total": self.total,
+                "done": len(self.page_results),
+                "failed": self.failed_count,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished
+            }
+
+    def to_results(self) -> Dict:
+        """任务状态和已完成各页的翻译结果"""
+        status = self.to_status()
+        with self.lock:
+            status["pages"] = list(self.page_results)
+        return status
+
+
+class JobManager:
+    """
+    任务队列：有界排队，固定数量的工作线程依次取出任务翻译
+
+    Args:
+        engine: 翻译引擎（所有任务共用）
+        workers: 同时执行的任务数
+        page_concurrency: 每个任务同时在途的请求数，不提供时使用高级设置中的批量并发数
+        queue_size: 排队中的任务数上限
+    """
+
+    def __init__(self, engine: translation_engine.TranslationEngine, workers: int = 1,
+                 page_concurrency: int = None, queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.engine = engine
+        self.workers = max(1, workers)
+        self.page_concurrency = page_concurrency
+        self.pending = queue.Queue(maxsize=max(1, queue_size))
+        self.jobs = OrderedDict()  # {任务ID: 任务}，按提交顺序
+        self.jobs_lock = threading.Lock()
+        self.threads = []
+        self.stopping = threading.Event()
+
+    def start(self):
+        """启动工作线程"""
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout: float = None):
+        """正在执行的任务完成后停止工作线程（排队中的任务不再执行，其临时文件被删除）"""
+        self.stopping.set()
+        while True:
+            try:
+                job = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.release()
+        for _ in self.threads:
+            try:
+                self.pending.put_nowait(None)
+            except queue.Full:
+                break  # 工作线程取到下一个任务时会发现服务已停止
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def submit(self, name: str, pages: List[Tuple[str, translation_engine.ImageInput]],
+               temp_path: Optional[str] = None) -> TranslationJob:
+        """
+        提交任务
+
+        Args:
+            temp_path: 任务结束后删除的临时压缩包
+
+        Raises:
+            queue.Full: 排队中的任务已达上限（临时压缩包由调用方删除）
+        """
+        job = TranslationJob(name, pages, temp_path)
+        with self.jobs_lock:
+            self.pending.put_nowait(job)
+            self.jobs[job.id] = job
+        print(f"📥 收到任务 {job.id}: {name}（{len(pages)} 页）")
+        return job
+
+    def get(self, job_id: str) -> Optional[TranslationJob]:
+        with self.jobs_lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[TranslationJob]:
+        with self.jobs_lock:
+            return list(self.jobs.values())
+
+    def queued_count(self) -> int:
+        return self.pending.qsize()
+
+    def _worker_loop(self):
+        while True:
+            job = self.pending.get()
+            if job is None or self.stopping.is_set():
+                if job is not None:
+                    job.release()
+                return
+            self._run_job(job)
+
+    def _run_job(self, job: TranslationJob):
+        with job.lock:
+            job.status = JOB_RUNNING
+            job.started = time.time()
+        print(f"🚀 开始任务 {job.id}: {job.name}")
+
+        names = [name for name, _ in job.pages]
+        images = [image for _, image in job.pages]
+        try:
+            for index, (_, results, error) in enumerate(
+                    self.engine.translate_many(images, self.page_concurrency)):
+                job.add_result(names[index], results, error)
+        except Exception as e:
+            # 分组等准备阶段出错时，其余页全部记为失败
+            print(f"❌ 任务 {job.id} 执行失败: {e}")
+            for name in names[len(job.page_results):]:
+                job.add_result(name, None, e)
+
+        with job.lock:
+            job.status = JOB_DONE
+            job.finished = time.time()
+            job.release()
+        print(f"🏁 任务 {job.id} 完成: 成功 {job.total - job.failed_count} 页，失败 {job.failed_count} 页")
+        self._forget_old_jobs()
+
+    def _forget_old_jobs(self):
+        """已结束的任务超出保留数量时，丢弃最早提交的已结束任务"""
+        with self.jobs_lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.status == JOB_DONE]
+            for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del self.jobs[job_id]
+
+
+def pages_from_upload(data: bytes, name: str) -> Tuple[List[Tuple[str, translation_engine.ImageInput]],
+                                                       Optional[str]]:
+    """
+    把上传的字节拆分为页面：压缩包展开为包内图片（按自然顺序），其余视为单张图片
+
+    压缩包不在内存中解压：先按目录中记录的解压后大小检查限制，再保存为临时文件，
+    页面为"临时文件::包内路径"，由工作线程翻译时逐页读取
+
+    Returns:
+        ([(页面名称, 图片字节或压缩包内图片路径), ...], 临时压缩包路径或None)
+
+    Raises:
+        ValueError: 压缩包无法读取、不含图片或超过限制
+    """
+    if not zipfile.is_zipfile(io.BytesIO(data)):
+        return [(name, data)], None
+
+    infos = [info for info in archive_reader.list_member_infos(io.BytesIO(data))
+             if folder_scanner.is_supported_image(info.filename)]
+    if not infos:
+        raise ValueError("压缩包中没有支持的图片")
+    if len(infos) > MAX_ARCHIVE_MEMBERS:
+        raise ValueError(f"压缩包中的图片超过 {MAX_ARCHIVE_MEMBERS} 张")
+    if any(info.file_size > MAX_ARCHIVE_MEMBER_BYTES for info in infos):
+        raise ValueError(f"压缩包中有解压后超过 {MAX_ARCHIVE_MEMBER_BYTES // (1024 * 1024)}MB 的图片")
+    if sum(info.file_size for info in infos) > MAX_ARCHIVE_UNCOMPRESSED_BYTES:
+        raise ValueError(f"压缩包解压后超过 {MAX_ARCHIVE_UNCOMPRESSED_BYTES // (1024 * 1024)}MB")
+
+    members = sorted((info.filename for info in infos), key=folder_scanner.natural_sort_key)
+    with tempfile.NamedTemporaryFile(prefix="translate_upload_", suffix=".zip", delete=False) as f:
+        f.write(data)
+        temp_path = f.name
+    return [(archive_reader.member_path(name, member), archive_reader.member_path(temp_path, member))
+            for member in members], temp_path
+
+
+def discard_temp_archive(temp_path: str):
+    """关闭并删除上传压缩包的临时文件"""
+    archive_reader.close_archive(temp_path)
+    try:
+        os.remove(temp_path)
+    except OSError as e:
+        print(f"⚠️ 删除临时文件失败 {temp_path}: {e}")
+
+
+def _is_within(path: str, root: str) -> bool:
+    try:
+        return os.path.commonpath([path, root]) == root
+    except ValueError:
+        return False  # 不同盘符
+
+
+def pages_from_paths(paths: List, root: str) -> List[Tuple[str, str]]:
+    """
+    展开JSON请求中的服务器本地路径，只允许root目录内的图片、文件夹和压缩包
+
+    Args:
+        paths: 相对root（或绝对）的路径列表
+        root: 允许读取的目录（已解析为真实路径）
+
+    Returns:
+        [(相对root的页面名称, 图片路径), ...]
+
+    Raises:
+        ValueError: 路径格式不正确（非字符串、通配符）
+        PermissionError: 路径解析后（包括符号链接）位于root之外
+    """
+    resolved = []
+    for path in paths:
+        if not isinstance(path, str) or not path:
+            raise ValueError("paths中的每一项都必须是非空字符串")
+        if glob.has_magic(path):
+            raise ValueError(f"paths不支持通配符: {path}")
+        full_path = os.path.realpath(os.path.join(root, path))
+        if not _is_within(full_path, root):
+            raise PermissionError(f"路径不在允许的目录内: {path}")
+        resolved.append(full_path)
+
+    images = translate_cli.expand_inputs(resolved)
+    for image in images:
+        # 文件夹中的符号链接可能指向目录外
+        if not _is_within(os.path.realpath(archive_reader.file_system_path(image)), root):
+            raise PermissionError(f"路径不在允许的目录内: {os.path.relpath(image, root)}")
+    return [(os.path.relpath(image, root), image) for image in images]
+
+
+class TranslationRequestHandler(BaseHTTPRequestHandler):
+    """翻译任务接口（self.server.job_manager为任务队列，self.server.paths_root为JSON路径模式允许的目录）"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        job_manager = self.server.job_manager
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+
+        if parts == ["health"]:
+            self._send_json(200, {"status": "ok", "queued": job_manager.queued_count(),
+                                  "workers": job_manager.workers})
+        elif parts == ["jobs"]:
+            self._send_json(200, {"jobs": [job.to_status() for job in job_manager.list_jobs()]})
+        elif len(parts) in (2, 3) and parts[0] == "jobs" and parts[2:] in ([], ["results"]):
+            job = job_manager.get(parts[1])
+            if job is None:
+                self._send_error(404, "任务不存在")
+            elif len(parts) == 3:
+                self._send_json(200, job.to_results())
+            else:
+                self._send_json(200, job.to_status())
+        else:
+            self._send_error(404, "接口不存在")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            self._discard_body()
+            self._send_error(404, "接口不存在")
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length <= 0:
+            self._send_error(411, "缺少请求体或Content-Length")
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self.close_connection = True
+            self._send_error(413, f"上传超过 {MAX_UPLOAD_BYTES // (1024 * 1024)}MB")
+            return
+        body = self.rfile.read(length)
+
+        query = parse_qs(url.query)
+        name = query.get("name", ["upload"])[0]
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        temp_path = None
+        try:
+            if content_type == "application/json":
+                # 按路径提交会读取服务器上的文件并上传给服务商，只在启动时指定了目录才允许
+                if self.server.paths_root is None:
+                    raise PermissionError("未启用按服务器路径提交（启动时使用 --paths-root 指定允许的目录），请直接上传文件")
+                request = json.loads(body.decode("utf-8"))
+                if not isinstance(request, dict) or not isinstance(request.get("paths"), list):
+                    raise ValueError('JSON请求需要 {"paths": [...]}')
+                name = str(request.get("name") or name)
+                pages = pages_from_paths(request["paths"], self.server.paths_root)
+                if not pages:
+                    raise ValueError("没有找到可翻译的图片")
+            else:
+                pages, temp_path = pages_from_upload(body, name)
+        except PermissionError as e:
+            self._send_error(403, str(e))
+            return
+        except (ValueError, UnicodeDecodeError) as e:
+            self._send_error(400, str(e))
+            return
+
+        try:
+            job = self.server.job_manager.submit(name, pages, temp_path)
+        except queue.Full:
+            if temp_path is not None:
+                discard_temp_archive(temp_path)
+            self._send_error(503, "任务队列已满，请稍后重试", {"Retry-After": "5"})
+            return
+        self._send_json(202, job.to_status(), {"Location": f"/jobs/{job.id}"})
+
+    def _discard_body(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = 0
+        if 0 < length <= MAX_UPLOAD_BYTES:
+            self.rfile.read(length)
+        elif length:
+            self.close_connection = True
+
+    def _send_json(self, status: int, payload: Dict, headers: Dict[str, str] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str, headers: Dict[str, str] = None):
+        self._send_json(status, {"error": message}, headers)
+
+    def log_message(self, format, *args):
+        print(f"🌐 {self.address_string()} {format % args}")
+
+
+def create_server(host: str, port: int, job_manager: JobManager,
+                  paths_root: Optional[str] = None) -> ThreadingHTTPServer:
+    """
+    创建HTTP服务器（调用serve_forever开始处理请求）
+
+    Args:
+        paths_root: 允许JSON请求按服务器本地路径提交的目录，为None时只接受上传
+    """
+    server = ThreadingHTTPServer((host, port), TranslationRequestHandler)
+    server.daemon_threads = True
+    server.job_manager = job_manager
+    server.paths_root = os.path.realpath(paths_root) if paths_root is not None else None
+    return server
+
+
+def main():
+    """主函数"""
+    manager = config.config_manager
+    parser = argparse.ArgumentParser(description='漫画全图翻译（本地任务服务）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址（默认只接受本机连接）')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--workers', type=int, default=2, help='同时执行的任务数')
+    parser.add_argument('-j', '--jobs', type=int, default=manager.get_batch_concurrency(),
+                        help='每个任务同时翻译的请求数（默认使用高级设置中的批量并发数）')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE, help='排队中的任务数上限')
+    parser.add_argument('--no-cache', action='store_true', help='跳过翻译缓存，强制重新调用API')
+    parser.add_argument('--paths-root', metavar='DIR',
+                        help='允许JSON请求按服务器本地路径提交的目录（不指定时只接受上传的文件）')
+
+    args = parser.parse_args()
+
+    if args.workers < 1 or args.jobs < 1 or args.queue_size < 1:
+        parser.error("--workers、--jobs 和 --queue-size 必须大于0")
+    if args.paths_root is not None and not os.path.isdir(args.paths_root):
+        parser.error(f"--paths-root 不是文件夹: {args.paths_root}")
+
+    # 检查API密钥
+    api_key = manager.get_current_api_key()
+    if not api_key or api_key.startswith("<"):
+        print("错误: 当前服务商的API密钥未配置，请先在图形界面的设置中配置", file=sys.stderr)
+        sys.exit(1)
+
+    engine = translation_engine.TranslationEngine(manager, use_cache=False if args.no_cache else None)
+    job_manager = JobManager(engine, args.workers, args.jobs, args.queue_size)
+    job_manager.start()
+    server = create_server(args.host, args.port, job_manager, args.paths_root)
+    print(f"🚀 翻译服务已启动: http://{args.host}:{server.server_port}（{args.workers} 个工作线程，"
+          f"每个任务并发 {args.jobs}）")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 正在停止服务...")
+    finally:
+        server.server_close()
+        job_manager.stop(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
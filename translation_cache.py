@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+翻译缓存模块
+基于SQLite的内容寻址磁盘缓存：以图片字节 + 服务商 + 模型 + 目标语言 + 翻译风格 + 提示词的哈希为键，
+重复翻译同一张图片时直接返回缓存结果，不再调用API
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional
+
+import config
+
+# 淘汰后保留的容量比例，避免每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.9
+
+
+class TranslationCache:
+    """带容量上限（按字节）和LRU淘汰的翻译结果缓存"""
+
+    def __init__(self, db_path: str = config.CACHE_FILE, max_bytes: int = config.DEFAULT_CACHE_MAX_BYTES):
+        """
+        初始化缓存
+
+        Args:
+            db_path: SQLite数据库文件路径
+            max_bytes: 缓存内容的最大总字节数
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(image_bytes: bytes, provider: str, base_url: str, model: str, target_language: str,
+                 translation_style: str, prompt: str, *extra: Any) -> str:
+        """
+        计算缓存键
+
+        Args:
+            image_bytes: 原始图片字节
+            provider: 服务商名称
+            base_url: API地址（同一服务商名称下的自定义端点可能是不同的模型服务）
+            model: 模型名称
+            target_language: 目标语言
+            translation_style: 翻译风格
+            prompt: 发送给模型的提示词
+            *extra: 其他会影响结果的参数
+
+        Returns:
+            十六进制SHA-256摘要
+        """
+        digest = hashlib.sha256()
+        digest.update(hashlib.sha256(image_bytes).digest())
+        for part in (provider, base_url, model, target_language, translation_style, prompt) + extra:
+            encoded = str(part).encode('utf-8')
+            # 写入长度前缀，避免字段拼接产生歧义
+            digest.update(len(encoded).to_bytes(8, 'big'))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的结果列表，未命中时返回None
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            self.delete(key)
+            return None
+
+    def put(self, key: str, results: List):
+        """
+        写入缓存，超过容量时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            results: 要缓存的结果列表
+        """
+        value = json.dumps(results, ensure_ascii=False)
+        size = len(value.encode('utf-8'))
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now)
+            )
+            self._evict_locked()
+            self._conn.commit()
+
+    def delete(self, key: str):
+        """删除单个缓存条目"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        """清空全部缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+
+    def total_bytes(self) -> int:
+        """获取当前缓存占用的总字节数"""
+        with self._lock:
+            return self._total_bytes_locked()
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def _total_bytes_locked(self) -> int:
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return int(row[0])
+
+    def _evict_locked(self):
+        """按LRU淘汰条目直到低于容量上限的EVICT_TARGET_RATIO"""
+        total = self._total_bytes_locked()
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        evicted = 0
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC").fetchall()
+        for key, size in rows:
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+
+        if evicted:
+            print(f"🧹 翻译缓存已淘汰 {evicted} 个条目，当前占用 {total} 字节")
+
+
+# 全局缓存实例（首次使用时创建）
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache(max_bytes: Optional[int] = None) -> TranslationCache:
+    """
+    获取全局共享的翻译缓存
+
+    Args:
+        max_bytes: 容量上限，提供时会更新现有实例的上限
+
+    Returns:
+        TranslationCache实例
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = TranslationCache(max_bytes=max_bytes or config.DEFAULT_CACHE_MAX_BYTES)
+        elif max_bytes:
+            _shared_cache.max_bytes = max_bytes
+        return _shared_cache
+
+
+def is_cacheable(results: List) -> bool:
+    """判断结果是否值得缓存（空结果和解析失败的占位结果不缓存）"""
+    if not results:
+        return False
+    for item in results:
+        if isinstance(item, dict) and item.get('type') in ('解析错误', '错误'):
+            return False
+    return True
@@ -0,0 +1,964 @@
+# -*- coding: utf-8 -*-
+"""
+全图翻译引擎
+从界面中拆出的全图翻译核心：构建请求、上传优化、长图切片、多页合并、缓存、限流重试和响应解析；
+不依赖tkinter，界面、命令行批量翻译和其他脚本都可以直接导入使用
+
+用法示例:
+    engine = TranslationEngine()
+    results = engine.translate("page01.jpg")
+    for image, results, error in engine.translate_many(paths, concurrency=4):
+        ...
+
+编码、请求、解析三个阶段可以分别替换（例如换用其他压缩方式、接入本地模型或自定义解析），
+替换后长图切片、多页合并、缓存和并发调度仍然生效
+
+各方法都接受可选的取消令牌（cancellation.CancelToken）：阶段之间检查令牌，
+请求阶段通过context["cancel"]拿到令牌，默认实现取消时直接关闭连接
+"""
+
+import asyncio
+import base64
+import functools
+import io
+import json
+import os
+import re
+import threading
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import requests
+from PIL import Image
+
+import cancellation
+import config
+import http_transport
+import batch_engine
+import translation_cache
+import upload_optimizer
+import stream_parser
+import image_tiling
+import page_packing
+import rate_limiter
+import archive_reader
+
+# 可翻译的图片：图片路径（包括压缩包内图片）或图片字节
+ImageInput = Union[str, os.PathLike, bytes]
+# 编码阶段：(原始图片字节, 上传设置) -> (上传字节, MIME类型)
+Encoder = Callable[[bytes, Dict], Tuple[bytes, str]]
+# 请求阶段：(图片列表, 提示词, 请求上下文, on_block=流式回调, max_tokens=最大输出token数) -> 模型输出的文本
+Requester = Callable[..., str]
+# 解析阶段：模型输出的文本 -> 翻译结果列表
+Parser = Callable[[str], List[Dict]]
+
+
+def build_headers(provider: str, provider_config: Dict) -> Dict[str, str]:
+    """按服务商构建请求头"""
+    headers = {
+        'Authorization': f'Bearer {provider_config.get("api_key", "")}',
+        'Content-Type': 'application/json'
+    }
+
+    # 根据不同服务商添加特定头信息
+    if provider == "openrouter":
+        headers['HTTP-Referer'] = provider_config.get("http_referer", "")
+        headers['X-Title'] = provider_config.get("x_title", "")
+    elif provider == "anthropic":
+        headers['anthropic-version'] = provider_config.get("version", "2023-06-01")
+    elif provider == "custom":
+        custom_headers = provider_config.get("headers", {})
+        headers.update(custom_headers)
+    return headers
+
+
+def endpoint_url(provider: str, provider_config: Dict) -> str:
+    """按服务商返回对话接口地址"""
+    base_url = provider_config.get("base_url", "")
+    if provider == "anthropic":
+        return f"{base_url}/messages"
+    return f"{base_url}/chat/completions"
+
+
+def image_content_part(provider: str, upload_data: bytes, media_type: str) -> Dict:
+    """按服务商格式构建消息中的一张图片"""
+    image_base64 = base64.b64encode(upload_data).decode('utf-8')
+    if provider == "anthropic":
+        return {
+            'type': 'image',
+            'source': {
+                'type': 'base64',
+                'media_type': media_type,
+                'data': image_base64
+            }
+        }
+    return {
+        'type': 'image_url',
+        'image_url': {
+            'url': f'data:{media_type};base64,{image_base64}'
+        }
+    }
+
+
+def build_request_data(provider: str, provider_config: Dict, content, max_tokens: int = 4000) -> Dict:
+    """
+    构建请求数据
+
+    Args:
+        provider: 服务商名称
+        provider_config: 服务商配置
+        content: 消息内容，纯文本字符串或文本/图片片段列表
+        max_tokens: 最大输出token数（各服务商都会带上，Anthropic必填）
+    """
+    if provider == "anthropic":
+        # Anthropic API格式
+        return {
+            'model': provider_config.get("model_name", ""),
+            'max_tokens': max_tokens,
+            'messages': [
+                {
+                    'role': 'user',
+                    'content': content
+                }
+            ]
+        }
+
+    # OpenAI兼容格式（OpenRouter, OpenAI, 自定义）
+    return {
+        'model': provider_config.get("model_name", ""),
+        'max_tokens': max_tokens,
+        'messages': [
+            {
+                'role': 'user',
+                'content': content
+            }
+        ]
+    }
+
+
+def extract_response_text(provider: str, result: Dict) -> str:
+    """从非流式响应的JSON中取出模型输出的文本"""
+    if 'error' in result:
+        print(f"❌ API返回错误: {result['error']}")
+        raise Exception(f"API错误: {result['error']}")
+
+    if provider == "anthropic":
+        if 'content' in result and len(result['content']) > 0:
+            return result['content'][0]['text']
+        print(f"❌ Anthropic响应格式错误: {result}")
+        raise Exception("Anthropic API响应中缺少content字段")
+
+    if 'choices' in result and len(result['choices']) > 0:
+        return result['choices'][0]['message']['content']
+    print(f"❌ OpenAI兼容API响应格式错误: {result}")
+    raise Exception(f"API响应中缺少choices字段。响应结构: {list(result.keys())}")
+
+
+def read_image(image: ImageInput) -> bytes:
+    """读取图片的全部字节（图片字节原样返回）"""
+    if isinstance(image, bytes):
+        return image
+    return archive_reader.read_bytes(os.fspath(image))
+
+
+def describe_image(image: ImageInput) -> str:
+    """日志中显示的图片名称"""
+    if isinstance(image, bytes):
+        return f"<{len(image)} 字节的图片>"
+    return os.path.basename(os.fspath(image))
+
+
+class TranslationEngine:
+    """全图翻译引擎"""
+
+    def __init__(self, manager: config.ConfigManager = None, use_cache: bool = None,
+                 encoder: Encoder = None, requester: Requester = None, parser: Parser = None):
+        """
+        初始化翻译引擎
+
+        Args:
+            manager: 配置管理器，不提供时使用全局配置
+            use_cache: 是否使用磁盘翻译缓存，不提供时按高级设置决定
+            encoder: 编码阶段，不提供时按上传设置缩小并重新编码（encode_image）
+            requester: 请求阶段，不提供时经限流器发送到当前服务商（send_request）
+            parser: 解析阶段，不提供时容错解析JSON数组（parse_translation_response）；多页合并时按页拆分后逐页解析
+        """
+        self.config_manager = manager or config.config_manager
+        self.use_cache = use_cache
+        self.encode = encoder or self.encode_image
+        self.request = requester or self.send_request
+        self.parse = parser or self.parse_translation_response
+        # 所有页面的切片请求共用的并发名额（按批量并发数），避免多页并发时每页再各开一组请求
+        self._tile_slots = None
+        self._tile_slots_size = 0
+        self._tile_slots_lock = threading.Lock()
+
+    def translate(self, image: ImageInput, on_block: Callable[[Dict], None] = None,
+                  cancel: cancellation.CancelToken = None) -> List[Dict]:
+        """
+        全图翻译一张图片
+
+        Args:
+            image: 图片路径（包括压缩包内图片）或图片字节
+            on_block: 可选回调，启用流式响应时每解析出一个文本块就在工作线程中调用一次
+            cancel: 可选的取消令牌
+
+        Returns:
+            完整解析后的翻译结果列表
+
+        Raises:
+            cancellation.CancelledError: 已取消（流式响应时带有取消前收到的文本块）
+        """
+        try:
+            cancellation.check(cancel)
+
+            # 读取图片
+            image_data = read_image(image)
+
+            context = self._build_request_context(cancel)
+            upload_settings = context["upload_settings"]
+            tile_settings = context["tile_settings"]
+
+            # 查询磁盘缓存
+            cache = self._get_translation_cache()
+            cache_key = None
+            if cache is not None:
+                cache_key = self._make_cache_key(cache, image_data, context)
+                cached_results = cache.get(cache_key)
+                if cached_results is not None:
+                    print(f"💾 命中翻译缓存: {describe_image(image)}（{len(cached_results)} 个文本块）")
+                    return cached_results
+
+            # 长条漫画切片后并发翻译，其余图片整张翻译
+            results = None
+            if tile_settings["enabled"]:
+                with Image.open(io.BytesIO(image_data)) as probe:
+                    width, height = probe.size
+                if image_tiling.should_tile(width, height, tile_settings["tile_height"]):
+                    results = self._translate_tiles(image_data, context, on_block)
+
+            if results is None:
+                upload_data, media_type = self.encode(image_data, upload_settings)
+                results = self._request_translation(upload_data, media_type, context, on_block)
+
+            # 写入磁盘缓存
+            if cache is not None and translation_cache.is_cacheable(results):
+                cache.put(cache_key, results)
+
+            return results
+
+        except cancellation.CancelledError:
+            print(f"⏹️ 已取消翻译: {describe_image(image)}")
+            raise
+        except Exception as e:
+            print(f"❌ 全图翻译调用失败: {e}")
+            raise e
+
+    def translate_many(self, images: Iterable[ImageInput], concurrency: int = None,
+                       cancel: cancellation.CancelToken = None) -> Iterator[Tuple[ImageInput, Optional[List[Dict]],
+                                                                   Optional[Exception]]]:
+        """
+        并发翻译多张图片，按输入顺序逐张产出结果
+
+        开启多页合并时相邻的小图合并到同一个请求；某张图片失败不影响其他图片
+
+        Args:
+            images: 图片路径或图片字节
+            concurrency: 同时在途的请求数，不提供时使用高级设置中的批量并发数
+            cancel: 可选的取消令牌，取消后在途的请求中断，之后的图片产出CancelledError
+
+        Returns:
+            迭代器，依次产出 (图片, 翻译结果, 异常)；失败时翻译结果为None、异常为捕获到的异常
+        """
+        if concurrency is None:
+            concurrency = self.config_manager.get_batch_concurrency()
+
+        groups = self.plan_page_groups(list(images))
+        translate_group = self.translate_page_group
+        if cancel is not None:
+            translate_group = functools.partial(translate_group, cancel=cancel)
+        for _, group, group_results, error in batch_engine.run_ordered(groups, translate_group, concurrency):
+            for image in group:
+                results = None if error is not None else group_results.get(image)
+                if error is None and results is None:
+                    yield image, None, Exception("未返回翻译结果")
+                else:
+                    yield image, results, error
+
+    async def translate_async(self, image: ImageInput, on_block: Callable[[Dict], None] = None,
+                              cancel: cancellation.CancelToken = None) -> List[Dict]:
+        """translate的异步版本：在线程池中翻译，不阻塞事件循环（on_block在工作线程中调用）"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.translate, image, on_block, cancel))
+
+    async def translate_many_async(self, images: Iterable[ImageInput], concurrency: int = None,
+                                   cancel: cancellation.CancelToken = None) -> AsyncIterator[Tuple[ImageInput, Optional[List[Dict]],
+                                                            Optional[Exception]]]:
+        """translate_many的异步版本：按输入顺序异步产出 (图片, 翻译结果, 异常)"""
+        loop = asyncio.get_running_loop()
+        iterator = self.translate_many(images, concurrency, cancel)
+        finished = object()
+        try:
+            while True:
+                # 取下一个结果会阻塞到该页翻译完成，放到线程池中等待
+                item = await loop.run_in_executor(None, next, iterator, finished)
+                if item is finished:
+                    break
+                yield item
+        finally:
+            try:
+                iterator.close()  # 提前结束时取消尚未开始的请求
+            except ValueError:
+                pass  # 被取消时迭代器仍在线程池中执行，由垃圾回收时关闭
+
+    def plan_page_groups(self, images: List[ImageInput]) -> List[List[ImageInput]]:
+        """按多页合并设置把待翻译图片分组，未开启时每张图片单独一组"""
+        packing_settings = self.config_manager.get_packing_settings()
+        if not packing_settings["enabled"]:
+            return [[image] for image in images]
+
+        tile_settings = self.config_manager.get_tile_settings()
+
+        def is_small(image):
+            try:
+                if isinstance(image, bytes):
+                    source = io.BytesIO(image)
+                else:
+                    source = archive_reader.open_image_source(os.fspath(image))
+                with Image.open(source) as img:
+                    width, height = img.size
+            except Exception:
+                return False
+            if tile_settings["enabled"] and image_tiling.should_tile(width, height, tile_settings["tile_height"]):
+                return False
+            return width * height <= packing_settings["max_pixels"]
+
+        return page_packing.group_pages(images, is_small, packing_settings["max_pages"])
+
+    def translate_page_group(self, images: List[ImageInput],
+                             cancel: cancellation.CancelToken = None) -> Dict[ImageInput, List[Dict]]:
+        """翻译一组图片，返回 {图片: 翻译结果}"""
+        if len(images) == 1:
+            return {images[0]: self.translate(images[0], cancel=cancel)}
+        return self.translate_packed(images, cancel)
+
+    def translate_packed(self, images: List[ImageInput],
+                         cancel: cancellation.CancelToken = None) -> Dict[ImageInput, List[Dict]]:
+        """
+        把多张小图合并到一次请求中翻译
+
+        Args:
+            images: 图片路径或图片字节（按页序）
+            cancel: 可选的取消令牌
+
+        Returns:
+            {图片: 翻译结果列表}
+        """
+        cancellation.check(cancel)
+        context = self._build_request_context(cancel)
+        upload_settings = context["upload_settings"]
+        cache = self._get_translation_cache()
+
+        # 先查缓存，只把未命中的图片放进合并请求
+        results_by_image = {}
+        pending = []
+        for image in images:
+            image_data = read_image(image)
+            cache_key = self._make_cache_key(cache, image_data, context) if cache is not None else None
+            cached_results = cache.get(cache_key) if cache is not None else None
+            if cached_results is not None:
+                print(f"💾 命中翻译缓存: {describe_image(image)}（{len(cached_results)} 个文本块）")
+                results_by_image[image] = cached_results
+            else:
+                pending.append((image, image_data, cache_key))
+
+        if len(pending) <= 1:
+            for image, _, _ in pending:
+                results_by_image[image] = self.translate(image, cancel=cancel)
+            return results_by_image
+
+        uploads = [self.encode(image_data, upload_settings) for _, image_data, _ in pending]
+
+        print(f"📚 多页合并翻译: {len(pending)} 张图片合并为一次请求")
+        prompt = page_packing.build_packed_prompt(context["prompt"], len(pending))
+        content = self.request(uploads, prompt, context, max_tokens=page_packing.PACKED_MAX_TOKENS)
+        cancellation.check(cancel)
+        page_texts = page_packing.split_packed_text(content, len(pending))
+        if page_texts is None:
+            print("⚠️ 多页响应无法按页拆分，改为逐页翻译")
+            page_texts = {}
+
+        for page, (image, _, cache_key) in enumerate(pending, 1):
+            page_text = page_texts.get(page)
+            if page_text is None:
+                # 模型漏掉的页单独重新翻译
+                results_by_image[image] = self.translate(image, cancel=cancel)
+                continue
+
+            # 每页的文本块数组同样经过解析阶段
+            results = self.parse(page_text)
+            results_by_image[image] = results
+            if cache is not None and translation_cache.is_cacheable(results):
+                cache.put(cache_key, results)
+
+        return results_by_image
+
+    def encode_image(self, image_data: bytes, upload_settings: Dict) -> Tuple[bytes, str]:
+        """默认编码阶段：缩小并重新编码后再上传，减少上传字节（全图翻译结果不含坐标，无需缩放比例）"""
+        upload_data, media_type, _ = upload_optimizer.prepare_image_for_upload(
+            image_data,
+            max_edge=upload_settings["max_edge"],
+            output_format=upload_settings["format"],
+            quality=upload_settings["quality"]
+        )
+        return upload_data, media_type
+
+    def _build_request_context(self, cancel: cancellation.CancelToken = None):
+        """根据当前配置构建翻译请求所需的服务商、请求头、提示词、各项设置和取消令牌"""
+        # 获取当前配置
+        provider = self.config_manager.config.get("api_provider", "openrouter")
+        provider_config = self.config_manager.get_current_provider_config()
+        headers = build_headers(provider, provider_config)
+
+        # 获取高级设置
+        target_language = self.config_manager.get_target_language()
+        translation_style = self.config_manager.get_translation_style()
+        custom_prompt = self.config_manager.get_custom_prompt()
+
+        # 构建全图翻译提示词
+        # 如果用户自定义了提示词，使用自定义的；否则使用动态生成的
+        if custom_prompt and custom_prompt.strip():
+            # 替换提示词中的占位符
+            prompt = custom_prompt.replace("{target_language}", target_language)
+            prompt = prompt.replace("{translation_style}", translation_style)
+        else:
+            # 使用默认提示词模板，但根据设置动态调整
+            prompt = f"""请分析这张图片中的所有文本内容，包括对话气泡、标题、旁白、音效文字等。
+
+要求：
+1. 识别图片中的每一个文本块
+2. 对每个文本块进行分类（如：对话、旁白、标题、音效等）
+3. 将所有文本翻译成{target_language}
+4. 翻译风格：{translation_style}
+5. 保持原文的语气和风格
+
+重要：请严格按照以下JSON格式返回结果，不要添加任何其他文字或说明：
+
+```json
+[
+  {{
+    "type": "对话气泡",
+    "original_text": "原文内容",
+    "translation": "{target_language}翻译"
+  }},
+  {{
+    "type": "旁白",
+    "original_text": "原文内容",
+    "translation": "{target_language}翻译"
+  }}
+]
+```
+
+格式要求：
+- 必须返回有效的JSON数组格式
+- 每个文本块包含type、original_text、translation三个字段
+- 不要在JSON前后添加任何解释文字
+- 确保JSON语法正确，注意逗号和引号
+- 即使只有一个文本块也要用数组格式 [...]"""
+
+        print(f"🎯 使用翻译设置 - 目标语言: {target_language}, 风格: {translation_style}")
+        print(f"📝 提示词长度: {len(prompt)} 字符")
+
+        upload_settings = self.config_manager.get_upload_settings()
+        tile_settings = self.config_manager.get_tile_settings()
+
+        return {
+            "provider": provider,
+            "provider_config": provider_config,
+            "headers": headers,
+            "prompt": prompt,
+            "target_language": target_language,
+            "translation_style": translation_style,
+            "upload_settings": upload_settings,
+            "tile_settings": tile_settings,
+            "cancel": cancel
+        }
+
+    def _get_translation_cache(self):
+        """未跳过缓存时返回共享的磁盘翻译缓存，否则返回None"""
+        use_cache = self.use_cache if self.use_cache is not None else self.config_manager.is_cache_enabled()
+        if not use_cache:
+            return None
+        return translation_cache.get_shared_cache(self.config_manager.get_cache_max_bytes())
+
+    def _make_cache_key(self, cache, image_data, context):
+        """计算单页翻译结果的缓存键（包含所有影响结果的设置）"""
+        upload_settings = context["upload_settings"]
+        tile_settings = context["tile_settings"]
+        provider_config = context["provider_config"]
+        return cache.make_key(image_data, context["provider"], provider_config.get("base_url", ""),
+                              provider_config.get("model_name", ""),
+                              context["target_language"], context["translation_style"], context["prompt"],
+                              upload_settings["max_edge"], upload_settings["format"],
+                              upload_settings["quality"], tile_settings["enabled"],
+                              tile_settings["tile_height"], tile_settings["overlap"])
+
+    def _translate_tiles(self, image_data, context, on_block=None):
+        """长图切片后并发翻译，按从上到下的顺序合并并去重"""
+        tile_settings = context["tile_settings"]
+        tiles = image_tiling.split_tall_image(image_data, tile_settings["tile_height"],
+                                              tile_settings["overlap"], context["upload_settings"])
+
+        concurrency = self.config_manager.get_batch_concurrency()
+        tile_slots = self._get_tile_slots(concurrency)
+
+        def translate_tile(indexed_tile):
+            index, (tile_data, media_type) = indexed_tile
+            cancellation.check(context["cancel"])
+            with tile_slots:
+                # 只有第一片的文本块能直接流式显示，其余切片要等合并去重后才能确定
+                return self._request_translation(tile_data, media_type, context, on_block if index == 0 else None)
+
+        tile_results = []
+        for _, _, results, error in batch_engine.run_ordered(list(enumerate(tiles)), translate_tile, concurrency):
+            if error is not None:
+                raise error
+            tile_results.append(results)
+
+        merged = image_tiling.merge_tile_results(tile_results)
+        total = sum(len(results or []) for results in tile_results)
+        print(f"🧩 切片结果合并完成: {total} → {len(merged)} 个文本块")
+        return merged
+
+    def _get_tile_slots(self, concurrency: int) -> threading.BoundedSemaphore:
+        """取得切片请求共用的并发名额，批量并发数修改后换成新的名额"""
+        with self._tile_slots_lock:
+            if self._tile_slots is None or self._tile_slots_size != concurrency:
+                self._tile_slots = threading.BoundedSemaphore(max(1, concurrency))
+                self._tile_slots_size = concurrency
+            return self._tile_slots
+
+    def _request_translation(self, upload_data, media_type, context, on_block=None):
+        """发送一次全图翻译请求并解析结果"""
+        cancellation.check(context["cancel"])
+        content = self.request([(upload_data, media_type)], context["prompt"], context, on_block=on_block)
+        cancellation.check(context["cancel"])
+        # 解析JSON结果
+        return self.parse(content)
+
+    def send_request(self, images: List[Tuple[bytes, str]], prompt: str, context: Dict,
+                     on_block: Callable[[Dict], None] = None, max_tokens: int = 4000) -> str:
+        """
+        默认请求阶段：发送翻译请求并返回模型输出的文本
+
+        Args:
+            images: [(上传字节, MIME类型), ...]；多于一张时每张图片前标注页码
+            prompt: 提示词
+            context: 请求上下文（_build_request_context的返回值，取消令牌为context["cancel"]）
+            on_block: 可选的流式文本块回调
+            max_tokens: 最大输出token数（Anthropic必填）
+
+        Returns:
+            模型输出的完整文本
+        """
+        provider = context["provider"]
+        provider_config = context["provider_config"]
+        cancel = context.get("cancel")
+        try:
+            # 构建消息内容：提示词在前，图片依次在后
+            message_content = [{'type': 'text', 'text': prompt}]
+            image_sizes = []
+            for page, (upload_data, media_type) in enumerate(images, 1):
+                with Image.open(io.BytesIO(upload_data)) as probe:
+                    image_sizes.append(probe.size)
+                if len(images) > 1:
+                    message_content.append({'type': 'text', 'text': page_packing.page_label(page)})
+                message_content.append(image_content_part(provider, upload_data, media_type))
+
+            # 构建请求数据
+            data = build_request_data(provider, provider_config, message_content, max_tokens)
+
+            # 发送请求
+            url = endpoint_url(provider, provider_config)
+
+            print(f"🔗 发送请求到: {url}")
+            print(f"📝 使用模型: {provider_config.get('model_name', 'Unknown')}")
+
+            # 交互式翻译时使用流式响应，文本块逐个显示
+            use_stream = on_block is not None and self.config_manager.is_streaming_enabled()
+            if use_stream:
+                data['stream'] = True
+
+            # 经过服务商限流器发送：令牌桶限速，429/5xx按Retry-After或指数退避重试，连续失败时熔断暂停
+            # 取消时关闭正在使用的连接，阻塞中的请求或流式读取立即返回
+            limiter = rate_limiter.get_limiter(provider, self.config_manager.get_rate_limit_settings(provider))
+            estimated_tokens = rate_limiter.estimate_tokens(prompt, image_sizes)
+            with http_transport.cancellable(cancel):
+                response = limiter.call(
+                    lambda: http_transport.post(provider, url, headers=context["headers"], json=data, timeout=60,
+                                                stream=use_stream),
+                    estimated_tokens,
+                    cancel
+                )
+
+                print(f"📊 响应状态码: {response.status_code}")
+
+                # 检查HTTP状态
+                if response.status_code != 200:
+                    print(f"❌ HTTP错误: {response.status_code}")
+                    print(f"📄 响应内容: {response.text}")
+                    raise Exception(f"API调用失败，状态码: {response.status_code}, 响应: {response.text}")
+
+                if use_stream:
+                    # 流式读取：每个文本块闭合时立即回调显示
+                    content = self._read_streaming_content(response, provider, on_block, cancel)
+                else:
+                    result = response.json()
+                    print(f"📋 API响应结构: {list(result.keys())}")
+                    content = extract_response_text(provider, result)
+
+            if not content:
+                raise Exception("API返回的内容为空")
+
+            print(f"✅ 成功获取AI响应，内容长度: {len(content)}")
+            print(f"📄 AI响应内容预览: {content[:300]}...")
+            print(f"📄 完整AI响应内容:")
+            print("-" * 60)
+            print(content)
+            print("-" * 60)
+
+            return content
+
+        except cancellation.CancelledError:
+            raise
+        except requests.exceptions.RequestException as e:
+            if cancel is not None and cancel.cancelled:
+                raise cancellation.CancelledError() from e  # 取消时连接被主动关闭
+            print(f"🌐 网络请求失败: {e}")
+            raise Exception(f"网络请求失败: {e}")
+        except json.JSONDecodeError as e:
+            print(f"📄 JSON解析失败: {e}")
+            print(f"📄 原始响应: {response.text if 'response' in locals() else 'No response'}")
+            raise Exception(f"API响应不是有效的JSON格式: {e}")
+        except KeyError as e:
+            print(f"🔑 响应字段缺失: {e}")
+            print(f"📋 可用字段: {list(result.keys()) if 'result' in locals() else 'No result'}")
+            raise Exception(f"API响应中缺少必要字段: {e}")
+        except Exception as e:
+            print(f"❌ 翻译请求失败: {e}")
+            raise e
+
+    def _read_streaming_content(self, response, provider, on_block, cancel=None):
+        """
+        读取SSE流式响应，返回完整文本；每个文本块对象闭合时立即回调
+
+        取消时抛出CancelledError，partial_results为已经收到的文本块
+        """
+        parser = stream_parser.IncrementalJSONArrayParser()
+        blocks = []
+        try:
+            for text in stream_parser.iter_sse_text(response, provider):
+                for item in parser.feed(text):
+                    if 'original_text' in item and 'translation' in item:
+                        block = {
+                            'type': item.get('type', '未分类'),
+                            'original_text': item.get('original_text', ''),
+                            'translation': item.get('translation', '')
+                        }
+                        blocks.append(block)
+                        on_block(block)
+        except Exception:
+            if cancel is not None and cancel.cancelled:
+                raise cancellation.CancelledError(partial_results=blocks)
+            raise
+        finally:
+            response.close()
+
+        # 连接被关闭时流也可能正常结束
+        if cancel is not None and cancel.cancelled:
+            raise cancellation.CancelledError(partial_results=blocks)
+        return parser.text
+
+    def fix_json_errors(self, json_str):
+        """修复常见的JSON语法错误"""
+        try:
+            print("🔧 尝试修复JSON错误...")
+
+            # 1. 移除或转义控制字符
+            # 移除无效的控制字符，但保留必要的换行和制表符
+            json_str = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', json_str)
+
+            # 2. 修复字符串中的换行符
+            # 将字符串值中的实际换行符转换为 \n
+            json_str = re.sub(r'("translation":\s*"[^"]*)\n([^"]*")', r'\1\\n\2', json_str)
+            json_str = re.sub(r'("original_text":\s*"[^"]*)\n([^"]*")', r'\1\\n\2', json_str)
+
+            # 3. 修复不完整的JSON对象
+            # 查找没有正确闭合的字符串
+            lines = json_str.split('\n')
+            fixed_lines = []
+
+            for i, line in enumerate(lines):
+                line = line.strip()
+                if not line:
+                    continue
+
+                # 检查是否是不完整的字符串
+                if line.count('"') % 2 != 0 and not line.endswith(',') and not line.endswith('}'):
+                    # 如果字符串没有正确闭合，尝试修复
+                    if '"translation":' in line and not line.endswith('"'):
+                        line = line + '"'
+                    elif '"original_text":' in line and not line.endswith('"'):
+                        line = line + '"'
+
+                fixed_lines.append(line)
+
+            json_str = '\n'.join(fixed_lines)
+
+            # 4. 修复多余的逗号
+            json_str = re.sub(r',\s*}', '}', json_str)  # 对象末尾多余逗号
+            json_str = re.sub(r',\s*]', ']', json_str)  # 数组末尾多余逗号
+
+            # 5. 修复缺少逗号的情况
+            json_str = re.sub(r'"\s*\n\s*"', '",\n    "', json_str)  # 字符串之间缺少逗号
+            json_str = re.sub(r'}\s*\n\s*{', '},\n  {', json_str)    # 对象之间缺少逗号
+
+            # 6. 修复引号问题
+            json_str = re.sub(r'([{,]\s*)(\w+)(\s*:)', r'\1"\2"\3', json_str)  # 键缺少引号
+
+            # 7. 修复字符串中的特殊字符
+            # 转义字符串中的反斜杠和引号
+            json_str = re.sub(r'("(?:original_text|translation)":\s*"[^"]*?)\\(?![nrt"\\])([^"]*?")', r'\1\\\\\2', json_str)
+
+            # 8. 确保正确的数组格式
+            json_str = json_str.strip()
+            if not json_str.startswith('['):
+                json_str = '[' + json_str
+            if not json_str.endswith(']'):
+                json_str = json_str + ']'
+
+            # 9. 最后清理：移除多余的空白字符
+            lines = json_str.split('\n')
+            cleaned_lines = []
+            for line in lines:
+                line = line.strip()
+                if line:
+                    cleaned_lines.append(line)
+            json_str = '\n'.join(cleaned_lines)
+
+            print("✅ JSON修复完成")
+            print(f"🔍 修复后的JSON预览: {json_str[:200]}...")
+            return json_str
+
+        except Exception as e:
+            print(f"⚠️ JSON修复失败: {e}")
+            return json_str
+
+    def parse_translation_response(self, content):
+        """解析翻译响应"""
+        try:
+            print(f"🔍 开始解析响应，内容长度: {len(content)}")
+
+            # 尝试多种方式提取JSON部分
+            json_str = None
+
+            # 方法1: 查找JSON代码块
+            json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
+            if json_match:
+                json_str = json_match.group(1)
+                print("✅ 找到JSON代码块")
+            else:
+                # 方法2: 查找数组格式 [...]
+                array_match = re.search(r'\[\s*\{.*?\}\s*\]', content, re.DOTALL)
+                if array_match:
+                    json_str = array_match.group(0)
+                    print("✅ 找到JSON数组")
+                else:
+                    # 方法3: 尝试直接解析整个内容
+                    json_str = content.strip()
+                    print("⚠️ 尝试直接解析内容")
+
+            if not json_str:
+                print("❌ 无法找到JSON内容")
+                return self.parse_text_response(content)
+
+            # 清理JSON字符串
+            json_str = json_str.strip()
+
+            # 尝试修复常见的JSON错误
+            json_str = self.fix_json_errors(json_str)
+
+            # 解析JSON
+            results = json.loads(json_str)
+            print(f"✅ JSON解析成功，找到 {len(results) if isinstance(results, list) else 1} 个项目")
+
+            # 验证结果格式
+            if isinstance(results, list):
+                validated_results = []
+                for item in results:
+                    if isinstance(item, dict) and 'original_text' in item and 'translation' in item:
+                        validated_results.append({
+                            'type': item.get('type', '未分类'),
+                            'original_text': item.get('original_text', ''),
+                            'translation': item.get('translation', '')
+                        })
+                print(f"✅ 验证完成，有效项目: {len(validated_results)}")
+                return validated_results
+            else:
+                # 如果不是列表格式，尝试转换
+                if isinstance(results, dict):
+                    return [results]
+
+        except json.JSONDecodeError as e:
+            print(f"❌ JSON解析失败: {e}")
+            print(f"📄 尝试解析的内容: {json_str[:200]}...")
+
+            # 尝试手动重构JSON
+            print("🔧 尝试手动重构JSON...")
+            reconstructed_json = self.reconstruct_json_from_text(content)
+            if reconstructed_json:
+                return reconstructed_json
+
+            # 如果JSON解析失败，尝试简单的文本解析
+            return self.parse_text_response(content)
+
+    def reconstruct_json_from_text(self, content):
+        """从混乱的文本中重构JSON数据"""
+        try:
+            print("🔧 开始手动重构JSON...")
+
+            # 提取所有可能的翻译对
+            results = []
+
+            # 使用正则表达式提取 "original_text" 和 "translation" 对
+            pattern = r'"original_text":\s*"([^"]*(?:\\.[^"]*)*)"[^}]*?"translation":\s*"([^"]*(?:\\.[^"]*)*)"'
+            matches = re.findall(pattern, content, re.DOTALL)
+
+            for i, (original, translation) in enumerate(matches):
+                # 清理文本
+                original = original.replace('\\n', ' ').replace('\n', ' ').strip()
+                translation = translation.replace('\\n', ' ').replace('\n', ' ').strip()
+
+                if original and translation:
+                    results.append({
+                        'type': '对话气泡',
+                        'original_text': original,
+                        'translation': translation
+                    })
+
+            # 如果没有找到匹配，尝试其他模式
+            if not results:
+                # 尝试查找类似 "text": "content" 的模式
+                text_pattern = r'"([^"]*)":\s*"([^"]*)"'
+                text_matches = re.findall(text_pattern, content)
+
+                current_item = {}
+                for key, value in text_matches:
+                    if 'original' in key.lower() or 'text' in key.lower():
+                        current_item['original_text'] = value.strip()
+                    elif 'translation' in key.lower() or 'trans' in key.lower():
+                        current_item['translation'] = value.strip()
+                        if 'original_text' in current_item:
+                            current_item['type'] = '对话气泡'
+                            results.append(current_item.copy())
+                            current_item = {}
+
+            if results:
+                print(f"✅ 成功重构JSON，找到 {len(results)} 个项目")
+                return results
+            else:
+                print("❌ 无法重构JSON")
+                return None
+
+        except Exception as e:
+            print(f"❌ JSON重构失败: {e}")
+            return None
+
+        except Exception as e:
+            print(f"❌ 解析响应时出错: {e}")
+            return []
+
+    def parse_text_response(self, content):
+        """解析纯文本响应"""
+        try:
+            print("🔍 尝试文本解析...")
+
+            # 检查是否包含JSON内容（避免重复包装）
+            if '```json' in content or (content.strip().startswith('[') and content.strip().endswith(']')):
+                print("⚠️ 内容似乎包含JSON，尝试重新解析")
+                # 尝试再次提取JSON
+                if '```json' in content:
+                    json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
+                    if json_match:
+                        try:
+                            results = json.loads(json_match.group(1))
+                            if isinstance(results, list):
+                                return results
+                        except:
+                            pass
+
+                # 如果是数组格式，直接尝试解析
+                content_clean = content.strip()
+                if content_clean.startswith('[') and content_clean.endswith(']'):
+                    try:
+                        results = json.loads(content_clean)
+                        if isinstance(results, list):
+                            return results
+                    except:
+                        pass
+
+            # 简单的文本解析
+            lines = content.strip().split('\n')
+            results = []
+
+            current_item = {}
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+
+                if line.startswith('原文:') or line.startswith('Original:'):
+                    current_item['original_text'] = line.split(':', 1)[1].strip()
+                elif line.startswith('译文:') or line.startswith('Translation:'):
+                    current_item['translation'] = line.split(':', 1)[1].strip()
+                    if 'original_text' in current_item:
+                        current_item['type'] = '文本'
+                        results.append(current_item.copy())
+                        current_item = {}
+                elif '→' in line or '->' in line:
+                    # 处理 "原文 → 译文" 格式
+                    parts = line.split('→' if '→' in line else '->')
+                    if len(parts) == 2:
+                        results.append({
+                            'type': '文本',
+                            'original_text': parts[0].strip(),
+                            'translation': parts[1].strip()
+                        })
+
+            # 如果没有解析到任何结果，但内容很长，可能是格式问题
+            if not results:
+                # 检查内容长度，如果太长可能是JSON格式错误
+                if len(content) > 100 and ('{' in content or '[' in content):
+                    print("⚠️ 内容较长且包含JSON字符，可能是格式问题")
+                    return [{
+                        'type': '解析错误',
+                        'original_text': '响应格式错误',
+                        'translation': 'AI返回的内容格式不正确，请检查提示词设置或重试'
+                    }]
+                else:
+                    # 短内容作为简单翻译结果
+                    results.append({
+                        'type': '翻译结果',
+                        'original_text': '图片内容',
+                        'translation': content.strip()
+                    })
+
+            print(f"✅ 文本解析完成，找到 {len(results)} 个项目")
+            return results
+
+        except Exception as e:
+            print(f"❌ 文本解析失败: {e}")
+            return [{
+                'type': '错误',
+                'original_text': '解析失败',
+                'translation': content[:500] + '...' if len(content) > 500 else content
+            }]
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+翻译日志模块
+以只追加的JSONL文件记录图片列表变化和每一页完成的翻译结果，
+每条记录写入后立即刷盘；程序崩溃后重放日志即可恢复图片列表和已完成的结果
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import config
+
+# 日志中被覆盖的记录超过该比例时，启动时压缩重写
+COMPACT_RATIO = 2
+
+
+class TranslationJournal:
+    """只追加的翻译日志"""
+
+    def __init__(self, path: str = None):
+        self.path = path or config.JOURNAL_FILE
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load(self) -> Tuple[List[str], Dict[str, List[Dict]]]:
+        """
+        重放日志
+
+        Returns:
+            (图片路径列表, {图片路径: 翻译结果})；崩溃时写了一半的最后一行会被忽略
+        """
+        images = {}  # 重放期间用有序字典代替列表，增删都是O(1)
+        results = {}
+        if not os.path.exists(self.path):
+            return [], results
+
+        record_count = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                record_count += 1
+                self._apply(record, images, results)
+        image_list = list(images)
+
+        # 反复增删导致日志膨胀时，用当前状态重写
+        if record_count > COMPACT_RATIO * (len(image_list) + len(results)) + 1:
+            self.compact(image_list, results)
+
+        return image_list, results
+
+    def record_images_added(self, image_paths: List[str]):
+        """记录新增的图片"""
+        if image_paths:
+            self._append({"op": "add", "paths": list(image_paths)})
+
+    def record_image_removed(self, image_path: str):
+        """记录移除的图片（连同其翻译结果）"""
+        self._append({"op": "remove", "path": image_path})
+
+    def record_cleared(self):
+        """记录清空图片列表"""
+        self._append({"op": "clear"})
+
+    def record_result(self, image_path: str, results: List[Dict]):
+        """记录一页完成的翻译结果"""
+        self._append({"op": "result", "path": image_path, "results": results, "time": time.time()})
+
+    def record_result_cleared(self, image_path: str):
+        """记录清空某一页的翻译结果（图片保留在列表中）"""
+        self._append({"op": "discard", "path": image_path})
+
+    def compact(self, image_list: List[str], results: Dict[str, List[Dict]]):
+        """用当前状态原子地重写日志"""
+        temp_path = self.path + ".tmp"
+        with self._lock:
+            self._close_file()
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(self._dumps({"op": "add", "paths": list(image_list)}))
+                for image_path in image_list:
+                    if image_path in results:
+                        f.write(self._dumps({"op": "result", "path": image_path,
+                                             "results": results[image_path]}))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+
+    def close(self):
+        with self._lock:
+            self._close_file()
+
+    def _append(self, record: Dict):
+        """追加一条记录并刷盘"""
+        line = self._dumps(record)
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                    if not self._ends_with_newline():
+                        # 上次崩溃留下的半行单独成行，避免和新记录粘在一起
+                        self._file.write("\n")
+                self._file.write(line)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                print(f"⚠️ 写入翻译日志失败: {e}")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def _dumps(record: Dict) -> str:
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def _apply(record: Dict, images: Dict[str, None], results: Dict[str, List[Dict]]):
+        op = record.get("op")
+        if op == "add":
+            for image_path in record.get("paths", []):
+                images.setdefault(image_path, None)
+        elif op == "remove":
+            image_path = record.get("path")
+            images.pop(image_path, None)
+            results.pop(image_path, None)
+        elif op == "clear":
+            images.clear()
+            results.clear()
+        elif op == "discard":
+            results.pop(record.get("path"), None)
+        elif op == "result":
+            image_path = record.get("path")
+            if image_path and isinstance(record.get("results"), list):
+                results[image_path] = record["results"]
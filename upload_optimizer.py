@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+上传优化模块
+在base64编码前对图片进行缩小和重新编码，减少上传字节数，
+并返回缩放比例，便于把模型返回的坐标映射回原图像素
+"""
+
+import io
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageOps
+
+# 支持的上传格式及其MIME类型
+UPLOAD_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "PNG": "image/png",
+}
+
+# 默认上传设置
+DEFAULT_MAX_EDGE = 2048   # 最大长边（像素），0表示不缩小
+DEFAULT_FORMAT = "JPEG"
+DEFAULT_QUALITY = 85
+
+
+def prepare_image_for_upload(image_bytes: bytes, max_edge: int = DEFAULT_MAX_EDGE,
+                             output_format: str = DEFAULT_FORMAT,
+                             quality: int = DEFAULT_QUALITY) -> Tuple[bytes, str, float]:
+    """
+    缩小并重新编码图片
+
+    Args:
+        image_bytes: 原始图片字节
+        max_edge: 最大长边像素数，0表示保持原尺寸
+        output_format: 输出格式（JPEG/WEBP/PNG）
+        quality: JPEG/WebP编码质量（1-100）
+
+    Returns:
+        (编码后的字节, MIME类型, 缩放比例)；缩放比例 = 上传图片宽度 / 原图宽度
+    """
+    output_format = output_format.upper()
+    if output_format not in UPLOAD_MIME_TYPES:
+        raise ValueError(f"不支持的上传格式: {output_format}")
+
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        source_format = (img.format or "").upper()
+        orientation = _exif_orientation(img)
+
+        # EXIF方向为5-8时，摆正后的宽高互换
+        orig_width, orig_height = img.size
+        if orientation in (5, 6, 7, 8):
+            orig_width, orig_height = orig_height, orig_width
+
+        target_width, target_height = _fit_long_edge(orig_width, orig_height, max_edge)
+        needs_resize = (target_width, target_height) != (orig_width, orig_height)
+        can_send_original = source_format in UPLOAD_MIME_TYPES and orientation == 1
+
+        # 原图已经足够小且就是目标格式时，不重新编码（避免二次压缩损失）
+        if not needs_resize and can_send_original and source_format == output_format:
+            return image_bytes, UPLOAD_MIME_TYPES[source_format], 1.0
+
+        if needs_resize and source_format == "JPEG":
+            # JPEG可以在解码时直接按1/2、1/4、1/8缩小，节省解码时间和内存
+            draft_size = (target_height, target_width) if orientation in (5, 6, 7, 8) else (target_width, target_height)
+            img.draft("RGB", draft_size)
+
+        encoded = _encode(ImageOps.exif_transpose(img), (target_width, target_height), output_format, quality)
+
+    # 未缩小且重新编码反而更大时，若原格式可直接上传则保留原图
+    if not needs_resize and can_send_original and len(encoded) >= len(image_bytes):
+        return image_bytes, UPLOAD_MIME_TYPES[source_format], 1.0
+
+    scale = target_width / orig_width if orig_width else 1.0
+    print(f"📦 上传优化: {orig_width}x{orig_height} → {target_width}x{target_height}, "
+          f"{len(image_bytes)} → {len(encoded)} 字节 ({output_format})")
+    return encoded, UPLOAD_MIME_TYPES[output_format], scale
+
+
+def encode_image_for_upload(image: Image.Image, max_edge: int = DEFAULT_MAX_EDGE,
+                            output_format: str = DEFAULT_FORMAT,
+                            quality: int = DEFAULT_QUALITY) -> Tuple[bytes, str, float]:
+    """
+    缩小并编码已解码的PIL图片（如长图切片）
+
+    Args:
+        image: 已摆正方向的PIL图片
+        max_edge: 最大长边像素数，0表示保持原尺寸
+        output_format: 输出格式（JPEG/WEBP/PNG）
+        quality: JPEG/WebP编码质量（1-100）
+
+    Returns:
+        (编码后的字节, MIME类型, 缩放比例)
+    """
+    output_format = output_format.upper()
+    if output_format not in UPLOAD_MIME_TYPES:
+        raise ValueError(f"不支持的上传格式: {output_format}")
+
+    width, height = image.size
+    target_size = _fit_long_edge(width, height, max_edge)
+    encoded = _encode(image, target_size, output_format, quality)
+    scale = target_size[0] / width if width else 1.0
+    return encoded, UPLOAD_MIME_TYPES[output_format], scale
+
+
+def scale_box_to_original(box: List[float], scale: float) -> List[int]:
+    """
+    把上传图片上的坐标映射回原图像素
+
+    Args:
+        box: [x1, y1, x2, y2] 上传图片坐标
+        scale: prepare_image_for_upload返回的缩放比例
+
+    Returns:
+        原图坐标
+    """
+    if not scale or scale == 1.0:
+        return [int(round(v)) for v in box]
+    return [int(round(v / scale)) for v in box]
+
+
+def scale_detections_to_original(detections: List[Dict], scale: float) -> List[Dict]:
+    """把检测结果中的box_2d全部映射回原图坐标"""
+    if not scale or scale == 1.0:
+        return detections
+
+    mapped = []
+    for detection in detections:
+        detection = dict(detection)
+        box = detection.get('box_2d')
+        if isinstance(box, (list, tuple)) and len(box) == 4:
+            try:
+                detection['box_2d'] = scale_box_to_original(box, scale)
+            except (TypeError, ValueError):
+                pass
+        mapped.append(detection)
+    return mapped
+
+
+def _fit_long_edge(width: int, height: int, max_edge: int) -> Tuple[int, int]:
+    """计算长边不超过max_edge的目标尺寸"""
+    long_edge = max(width, height)
+    if not max_edge or max_edge <= 0 or long_edge <= max_edge:
+        return width, height
+    ratio = max_edge / long_edge
+    return max(1, round(width * ratio)), max(1, round(height * ratio))
+
+
+def _encode(image: Image.Image, target_size: Tuple[int, int], output_format: str, quality: int) -> bytes:
+    """转换颜色模式、缩放并编码为目标格式"""
+    image = _convert_mode(image, output_format)
+    if image.size != target_size:
+        image = image.resize(target_size, Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    save_kwargs = {"optimize": True}
+    if output_format in ("JPEG", "WEBP"):
+        save_kwargs["quality"] = max(1, min(int(quality), 100))
+    image.save(buffer, format=output_format, **save_kwargs)
+    return buffer.getvalue()
+
+
+def _convert_mode(image: Image.Image, output_format: str) -> Image.Image:
+    """转换为目标格式支持的颜色模式，透明背景铺白"""
+    if output_format == "PNG":
+        if image.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            return image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        return image
+
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    if image.mode != "RGB":
+        return image.convert("RGB")
+    return image
+
+
+def _exif_orientation(img: Image.Image) -> int:
+    """读取EXIF方向标记，缺失时视为正向（1）"""
+    try:
+        return int(img.getexif().get(0x0112, 1))
+    except Exception:
+        return 1